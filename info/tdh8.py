@@ -15,6 +15,7 @@
 
 import struct
 import logging
+from collections import deque
 
 
 from chirp import chirp_common, errors, util, directory, memmap
@@ -932,6 +933,29 @@ TD_H3 = b"\x50\x56\x4F\x4A\x48\x5C\x14"
 TD_H3_PLUS = TD_H3
 RT_730 = b"\x50\x47\x4F\x4A\x48\xC3\x44"
 
+# BCD byte <-> 0..99 (bytes with a nibble above 9 are not in BCD_DECODE)
+BCD_ENCODE = [((n // 10) << 4) | (n % 10) for n in range(100)]
+BCD_DECODE = dict((bcd, n) for n, bcd in enumerate(BCD_ENCODE))
+
+
+def _build_vfo_tone_tables():
+    """Map VFO tone words (low byte | high byte << 8) to setting strings"""
+    decode = {0xFFFF: "Off"}
+    for tone in chirp_common.TONES:
+        tenths = int(round(tone * 10))
+        word = BCD_ENCODE[tenths // 100] << 8 | BCD_ENCODE[tenths % 100]
+        decode[word] = "%2.1fHz" % tone
+    for code in chirp_common.DTCS_CODES:
+        low = BCD_ENCODE[code % 100]
+        decode[(0x80 | code // 100) << 8 | low] = "%03iN" % code
+        decode[(0xC0 | code // 100) << 8 | low] = "%03iI" % code
+    encode = dict((text, [word & 0xFF, word >> 8])
+                  for word, text in decode.items())
+    return decode, encode
+
+
+VFO_TONE_DECODE, VFO_TONE_ENCODE = _build_vfo_tone_tables()
+
 
 def _do_status(radio, block):
     status = chirp_common.Status()
@@ -1016,7 +1040,7 @@ def response_mode(mode):
 def _read_block(radio, start, size):
     serial = radio.pipe
 
-    cmd = struct.pack(">cHb", b'R', start, size)
+    cmd = struct.pack(">cHB", b'R', start, size)
     expectedresponse = b"W" + cmd[1:]
 
     try:
@@ -1032,6 +1056,27 @@ def _read_block(radio, start, size):
     return block_data
 
 
+def _probe_read_size(radio):
+    # Try the larger read sizes the model may support, smallest first, and
+    # keep the last one that answered in full and matched a 0x20 read
+    reference = _read_block(radio, 0, 0x20)
+    size = 0x20
+
+    for candidate in radio._read_sizes:
+        try:
+            block = _read_block(radio, 0, candidate)
+        except errors.RadioError:
+            radio.pipe.reset_input_buffer()
+            break
+        if len(block) != candidate or block[:0x20] != reference:
+            radio.pipe.reset_input_buffer()
+            break
+        size = candidate
+
+    LOG.info("Using read block size 0x%02x" % size)
+    return size
+
+
 def _get_radio_firmware_version(radio):
     if radio.MODEL in ALL_MODEL:
         block = _read_block(radio, 0x1B40, 0x20)
@@ -1046,18 +1091,36 @@ IDENT_BLACKLIST = {
 
 def _do_download(radio):
     # Radio must have already been ident'd by detect_from_serial()
-    data = radio.ident_mode
+    ident = radio.ident_mode
+    radio._read_size = 0x20
+    if radio._read_sizes:
+        radio._read_size = _probe_read_size(radio)
+
     # Main block
     LOG.info("Downloading...")
 
-    for i in range(0, radio._memsize, 0x20):
-        block = _read_block(radio, i, 0x20)
-        data += block
-        _do_status(radio, i)
+    # The image is the ident followed by memory up to _memsize (rounded
+    # up to a block); only _ranges_read is read, the rest stays 0xFF
+    end = (radio._memsize + 0x1F) & ~0x1F
+    data = bytearray(b"\xFF" * (len(ident) + end))
+    data[:len(ident)] = ident
+    for start_addr, end_addr in radio._ranges_read or [(0, end)]:
+        end_addr = min(end_addr, end)
+        for addr in range(start_addr, end_addr, radio._read_size):
+            size = min(radio._read_size, end_addr - addr)
+            block = _read_block(radio, addr, size)
+            if len(block) != size:
+                raise errors.RadioError("Short read at %04x." % addr)
+            data[len(ident) + addr:len(ident) + addr + size] = block
+            _do_status(radio, addr)
     _do_status(radio, radio._memsize)
     LOG.info("done.")
 
-    return memmap.MemoryMapBytes(data)
+    return memmap.MemoryMapBytes(bytes(data))
+
+
+WRITE_RETRIES = 2
+WRITE_SYNC_WINDOWS = 4
 
 
 def _exit_write_block(radio):
@@ -1069,19 +1132,98 @@ def _exit_write_block(radio):
         raise errors.RadioError("Radio refused to exit programming mode")
 
 
-def _write_block(radio, addr, data):
-    serial = radio.pipe
-    cmd = struct.pack(">cHb", b'W', addr, 0x20)
+def _write_packet(radio, addr):
+    cmd = struct.pack(">cHB", b'W', addr, 0x20)
     data = radio.get_mmap()[addr + 8: addr + 40]
     # The checksum needs to be in the last
     check_sum = bytes([sum(data) & 0xFF])
-    data += check_sum
-    used_data = cmd + data
-    serial.write(used_data)
+    return cmd + data + check_sum
 
-    ack = radio.pipe.read(1)
-    if ack != b"\x06":
-        raise errors.RadioError("Radio refused to accept block 0x%04x" % addr)
+
+def _write_blocks(radio, addrs):
+    # Keep up to radio._write_window W packets ahead of their ACKs. ACKs
+    # are all the same byte, so a lost one only shows up as a short count:
+    # the window is drained every WRITE_SYNC_WINDOWS windows, and a missing
+    # ACK resends from the last point where every block was acknowledged.
+    # Any other reply is in order, so it resends from the block it answers.
+    # Same loop as H3PlusWriter.write_blocks in scripts/write_memory.py
+    # (asyncio, BLE or cable); fix both together.
+    serial = radio.pipe
+    window = max(1, radio._write_window)
+    span = window * WRITE_SYNC_WINDOWS
+    inflight = deque()
+    confirmed = pos = 0
+    retries = 0
+
+    while confirmed < len(addrs):
+        limit = min(len(addrs), confirmed + span)
+        while pos < limit and len(inflight) < window:
+            serial.write(_write_packet(radio, addrs[pos]))
+            inflight.append(pos)
+            pos += 1
+
+        index = inflight.popleft()
+        ack = serial.read(1)
+        if ack == b"\x06":
+            _do_status(radio, addrs[index])
+            if not inflight:
+                confirmed = pos
+                retries = 0
+            continue
+
+        rewind = index if ack else confirmed
+        if retries >= WRITE_RETRIES:
+            if ack:
+                msg = "Radio refused to accept block 0x%04x" % addrs[index]
+            else:
+                msg = "Radio did not acknowledge blocks 0x%04x-0x%04x" % (
+                    addrs[confirmed], addrs[pos - 1])
+            raise errors.RadioError(msg)
+        retries += 1
+        LOG.warning("Missing ACK, resending from block 0x%04x" %
+                    addrs[rewind])
+        if inflight:
+            serial.read(len(inflight))
+        serial.reset_input_buffer()
+        inflight.clear()
+        pos = rewind
+
+
+def _read_write_ranges(radio, image, ranges):
+    # What the radio holds now in `ranges`, laid out like `image`. Read back from the radio being written rather than taken
+    # from an earlier download, which may have come from another radio
+    # or been edited on the radio since
+    size = _probe_read_size(radio) if radio._read_sizes else 0x20
+    current = bytearray(image)
+    for start_addr, end_addr in ranges:
+        for addr in range(start_addr, end_addr, size):
+            length = min(size, end_addr - addr)
+            block = _read_block(radio, addr, length)
+            if len(block) != length:
+                raise errors.RadioError("Short read at %04x." % addr)
+            current[addr + 8: addr + 8 + length] = block
+    return current
+
+
+def _dirty_blocks(radio):
+    # 0x20 blocks of the upload ranges that differ from the radio
+    new = radio.get_mmap().get_packed()
+    ranges = _upload_ranges(radio)
+    current = _read_write_ranges(radio, new, ranges)
+    return [addr for start_addr, end_addr in ranges
+            for addr in range(start_addr, end_addr, 0x20)
+            if new[addr + 8: addr + 40] != current[addr + 8: addr + 40]]
+
+
+def _upload_ranges(radio):
+    # A full upload writes only what a download reads: the rest of the
+    # image is 0xFF filler that never came from this radio
+    if not radio._ranges_read:
+        return radio._ranges_main
+    return [(max(start, read_start), min(end, read_end))
+            for start, end in radio._ranges_main
+            for read_start, read_end in radio._ranges_read
+            if max(start, read_start) < min(end, read_end)]
 
 
 def _do_upload(radio):
@@ -1098,10 +1240,13 @@ def _do_upload(radio):
     # Main block
     LOG.debug("Uploading...")
 
-    for start_addr, end_addr in radio._ranges_main:
-        for addr in range(start_addr, end_addr, 0x20):
-            _write_block(radio, addr, 0x20)
-            _do_status(radio, addr)
+    addrs = [addr for start_addr, end_addr in _upload_ranges(radio)
+             for addr in range(start_addr, end_addr, 0x20)]
+    if radio._delta_upload:
+        addrs = _dirty_blocks(radio)
+        LOG.info("Delta upload: %i changed blocks" % len(addrs))
+
+    _write_blocks(radio, addrs)
     _exit_write_block(radio)
     LOG.debug("Upload all done.")
 
@@ -1135,6 +1280,16 @@ class TDH8(chirp_common.CloneModeRadio):
     _gmrs = False
     _ham = False
     _mem_params = (0x1F2F)
+    # larger read sizes to probe before downloading (0x20 if empty)
+    _read_sizes = []
+    # W packets sent ahead of their ACK during upload (1 = lockstep)
+    _write_window = 1
+    # read the upload ranges back and write only the blocks that changed
+    _delta_upload = False
+    # ranges holding data; a download reads only these and fills the rest
+    # of the image with 0xFF, and a full upload writes only these too
+    # (everything up to _memsize / in _ranges_main if empty)
+    _ranges_read = []
 
     # offset of fw version in image file
     _fw_ver_file_start = 0x1838
@@ -1166,6 +1321,8 @@ class TDH8(chirp_common.CloneModeRadio):
                       ('4', 0x04), ('5', 0x05), ('6', 0x06), ('7', 0x07),
                       ('8', 0x08), ('9', 0x09), ('A', 0x0a), ('B', 0x0b),
                       ('C', 0x0c), ('D', 0x0d), ('*', 0x0e), ('#', 0x0f)]
+    _dtmf_decode = dict((code, char) for char, code in _dtmf_code_map)
+    _dtmf_encode = dict(_dtmf_code_map)
 
     @classmethod
     def detect_from_serial(cls, pipe):
@@ -1261,18 +1418,27 @@ class TDH8(chirp_common.CloneModeRadio):
 
     # decode radio stored binary vfo tone code into human readable form
     def _decode_vfo_tone(self, code):
-        if code[0] + (code[1] << 8) == 0xffff:  # Off
-            tone = 'Off'
-        elif 0x06 <= code[1] <= 0x25:  # CTCSS
-            tone = '%2.1fHz' % (int(hex(code[1])[2:] +
-                                    "%0.2d" % float(hex(code[0])[2:])) / 10)
-        elif code[1] & 0x40:  # DCS inverse
-            tone = hex(code[1] & ~0xc0)[2:] + hex(code[0])[2:] + 'I'
-        elif code[1] & 0x80:  # DCS normal
-            tone = hex(code[1] & ~0x80)[2:] + hex(code[0])[2:] + 'N'
+        low, high = int(code[0]), int(code[1])
+        tone = VFO_TONE_DECODE.get(low | high << 8)
+        if tone is not None:
+            return tone
+
+        digits = BCD_DECODE.get(low)
+        if digits is None:
+            tone = None
+        elif 0x06 <= high <= 0x25 and high in BCD_DECODE:
+            # CTCSS outside chirp_common.TONES
+            tone = '%2.1fHz' % ((BCD_DECODE[high] * 100 + digits) / 10.0)
+        elif high & 0x40:  # DCS inverse
+            tone = '%03iI' % ((high & 0x0F) * 100 + digits)
+        elif high & 0x80:  # DCS normal
+            tone = '%03iN' % ((high & 0x0F) * 100 + digits)
         else:
-            msg = "Invalid tone code from radio: %s" %  \
-                hex(code[0] + (code[1] << 8))
+            tone = None
+
+        if tone is None:
+            msg = "Invalid tone code from radio: %s" % \
+                hex(low + (high << 8))
             LOG.exception(msg)
             raise InvalidValueError(msg)
 
@@ -1280,21 +1446,9 @@ class TDH8(chirp_common.CloneModeRadio):
 
     # decode the binary coded value into a DTMF char
     def _decode_dtmf(self, list_val, has_len_byte=False):
-        val = ""
-        len_val = 0
-        x = 1 if has_len_byte else 0
-
-        while len_val < (len(list_val) - x):
-            if list_val[len_val] != 0xff:
-                for e in self._dtmf_code_map:
-                    if e[1] == list_val[len_val]:
-                        val += e[0]
-                        break
-                len_val += 1
-            else:
-                len_val += 1
-
-        return val
+        end = len(list_val) - (1 if has_len_byte else 0)
+        decode = self._dtmf_decode
+        return "".join(decode.get(int(list_val[i]), "") for i in range(end))
 
     # Encoding processing
     def _encode_tone(self, memval, mode, value, pol):
@@ -1314,43 +1468,31 @@ class TDH8(chirp_common.CloneModeRadio):
     # encode human readable vfo tone text into a radio storable
     # binary one code 2 element array
     def _encode_vfo_tone(self, tone):
-        code = [0] * 2
-        if tone == "Off":
-            code[0] = code[1] = 0xff
-        elif tone.endswith('Hz'):  # CTCSS
-            code[0] = int("%02d" %
-                          (float("%s" % tone[tone.index('.') - 1:
-                           tone.index('.') + 2]) * 10), 16)
-            code[1] = int(str(int(tone[:tone.index('.') - 1])), 16)
-        elif tone.endswith('I'):  # inverse DCS
-            code[0] = int(tone[1:3], 16)
-            code[1] = 0xc0 + int(tone[0:1], 16)
-        elif tone.endswith('N'):  # normal DCS
-            code[0] = int(tone[1:3], 16)
-            code[1] = 0x80 + int(tone[0:1], 16)
-        else:
-            msg = "Unknown CTCSS/DTC tone: %s" % tone
-            LOG.exception(msg)
-            raise InvalidValueError(msg)
+        code = VFO_TONE_ENCODE.get(tone)
+        if code is not None:
+            return list(code)
 
-        return code
+        try:
+            if tone.endswith('Hz'):  # CTCSS outside chirp_common.TONES
+                tenths = int(round(float(tone[:-2]) * 10))
+                return [BCD_ENCODE[tenths % 100], BCD_ENCODE[tenths // 100]]
+            elif tone.endswith('I') or tone.endswith('N'):  # DCS
+                value = int(tone[:-1])
+                flag = 0xc0 if tone.endswith('I') else 0x80
+                return [BCD_ENCODE[value % 100], flag + value // 100]
+        except (ValueError, IndexError):
+            pass
+
+        msg = "Unknown CTCSS/DTC tone: %s" % tone
+        LOG.exception(msg)
+        raise InvalidValueError(msg)
 
     # encode the DTMF char into the binary value the radio expects
     def _encode_dtmf(self, val, len_byte=True):
-        list_val = []
-        len_val = 0
-        code_len = 0
-        while len_val < (len(val)):
-            if val[len_val] != ' ':
-                for e in self._dtmf_code_map:
-                    if e[0] == val[len_val] or e[0] == val:
-                        list_val.append(e[1])
-                        break
-                len_val += 1
-                code_len += 1
-            else:
-                list_val.append(0xff)
-                len_val += 1
+        encode = self._dtmf_encode
+        list_val = [0xff if char == ' ' else encode[char]
+                    for char in val if char == ' ' or char in encode]
+        code_len = sum(1 for char in val if char != ' ')
 
         if len_byte:
             # set len byte to 0 if all elements are 0xff
@@ -3259,6 +3401,11 @@ class TDH3_Plus(TDH3):
     _mil_airband = [(220000000, 399998750)]
     _airband = TDH3._airband + _mil_airband
     _rxbands = TDH3._rxbands + _airband
+    _read_sizes = [0x40, 0x80, 0xFF]
+    _write_window = 4
+    _delta_upload = True
+    # everything memory-map.md has seen non-0xFF below 0x2000
+    _ranges_read = [(0x0000, 0x1500), (0x1800, 0x1C40), (0x1F00, 0x1F80)]
 
     def get_features(self):
         rf = super().get_features()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+bench.py - Throughput and codec benchmarks, reported as JSON
+
+Clone benchmarks run the BLE dumper and writer against radio_sim.py
+(fixed latency, no jitter, so runs are comparable): full and
+range-limited reads, full, range-limited and delta writes. Each reports
+seconds, payload bytes/s and round trips (GATT writes). When CHIRP is
+importable, info/tdh8.py download/upload run over the simulated serial
+port too.
+
+Microbenchmarks time channel decode/encode (channel_codec.py and, with
+NumPy, channel_array.py), settings decode (tdh8, with CHIRP) and dump
+diffing (image_diff.py and, with NumPy, diff_dumps.py) over a corpus: a
+directory of dumps, or a seeded synthetic one. Benchmarks whose optional
+dependency is missing are listed under "skipped".
+
+Usage:
+    uv run bench.py [--corpus DIR] [--only GROUP ...] [--output FILE]
+                    [--latency S] [--mtu N] [--window N] [--repeat N]
+
+Output: {"meta": {commit, python, params}, "results": {name: {...}},
+"skipped": {name: reason}}, written to FILE or stdout.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import channel_codec
+import clone_transport
+import dump_memory
+import image_diff
+import radio_sim
+import sparse_image
+import write_memory
+from dump_memory import MEMORY_END
+
+ROOT = Path(__file__).resolve().parent.parent
+GROUPS = ["clone", "codec", "diff"]
+CORPUS_SIZE = 32  # Synthetic images
+DELTA_CHANNELS = 3  # Channels changed for the delta write
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def synthetic_corpus(count=CORPUS_SIZE, seed=0):
+    """`count` images of a radio with 50-199 programmed channels, each a small edit of the last"""
+    rng = random.Random(seed)
+    image = bytearray(b"\xff" * MEMORY_END)
+    image[0:0x10] = bytes(0x10)
+    image[0x0C90:0x1380] = rng.randbytes(0x1380 - 0x0C90)
+    channel_codec.encode_channels(image, [random_channel(rng, n) for n in range(1, rng.randint(50, 199) + 1)])
+    images = [bytes(image)]
+    for _ in range(count - 1):
+        if rng.random() < 0.5:
+            channel_codec.encode_channels(image, [random_channel(rng, rng.randint(1, 199))])
+        else:
+            image[rng.randrange(0x0C90, 0x0CD0)] = rng.randrange(256)  # A setting
+        images.append(bytes(image))
+    return images
+
+
+def random_channel(rng, number):
+    freq = rng.choice([144, 145, 146, 430, 435, 446, 462]) * 1_000_000 + rng.randrange(80) * 12_500
+    tone = rng.choice([("", None, None), ("Tone", 88.5, None), ("Tone", 123.0, None), ("DTCS", 23, "N")])
+    return channel_codec.Channel(number, rx_freq=freq, tx_freq=freq, rx_tone=tone, tx_tone=tone,
+                                 narrow=rng.random() < 0.3, high_power=rng.random() < 0.7,
+                                 name=f"CH{number}", scan=rng.random() < 0.8)
+
+
+def timeit(fn, repeat):
+    """Median and best wall time of `repeat` calls"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {"seconds": round(statistics.median(samples), 6), "best": round(min(samples), 6),
+            "repeat": repeat}
+
+
+def dirty_ranges(old, new, ranges):
+    """32-byte blocks of `ranges` that differ between two images"""
+    return [(addr, addr + write_memory.BLOCK_SIZE)
+            for addr in write_memory.plan_blocks(ranges)
+            if old[addr:addr + write_memory.BLOCK_SIZE] != new[addr:addr + write_memory.BLOCK_SIZE]]
+
+
+def clone_result(seconds, payload, round_trips, radio):
+    return {"seconds": round(seconds, 4), "bytes": payload,
+            "bytes_per_s": round(payload / seconds) if seconds else None,
+            "round_trips": round_trips, "radio": dict(radio.stats)}
+
+
+async def bench_read(image, ranges, args):
+    radio = radio_sim.SimRadio(image)
+    client = radio_sim.SimBleClient(radio, latency=args.latency, mtu=args.mtu)
+    link = clone_transport.BleTransport(client)
+    dumper = dump_memory.H3PlusDumper(window=args.window)
+    await link.start(dumper.notification_handler)
+    with contextlib.redirect_stdout(io.StringIO()):
+        await dumper.handshake(link)
+        handshake_writes = client.gatt_writes
+        start = time.perf_counter()
+        async with contextlib.aclosing(dumper.read_chunks(
+                link, dump_memory.plan_chunks(ranges, dumper.chunk_size), args.window)) as chunks:
+            async for addr, chunk in chunks:
+                dumper.store_chunk(addr, chunk)
+        seconds = time.perf_counter() - start
+    if any(dumper.memory[s:e] != image[s:e] for s, e in ranges):
+        raise RuntimeError("read image mismatch")
+    return clone_result(seconds, sum(e - s for s, e in ranges),
+                        client.gatt_writes - handshake_writes, radio)
+
+
+async def bench_write(old, new, ranges, args):
+    radio = radio_sim.SimRadio(old)
+    client = radio_sim.SimBleClient(radio, latency=args.latency, mtu=args.mtu)
+    link = clone_transport.BleTransport(client)
+    writer = write_memory.H3PlusWriter(window=args.window, ranges=ranges)
+    await link.start(writer.notification_handler)
+    with contextlib.redirect_stdout(io.StringIO()):
+        await writer.handshake(link)
+        handshake_writes = client.gatt_writes
+        start = time.perf_counter()
+        await writer.write_blocks(link, new, write_memory.plan_blocks(ranges))
+        seconds = time.perf_counter() - start
+    if any(radio.image[s:e] != new[s:e] for s, e in ranges):
+        raise RuntimeError("write image mismatch")
+    return clone_result(seconds, sum(e - s for s, e in ranges),
+                        client.gatt_writes - handshake_writes, radio)
+
+
+def import_tdh8():
+    """info/tdh8.py, or None when CHIRP isn't importable"""
+    sys.path.insert(0, str(ROOT / "info"))
+    try:
+        import tdh8
+    except ImportError:
+        return None
+    finally:
+        sys.path.remove(str(ROOT / "info"))
+    return tdh8
+
+
+def bench_clone(corpus, args, results, skipped):
+    image, edited = corpus[0], bytearray(corpus[0])
+    changed = [random_channel(random.Random(1), n) for n in (5, 77, 150)][:DELTA_CHANNELS]
+    channel_codec.encode_channels(edited, changed)
+    edited = bytes(edited)
+    channels = write_memory.WRITE_RANGES["channels"]
+
+    delta = dirty_ranges(image, edited, write_memory.WRITE_RANGES["all"])
+    runs = {
+        "clone.read_full": lambda: bench_read(image, dump_memory.READ_RANGES, args),
+        "clone.read_channels": lambda: bench_read(image, channels, args),
+        "clone.write_full": lambda: bench_write(image, edited, write_memory.WRITE_RANGES["all"], args),
+        "clone.write_channels": lambda: bench_write(image, edited, channels, args),
+        "clone.write_delta": lambda: bench_write(image, edited, delta, args),
+    }
+    for name, run in runs.items():
+        results[name] = asyncio.run(run())
+
+    tdh8 = import_tdh8()
+    if tdh8 is None:
+        skipped["clone.tdh8_download"] = skipped["clone.tdh8_upload_delta"] = "CHIRP not importable"
+        return
+
+    radio = tdh8.TDH3_Plus(radio_sim.SimSerial(radio_sim.SimRadio(image), latency=args.latency))
+    radio.ident_mode = tdh8._do_ident(radio.pipe, radio._idents[0])
+    start = time.perf_counter()
+    mmap = tdh8._do_download(radio)
+    seconds = time.perf_counter() - start
+    read = sum(end - start for start, end in radio._ranges_read or [(0, radio._memsize)])
+    results["clone.tdh8_download"] = {"seconds": round(seconds, 4), "bytes": read,
+                                      "bytes_per_s": round(read / seconds)}
+
+    data = bytearray(mmap.get_packed())
+    data[8:8 + MEMORY_END] = edited[:len(data) - 8]
+    radio._mmap = tdh8.memmap.MemoryMapBytes(bytes(data))
+    start = time.perf_counter()
+    tdh8._do_upload(radio)
+    results["clone.tdh8_upload_delta"] = {"seconds": round(time.perf_counter() - start, 4),
+                                          "radio": dict(radio.pipe.radio.stats)}
+
+
+def bench_codec(corpus, args, results, skipped):
+    images = corpus
+    decoded = [channel_codec.decode_channels(image) for image in images]
+
+    def encode():
+        for image, channels in zip(images, decoded):
+            channel_codec.encode_channels(bytearray(image), channels)
+
+    results["codec.channel_decode"] = timeit(
+        lambda: [channel_codec.decode_channels(image) for image in images], args.repeat)
+    results["codec.channel_encode"] = timeit(encode, args.repeat)
+    for name in ("codec.channel_decode", "codec.channel_encode"):
+        results[name]["images"] = len(images)
+
+    try:
+        import numpy as np
+        import channel_array
+    except ImportError:
+        skipped["codec.channel_table"] = "NumPy not installed"
+    else:
+        stack = np.stack([np.frombuffer(image, dtype=np.uint8) for image in images])
+        results["codec.channel_table"] = timeit(lambda: channel_array.channel_table(stack), args.repeat)
+        results["codec.channel_table"]["images"] = len(images)
+
+    tdh8 = import_tdh8()
+    if tdh8 is None:
+        skipped["codec.settings_decode"] = "CHIRP not importable"
+        return
+    radio = tdh8.TDH3_Plus(None)
+    radio._mmap = tdh8.memmap.MemoryMapBytes(bytes(8) + images[0][:radio._memsize])
+    radio.process_mmap()
+    results["codec.settings_decode"] = timeit(radio.get_settings, args.repeat)
+
+
+def bench_diff(corpus, args, results, skipped):
+    pairs = list(zip(corpus, corpus[1:]))
+    results["diff.image_diff"] = timeit(
+        lambda: [image_diff.diff_images(old, new) for old, new in pairs], args.repeat)
+    results["diff.image_diff"]["pairs"] = len(pairs)
+
+    try:
+        import numpy as np
+        import diff_dumps
+    except ImportError:
+        skipped["diff.change_matrix"] = "NumPy not installed"
+        return
+    stack = np.stack([np.frombuffer(image, dtype=np.uint8) for image in corpus])
+    results["diff.change_matrix"] = timeit(
+        lambda: diff_dumps.change_matrix(stack, diff_dumps.varying_columns(stack)), args.repeat)
+    results["diff.change_matrix"]["images"] = len(corpus)
+
+
+BENCHES = {"clone": bench_clone, "codec": bench_codec, "diff": bench_diff}
+
+
+def load_corpus(directory):
+    """Full images from a directory of .h3p/.bin/.h3ps dumps"""
+    images = []
+    for path in sorted(Path(directory).iterdir()):
+        if path.suffix in (".h3p", ".bin", ".h3ps"):
+            try:
+                image = sparse_image.load_image(path)
+            except (OSError, ValueError):
+                continue
+            if len(image) == MEMORY_END:
+                images.append(bytes(image))
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark clone throughput, codecs and diffing (JSON output)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  uv run bench.py --output bench.json            # Everything, synthetic corpus
+  uv run bench.py --only clone --window 8        # Clone throughput with 8 in flight
+  uv run bench.py --only codec diff --corpus dumps/
+        """
+    )
+    parser.add_argument('--corpus', metavar='DIR', help='Directory of dumps (default: synthetic)')
+    parser.add_argument('--only', nargs='+', choices=GROUPS, default=GROUPS, metavar='GROUP',
+                        help=f'Groups to run ({", ".join(GROUPS)})')
+    parser.add_argument('--output', metavar='FILE', help='Write JSON here (default: stdout)')
+    parser.add_argument('--latency', type=float, default=0.03, metavar='S',
+                        help='Simulated reply latency (default: 0.03)')
+    parser.add_argument('--mtu', type=int, default=247, help='Simulated ATT MTU (default: 247)')
+    parser.add_argument('--window', type=int, default=1, metavar='N',
+                        help='Requests/packets in flight (default: 1)')
+    parser.add_argument('--repeat', type=int, default=5, metavar='N',
+                        help='Runs per microbenchmark (default: 5)')
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+        if len(corpus) < 2:
+            print(f"✗ Error: Need at least 2 dumps in {args.corpus}")
+            sys.exit(1)
+    else:
+        corpus = synthetic_corpus()
+
+    results, skipped = {}, {}
+    for group in GROUPS:
+        if group in args.only:
+            BENCHES[group](corpus, args, results, skipped)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "corpus": args.corpus or f"synthetic:{len(corpus)}",
+            "latency": args.latency, "mtu": args.mtu, "window": args.window,
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+    text = json.dumps(report, indent=2) + "\n"
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        sys.stdout.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+ble_discovery.py - Find H3 Plus radios without waiting out a full BLE scan
+
+Scans stop at the first advertisement that matches (name starting with
+TD-H3 or the FF00 service UUID) instead of collecting devices for the full
+timeout. Addresses of radios found before are kept in a small JSON cache
+(~/.cache/h3plus/radios.json, most recent first) and looked for first, so
+the usual case returns in well under a second.
+
+Usage:
+    uv run ble_discovery.py [--adapter HCI] [--no-cache] [--forget]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from bleak import BleakScanner
+
+SERVICE_UUID = "0000ff00-0000-1000-8000-00805f9b34fb"
+NAME_PREFIX = "TD-H3"
+SCAN_TIMEOUT = 5.0  # Seconds to look for any radio
+CACHE_TIMEOUT = 1.5  # Seconds to look for a cached address before scanning for any
+CACHE_SIZE = 16
+CACHE_PATH = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "h3plus" / "radios.json"
+
+
+def client_kwargs(adapter=None):
+    """BleakClient/BleakScanner keyword arguments selecting an HCI adapter (BlueZ)"""
+    return {"adapter": adapter} if adapter else {}
+
+
+def is_radio(device, adv):
+    """True for an advertisement from a TD-H3 (by name or service UUID)"""
+    name = device.name or adv.local_name
+    if name and name.startswith(NAME_PREFIX):
+        return True
+    return SERVICE_UUID in (uuid.lower() for uuid in adv.service_uuids)
+
+
+def load_cache(path=CACHE_PATH):
+    """{address: {"name": ..., "seen": unix time}}, most recent first"""
+    try:
+        cache = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+    return dict(sorted(cache.items(), key=lambda item: -item[1].get("seen", 0)))
+
+
+def remember(device, path=CACHE_PATH):
+    """Move `device` to the front of the address cache"""
+    cache = load_cache(path)
+    cache.pop(device.address, None)
+    cache = {device.address: {"name": device.name, "seen": time.time()}, **cache}
+    path = Path(path)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(dict(list(cache.items())[:CACHE_SIZE]), indent=2) + "\n")
+    except OSError as e:
+        print(f"Could not update radio cache: {e}")
+
+
+async def find_radio(adapter=None, timeout=SCAN_TIMEOUT, use_cache=True):
+    """BLEDevice of the first radio seen; cached addresses are looked for first
+
+    Returns as soon as a match is advertised. Passing the BLEDevice (not
+    just its address) to BleakClient also spares the client its own scan.
+    """
+    kwargs = client_kwargs(adapter)
+    cache = load_cache() if use_cache else {}
+    device = None
+    if cache:
+        device = await BleakScanner.find_device_by_filter(
+            lambda d, adv: d.address in cache, timeout=CACHE_TIMEOUT, **kwargs)
+    if device is None:
+        device = await BleakScanner.find_device_by_filter(is_radio, timeout=timeout, **kwargs)
+    if device is None:
+        raise RuntimeError("No TD-H3 radio found. Make sure it's powered on and in range.")
+
+    print(f"Found: {device.name} [{device.address}]")
+    if use_cache:
+        remember(device)
+    return device
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Find a TD-H3 radio via BLE')
+    parser.add_argument('--adapter', default=None, metavar='HCI', help='HCI adapter to scan with')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore and do not update the cache')
+    parser.add_argument('--forget', action='store_true', help='Delete the address cache and exit')
+    args = parser.parse_args()
+
+    if args.forget:
+        CACHE_PATH.unlink(missing_ok=True)
+        print(f"Removed {CACHE_PATH}")
+        return
+
+    start = time.monotonic()
+    try:
+        await find_radio(args.adapter, use_cache=not args.no_cache)
+    except RuntimeError as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+    print(f"Discovery took {time.monotonic() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
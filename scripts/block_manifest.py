@@ -0,0 +1,176 @@
+"""
+block_manifest.py - Per-block hash manifests for incremental dumps
+
+A manifest maps every 32-byte block read from the radio to a short hash.
+Blocks follow the read grid: each read range split into 32-byte blocks
+from its start (so 0x0C90, 0x0CB0, ... rather than 0x0C80, 0x0CA0, ...).
+It is stored in the dump metadata (the .json next to a flat dump, or the
+metadata of a .h3ps container) so the next backup can tell which blocks
+of the previous image are still trustworthy.
+
+Incremental dumps read the few blocks holding the fingerprints first and
+re-read only the blocks those fingerprints point at (see dirty_blocks). Edits
+that touch none of the fingerprints (e.g. a frequency changed on an
+already-valid channel) are not detected by the fingerprints, so blocks
+copied from the baseline are listed under "carried" with the number of
+runs in a row they have been copied; once that reaches MAX_CARRY the
+block is no longer trusted and is read from the radio again.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import sparse_image
+
+BLOCK_SIZE = 32
+HASH_NAME = "blake2b-64"
+MAX_CARRY = 7  # Incremental runs a block may be copied from the baseline before it is re-read
+
+# Fingerprints (start, end), read first on an incremental dump
+SETTINGS = (0x0C90, 0x0CB0)  # Function keys + main settings
+VALID_BITMAP = (0x1900, 0x1919)  # Channel valid bitmap (CH1-CH199)
+SCAN_BITMAP = (0x1920, 0x1939)  # Scan bitmap (CH1-CH199)
+FINGERPRINTS = [SETTINGS, VALID_BITMAP, SCAN_BITMAP]
+
+# Channel layout (see info/memory-map.md)
+CHANNEL_BASE = 0x0010
+CHANNEL_SIZE = 16
+NAME_BASE = 0x0D40
+NAME_SIZE = 8
+CHANNEL_COUNT = 199
+
+# Re-read when the settings fingerprint changes
+SETTINGS_RANGES = [
+    (0x0C90, 0x0D40),  # Settings, VFO offsets, band limits, FM channels
+    (0x1800, 0x18E0),  # DTMF/ANI
+    (0x1940, 0x1980),  # FM scan bitmap, VFO A/B, FM VFO
+    (0x1C00, 0x1C40),  # Startup messages
+    (0x1F00, 0x1F40),  # Secondary settings
+    (0x3000, 0x3120),  # Extended settings
+]
+
+
+def block_grid(ranges):
+    """Split (start, end) ranges into {addr: length} blocks of up to BLOCK_SIZE"""
+    return {addr: min(BLOCK_SIZE, end - addr)
+            for start, end in ranges
+            for addr in range(start, end, BLOCK_SIZE)}
+
+
+def blocks_touching(grid, start, end):
+    """Blocks of `grid` overlapping [start, end)"""
+    return {addr for addr, length in grid.items() if addr < end and start < addr + length}
+
+
+def blocks_covered(grid, spans):
+    """Blocks of `grid` fully covered by (addr, length) spans"""
+    covered = sparse_image.coalesce(spans)
+    return {addr for addr, length in grid.items()
+            if any(start <= addr and addr + length <= end for start, end in covered)}
+
+
+def fingerprint_blocks(grid):
+    """Blocks holding the fingerprints"""
+    return set().union(*(blocks_touching(grid, start, end) for start, end in FINGERPRINTS))
+
+
+def block_hash(data):
+    """Short hex digest of one block"""
+    return hashlib.blake2b(bytes(data), digest_size=8).hexdigest()
+
+
+def build_manifest(memory, grid, addrs, carried=None):
+    """Manifest dict for the given blocks of `memory`
+
+    `carried` maps blocks copied from the baseline (not read) to the
+    number of runs in a row they have been copied.
+    """
+    return {
+        "block_size": BLOCK_SIZE,
+        "hash": HASH_NAME,
+        "blocks": {f"0x{addr:04X}": block_hash(memory[addr:addr+grid[addr]])
+                   for addr in sorted(addrs)},
+        "carried": {f"0x{addr:04X}": age for addr, age in sorted((carried or {}).items())},
+    }
+
+
+def _load_manifest_dict(path):
+    path = Path(path)
+    data = path.read_bytes()
+    if sparse_image.is_sparse(data):
+        _, _, meta = sparse_image.unpack(data)
+    else:
+        meta_path = path.with_name(path.name + ".json")
+        if not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text())
+
+    manifest = meta.get("manifest")
+    if not manifest or manifest.get("block_size") != BLOCK_SIZE or manifest.get("hash") != HASH_NAME:
+        return None
+    return manifest
+
+
+def load_manifest(path):
+    """Block hashes (addr -> digest) stored with a dump (flat + .json sidecar, or .h3ps), or None"""
+    manifest = _load_manifest_dict(path)
+    if manifest is None:
+        return None
+    return {int(addr, 16): digest for addr, digest in manifest["blocks"].items()}
+
+
+def load_carried(path):
+    """Carry-over ages (addr -> runs) of the blocks a dump copied from its baseline"""
+    manifest = _load_manifest_dict(path)
+    if manifest is None:
+        return {}
+    return {int(addr, 16): age for addr, age in manifest.get("carried", {}).items()}
+
+
+def trusted_blocks(grid, baseline, manifest, carried=None):
+    """Blocks of `grid` whose baseline content still matches the manifest
+
+    Blocks carried over MAX_CARRY runs in a row are not trusted.
+    """
+    if manifest is None:
+        return set()
+    carried = carried or {}
+    return {addr for addr, length in grid.items()
+            if manifest.get(addr) == block_hash(baseline[addr:addr+length])
+            and carried.get(addr, 0) < MAX_CARRY}
+
+
+def changed_channels(old_bitmap, new_bitmap):
+    """Channel numbers (1-based) whose bit differs between two bitmaps"""
+    channels = []
+    for index, (old, new) in enumerate(zip(old_bitmap, new_bitmap)):
+        changed = old ^ new
+        for bit in range(8):
+            channel = index * 8 + bit + 1
+            if changed & (1 << bit) and channel <= CHANNEL_COUNT:
+                channels.append(channel)
+    return channels
+
+
+def dirty_blocks(grid, baseline, memory):
+    """Blocks of `grid` to re-read, given fresh fingerprints in `memory`
+
+    A flipped valid bit dirties that channel's record and name; a changed
+    settings fingerprint dirties all of SETTINGS_RANGES.
+    """
+    dirty = set()
+
+    start, end = VALID_BITMAP
+    for channel in changed_channels(baseline[start:end], memory[start:end]):
+        record = CHANNEL_BASE + (channel - 1) * CHANNEL_SIZE
+        name = NAME_BASE + (channel - 1) * NAME_SIZE
+        dirty |= blocks_touching(grid, record, record + CHANNEL_SIZE)
+        dirty |= blocks_touching(grid, name, name + NAME_SIZE)
+
+    start, end = SETTINGS
+    if memory[start:end] != baseline[start:end]:
+        for start, end in SETTINGS_RANGES:
+            dirty |= blocks_touching(grid, start, end)
+
+    return dirty
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.12"
+# dependencies = ["numpy"]
+# ///
+"""
+channel_array.py - Columnar NumPy view of the channels of many dumps
+
+Maps the channel area (0x0010-0x0C8F) of one image, or a stack of images,
+into a structured array of shape (images, 199) with BCD, tones and the
+valid/scan bitmaps decoded in vectorized form. Record layout as in
+channel_codec.py and info/memory-map.md.
+
+Usage:
+    uv run channel_array.py DIR [--freq MHZ] [--tone TONE]
+
+Lists every programmed channel in DIR matching the RX frequency and/or
+RX tone (88.5, D023N, D023I or OFF), e.g. --freq 462.5625 --tone D023N.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("channel_array.py needs NumPy: run it with uv run (PEP 723 header) "
+                      "or install the 'analysis' extra") from None
+
+import channel_codec
+import diff_dumps
+
+CHANNEL_BASE = channel_codec.CHANNEL_BASE
+CHANNEL_SIZE = channel_codec.CHANNEL_SIZE
+CHANNEL_COUNT = channel_codec.CHANNEL_COUNT
+NAME_BASE = channel_codec.NAME_BASE
+NAME_SIZE = channel_codec.NAME_SIZE
+TONE_OFF = 0xFFFF
+
+CHANNEL_DTYPE = np.dtype([
+    ("number", np.uint8),
+    ("rx_freq_hz", np.uint32),  # 0 = empty record
+    ("tx_freq_hz", np.uint32),
+    ("rx_tone", np.uint16),  # Tone word, 0x0000 normalized to TONE_OFF
+    ("tx_tone", np.uint16),
+    ("scramble", np.uint8),
+    ("high_power", np.bool_),
+    ("narrow", np.bool_),
+    ("am", np.bool_),
+    ("valid", np.bool_),  # Bit from 0x1900
+    ("scan", np.bool_),  # Bit from 0x1920
+    ("name", f"S{NAME_SIZE}"),
+])
+
+BCD16 = np.array(channel_codec.BCD16, dtype=np.uint32)
+
+
+def _as_stack(images):
+    """(N, size) uint8 view of one image or a sequence/array of images"""
+    array = np.asarray(images, dtype=np.uint8) if not isinstance(images, (bytes, bytearray, memoryview)) \
+        else np.frombuffer(images, dtype=np.uint8)
+    return array.reshape(1, -1) if array.ndim == 1 else array
+
+
+def _bcd_freq(low, high):
+    """Little-endian BCD frequency split into two 16-bit words -> Hz"""
+    return (BCD16[low] + BCD16[high] * 10000) * 10
+
+
+def _bitmap(images, start):
+    """(N, 199) bools from a channel bitmap (bit 0 of the first byte = CH1)"""
+    raw = images[:, start:start + channel_codec.BITMAP_SIZE]
+    return np.unpackbits(raw, axis=1, bitorder="little")[:, :CHANNEL_COUNT].astype(bool)
+
+
+def channel_table(images):
+    """Structured array of shape (N, 199) for N images"""
+    images = _as_stack(images)
+    count = len(images)
+    records = images[:, CHANNEL_BASE:CHANNEL_BASE + CHANNEL_COUNT * CHANNEL_SIZE] \
+        .reshape(count, CHANNEL_COUNT, CHANNEL_SIZE)
+    names = images[:, NAME_BASE:NAME_BASE + CHANNEL_COUNT * NAME_SIZE] \
+        .reshape(count, CHANNEL_COUNT, NAME_SIZE)
+
+    table = np.zeros((count, CHANNEL_COUNT), dtype=CHANNEL_DTYPE)
+    table["number"] = np.arange(1, CHANNEL_COUNT + 1)
+
+    words = records.view("<u2")  # (N, 199, 8) little-endian 16-bit words
+    blank = words[..., 0] == 0xFFFF
+    table["rx_freq_hz"] = np.where(blank, 0, _bcd_freq(words[..., 0], words[..., 1]))
+    table["tx_freq_hz"] = np.where(blank, 0, _bcd_freq(words[..., 2], words[..., 3]))
+
+    for field, word in (("rx_tone", words[..., 4]), ("tx_tone", words[..., 5])):
+        table[field] = np.where(word == 0, TONE_OFF, word)
+
+    table["scramble"] = records[..., 12]
+    table["high_power"] = records[..., 14] & channel_codec.HIGH_POWER != 0
+    table["narrow"] = records[..., 14] & channel_codec.NARROW != 0
+    table["am"] = records[..., 15] == 1
+    table["valid"] = _bitmap(images, channel_codec.VALID_BITMAP)
+    table["scan"] = _bitmap(images, channel_codec.SCAN_BITMAP)
+
+    # Names end at 0x00 or 0xFF; zero from the first terminator on
+    terminated = (names == 0x00) | (names == 0xFF)
+    for column in range(1, NAME_SIZE):
+        terminated[..., column] |= terminated[..., column - 1]
+    table["name"] = (names * ~terminated).view(f"S{NAME_SIZE}")[..., 0]
+    return table
+
+
+def programmed(table):
+    """Mask of channels that are valid and have a frequency"""
+    return table["valid"] & (table["rx_freq_hz"] != 0)
+
+
+def tone_word(text):
+    """'OFF', '88.5', 'D023N' or 'D023I' -> tone word as stored in CHANNEL_DTYPE"""
+    text = text.strip().upper()
+    if text == "OFF":
+        return TONE_OFF
+    if text.startswith("D"):
+        return channel_codec.encode_tone(("DTCS", int(text[1:4]), text[4:] or "N"))
+    return channel_codec.encode_tone(("Tone", float(text), None))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query channels across a directory of dumps')
+    parser.add_argument('directory', help='Directory of .h3p/.bin/.h3ps dumps')
+    parser.add_argument('--freq', type=float, metavar='MHZ', help='RX frequency to match')
+    parser.add_argument('--tone', metavar='TONE', help='RX tone to match (88.5, D023N, OFF)')
+    args = parser.parse_args()
+
+    if not Path(args.directory).is_dir():
+        print(f"✗ Error: Not a directory: {args.directory}")
+        sys.exit(1)
+
+    paths, images = diff_dumps.load_dumps(args.directory)
+    table = channel_table(images)
+
+    match = programmed(table)
+    if args.freq is not None:
+        match &= table["rx_freq_hz"] == round(args.freq * 1e6)
+    if args.tone is not None:
+        try:
+            match &= table["rx_tone"] == tone_word(args.tone)
+        except ValueError:
+            print(f"✗ Error: Invalid tone: {args.tone}")
+            sys.exit(1)
+
+    rows, cols = np.nonzero(match)
+    for row, col in zip(rows, cols):
+        channel = table[row, col]
+        tone = channel_codec.format_tone(channel_codec.decode_tone(int(channel["rx_tone"])))
+        print(f"{paths[row].name}  CH{channel['number']:<3} {channel['name'].decode('latin-1'):<8} "
+              f"{channel['rx_freq_hz']/1e6:>10.5f}  {tone}")
+    print(f"{len(rows)} channels in {len(np.unique(rows))} of {len(paths)} dumps")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+channel_codec.py - Standalone codec for H3 Plus channel records
+
+Decodes and encodes the 16-byte channel records (0x0010-0x0C8F), the
+8-byte channel names (0x0D40+) and the valid/scan bitmaps (0x1900 /
+0x1920) straight from a memoryview of the image, without CHIRP. Layout
+as documented in info/memory-map.md and implemented in docs/js/ble.js.
+
+Records are unpacked in one struct.iter_unpack pass and BCD is decoded
+through lookup tables. Encoding starts from each record's original bytes,
+so unknown bits are preserved and unchanged records are not rewritten.
+
+Usage:
+    uv run channel_codec.py dump.h3p
+"""
+
+import struct
+import sys
+from functools import lru_cache
+
+import sparse_image
+
+CHANNEL_BASE = 0x0010
+CHANNEL_SIZE = 16
+CHANNEL_COUNT = 199
+NAME_BASE = 0x0D40
+NAME_SIZE = 8
+VALID_BITMAP = 0x1900
+SCAN_BITMAP = 0x1920
+BITMAP_SIZE = (CHANNEL_COUNT + 7) // 8
+
+# Record: RX freq, TX freq (little-endian BCD, 10 Hz), RX tone, TX tone,
+# scramble, flags 2, flags 3, modulation
+RECORD = struct.Struct("<IIHHBBBB")
+
+# Flags 2 (byte 0x0D)
+BUSY_LOCK = 0x04
+FREQ_HOP = 0x20
+PTT_ID_SHIFT = 6
+# Flags 3 (byte 0x0E)
+NARROW = 0x08
+HIGH_POWER = 0x10
+
+PTT_ID_LIST = ["OFF", "BOT", "EOT", "BOTH"]
+
+# BCD lookup tables: byte -> 0..99, 16-bit little-endian word -> 0..9999
+BCD8 = [(b >> 4) * 10 + (b & 0x0F) for b in range(256)]
+BCD16 = [BCD8[w & 0xFF] + 100 * BCD8[w >> 8] for w in range(0x10000)]
+TO_BCD8 = bytes(((n // 10) << 4) | (n % 10) for n in range(100))
+
+
+def bcd_to_int(value):
+    """Little-endian BCD uint32 -> integer"""
+    return BCD16[value & 0xFFFF] + 10000 * BCD16[value >> 16]
+
+
+def int_to_bcd(number):
+    """Integer (0..99999999) -> little-endian BCD uint32"""
+    return (TO_BCD8[number % 100]
+            | TO_BCD8[number // 100 % 100] << 8
+            | TO_BCD8[number // 10000 % 100] << 16
+            | TO_BCD8[number // 1000000 % 100] << 24)
+
+
+@lru_cache(maxsize=None)
+def decode_tone(raw):
+    """16-bit tone word -> ('', None, None) | ('Tone', hz, None) | ('DTCS', code, 'N'/'I')"""
+    if raw in (0x0000, 0xFFFF):
+        return ("", None, None)
+    hi = raw >> 8
+    if hi & 0x80:
+        return ("DTCS", (hi & 0x0F) * 100 + BCD8[raw & 0xFF], "I" if hi & 0x40 else "N")
+    return ("Tone", BCD16[raw] / 10, None)
+
+
+@lru_cache(maxsize=None)
+def encode_tone(tone):
+    """Inverse of decode_tone"""
+    mode, value, polarity = tone
+    if not mode:
+        return 0xFFFF
+    if mode == "Tone":
+        tenths = round(value * 10)
+        return TO_BCD8[tenths % 100] | TO_BCD8[tenths // 100] << 8
+    if mode == "DTCS":
+        flags = 0xC0 if polarity == "I" else 0x80
+        return (flags | value // 100) << 8 | TO_BCD8[value % 100]
+    raise ValueError(f"Invalid tone mode: {mode!r}")
+
+
+class Channel:
+    """One decoded channel; `raw` keeps the record bytes it was decoded from"""
+
+    __slots__ = ("number", "rx_freq", "tx_freq", "rx_tone", "tx_tone", "scramble",
+                 "busy_lock", "freq_hop", "ptt_id", "narrow", "high_power", "am",
+                 "name", "valid", "scan", "raw")
+
+    def __init__(self, number, rx_freq=0, tx_freq=0, rx_tone=("", None, None),
+                 tx_tone=("", None, None), scramble=0, busy_lock=False, freq_hop=False,
+                 ptt_id=0, narrow=False, high_power=True, am=False, name="",
+                 valid=None, scan=True, raw=None):
+        self.number = number
+        self.rx_freq = rx_freq  # Hz, 0 = empty
+        self.tx_freq = tx_freq  # Hz
+        self.rx_tone = rx_tone
+        self.tx_tone = tx_tone
+        self.scramble = scramble
+        self.busy_lock = busy_lock
+        self.freq_hop = freq_hop
+        self.ptt_id = ptt_id  # Index into PTT_ID_LIST
+        self.narrow = narrow
+        self.high_power = high_power
+        self.am = am
+        self.name = name
+        self.valid = valid  # None = valid when rx_freq is set
+        self.scan = scan
+        self.raw = raw
+
+    @property
+    def empty(self):
+        return self.valid is False or not self.rx_freq
+
+    def __repr__(self):
+        if self.empty:
+            return f"Channel({self.number}, empty)"
+        return (f"Channel({self.number}, {self.rx_freq/1e6:.5f}/{self.tx_freq/1e6:.5f} MHz, "
+                f"{self.name!r})")
+
+    def __eq__(self, other):
+        if not isinstance(other, Channel):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot)
+                   for slot in self.__slots__ if slot not in ("raw", "valid")) \
+            and self.empty == other.empty
+
+
+def _bits(image, start):
+    """Channel bitmap at `start` as one integer (bit 0 = CH1)"""
+    return int.from_bytes(image[start:start+BITMAP_SIZE], "little")
+
+
+def _decode_name(raw):
+    end = len(raw)
+    for stop in (raw.find(b"\x00"), raw.find(b"\xff")):
+        if stop != -1:
+            end = min(end, stop)
+    return raw[:end].decode("latin-1").strip()
+
+
+def _channel(index, fields, raw, name_raw, valid, scan):
+    """Channel from an unpacked RECORD, its name bytes and the bitmap integers"""
+    rx, tx, rx_tone, tx_tone, scramble, flags2, flags3, modulation = fields
+    # Unprogrammed records are 0xFF (same test as docs/js/ble.js)
+    blank = rx & 0xFFFF == 0xFFFF
+    return Channel(
+        number=index + 1,
+        rx_freq=0 if blank else bcd_to_int(rx) * 10,
+        tx_freq=0 if blank else bcd_to_int(tx) * 10,
+        rx_tone=decode_tone(rx_tone),
+        tx_tone=decode_tone(tx_tone),
+        scramble=scramble,
+        busy_lock=bool(flags2 & BUSY_LOCK),
+        freq_hop=bool(flags2 & FREQ_HOP),
+        ptt_id=flags2 >> PTT_ID_SHIFT,
+        narrow=bool(flags3 & NARROW),
+        high_power=bool(flags3 & HIGH_POWER),
+        am=modulation == 1,
+        name=_decode_name(name_raw),
+        valid=bool(valid >> index & 1),
+        scan=bool(scan >> index & 1),
+        raw=raw,
+    )
+
+
+def decode_channels(image):
+    """Decode all 199 channels from a 16KB image (bytes, bytearray or memoryview)"""
+    view = memoryview(image)
+    records = view[CHANNEL_BASE:CHANNEL_BASE + CHANNEL_COUNT * CHANNEL_SIZE]
+    names = bytes(view[NAME_BASE:NAME_BASE + CHANNEL_COUNT * NAME_SIZE])
+    valid = _bits(view, VALID_BITMAP)
+    scan = _bits(view, SCAN_BITMAP)
+
+    return [_channel(index, fields, bytes(records[index * CHANNEL_SIZE:(index + 1) * CHANNEL_SIZE]),
+                     names[index * NAME_SIZE:(index + 1) * NAME_SIZE], valid, scan)
+            for index, fields in enumerate(RECORD.iter_unpack(records))]
+
+
+def channel_spans(number):
+    """(start, end) of every byte channel `number` (1-199) is decoded from"""
+    index = number - 1
+    record = CHANNEL_BASE + index * CHANNEL_SIZE
+    name = NAME_BASE + index * NAME_SIZE
+    return [(record, record + CHANNEL_SIZE), (name, name + NAME_SIZE),
+            (VALID_BITMAP, VALID_BITMAP + BITMAP_SIZE), (SCAN_BITMAP, SCAN_BITMAP + BITMAP_SIZE)]
+
+
+def decode_channel(image, number):
+    """Decode one channel (1-199); needs only the bytes of channel_spans(number)"""
+    view = memoryview(image)
+    index = number - 1
+    record = CHANNEL_BASE + index * CHANNEL_SIZE
+    name = NAME_BASE + index * NAME_SIZE
+    return _channel(index, RECORD.unpack_from(view, record), bytes(view[record:record + CHANNEL_SIZE]),
+                    bytes(view[name:name + NAME_SIZE]), _bits(view, VALID_BITMAP), _bits(view, SCAN_BITMAP))
+
+
+def encode_record(channel):
+    """16-byte record for a channel
+
+    Fields whose value did not change keep their bytes from channel.raw
+    (including unknown flag bits and non-canonical encodings such as a
+    0x0000 "off" tone), so re-encoding an unmodified channel is a no-op.
+    """
+    raw_blank = not channel.raw or channel.raw[:2] == b"\xff\xff"
+    if not channel.rx_freq:
+        return channel.raw if channel.raw and raw_blank else b"\xff" * CHANNEL_SIZE
+
+    if raw_blank:
+        rx = tx = None
+        rx_tone = tx_tone = 0xFFFF
+        scramble = flags2 = flags3 = modulation = 0
+    else:
+        rx, tx, rx_tone, tx_tone, scramble, flags2, flags3, modulation = RECORD.unpack(channel.raw)
+
+    if rx is None or bcd_to_int(rx) * 10 != channel.rx_freq:
+        rx = int_to_bcd(channel.rx_freq // 10)
+    if tx is None or bcd_to_int(tx) * 10 != channel.tx_freq:
+        tx = int_to_bcd(channel.tx_freq // 10)
+    if decode_tone(rx_tone) != channel.rx_tone:
+        rx_tone = encode_tone(channel.rx_tone)
+    if decode_tone(tx_tone) != channel.tx_tone:
+        tx_tone = encode_tone(channel.tx_tone)
+    if (modulation == 1) != channel.am:
+        modulation = 1 if channel.am else 0
+
+    flags2 &= ~(BUSY_LOCK | FREQ_HOP | 0x03 << PTT_ID_SHIFT) & 0xFF
+    flags2 |= (BUSY_LOCK if channel.busy_lock else 0) | \
+        (FREQ_HOP if channel.freq_hop else 0) | channel.ptt_id << PTT_ID_SHIFT
+    flags3 &= ~(NARROW | HIGH_POWER) & 0xFF
+    flags3 |= (NARROW if channel.narrow else 0) | (HIGH_POWER if channel.high_power else 0)
+
+    return RECORD.pack(rx, tx, rx_tone, tx_tone, channel.scramble, flags2, flags3, modulation)
+
+
+def encode_name(name, raw=None):
+    """8-byte name, 0xFF padded (as docs/js/ble.js writes it); `raw` kept if unchanged"""
+    if raw is not None and _decode_name(raw) == name:
+        return bytes(raw)
+    return name.encode("latin-1")[:NAME_SIZE].ljust(NAME_SIZE, b"\xff")
+
+
+def _write_if_changed(image, start, data, changed):
+    if image[start:start+len(data)] != data:
+        image[start:start+len(data)] = data
+        changed.append((start, start + len(data)))
+
+
+def encode_channels(image, channels):
+    """Write channels into a mutable image, touching only bytes that change
+
+    Returns the (start, end) ranges that were modified.
+    """
+    changed = []
+    valid = old_valid = _bits(image, VALID_BITMAP)
+    scan = old_scan = _bits(image, SCAN_BITMAP)
+
+    for channel in channels:
+        index = channel.number - 1
+        name = NAME_BASE + index * NAME_SIZE
+        _write_if_changed(image, CHANNEL_BASE + index * CHANNEL_SIZE, encode_record(channel), changed)
+        _write_if_changed(image, name, encode_name(channel.name, image[name:name+NAME_SIZE]), changed)
+        is_valid = bool(channel.rx_freq) if channel.valid is None else channel.valid
+        valid = valid | 1 << index if is_valid else valid & ~(1 << index)
+        scan = scan | 1 << index if channel.scan else scan & ~(1 << index)
+
+    if valid != old_valid:
+        _write_if_changed(image, VALID_BITMAP, valid.to_bytes(BITMAP_SIZE, "little"), changed)
+    if scan != old_scan:
+        _write_if_changed(image, SCAN_BITMAP, scan.to_bytes(BITMAP_SIZE, "little"), changed)
+
+    return changed
+
+
+def format_tone(tone):
+    mode, value, polarity = tone
+    if not mode:
+        return "OFF"
+    if mode == "Tone":
+        return f"{value:.1f}"
+    return f"D{value:03d}{polarity}"
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__.strip())
+        sys.exit(1)
+
+    try:
+        image = sparse_image.load_image(sys.argv[1])
+    except (OSError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+    for channel in decode_channels(image):
+        if channel.empty:
+            continue
+        print(f"{channel.number:>3}  {channel.name:<8}  {channel.rx_freq/1e6:>10.5f}  "
+              f"{channel.tx_freq/1e6:>10.5f}  {format_tone(channel.rx_tone):>6}  "
+              f"{format_tone(channel.tx_tone):>6}  {'N' if channel.narrow else 'W'}  "
+              f"{'HIGH' if channel.high_power else 'LOW':<4}  {'AM' if channel.am else 'FM'}  "
+              f"{'scan' if channel.scan else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+clone_transport.py - Byte links the clone protocol runs over
+
+The dumper and the writer speak the clone protocol (R/W framing, 06 ACKs,
+the PVOJH ident) to a link rather than to a BleakClient, so pipelining,
+batching, retries, journaling and tracing work the same over every link:
+
+  BleTransport     the radio's BLE UART: writes to FF02, replies notified
+                   on FF01 in MTU-3 byte pieces
+  SerialTransport  the programming cable (pyserial, or radio_sim.SimSerial):
+                   read replies carry a trailing checksum byte there, and
+                   replies are delivered in whatever pieces the port returns
+
+The in-process simulator plugs in as either: BleTransport(SimBleClient(...))
+or SerialTransport(SimSerial(...)).
+
+A link has:
+  send(data)        one write (a BLE write without response when it fits)
+  start(handler)    deliver received bytes as handler(None, data)
+  stop()
+  address           which radio/port the link reaches (BLE address, serial device)
+  max_write         bytes per write that reach the radio in one piece
+  trailer           bytes after the payload of a read reply (checksum)
+  module_query      True if the link's module answers AT+BAUD?
+
+Usage:
+    uv run clone_transport.py                 # List serial ports (needs pyserial)
+"""
+
+import asyncio
+import sys
+import threading
+
+CHAR_NOTIFY_UUID = "0000ff01-0000-1000-8000-00805f9b34fb"
+CHAR_WRITE_UUID = "0000ff02-0000-1000-8000-00805f9b34fb"
+
+SERIAL_BAUD = 38400  # Programming cable (TDH8.BAUD_RATE in info/tdh8.py)
+SERIAL_MAX_WRITE = 256  # No MTU on the cable; bounds batched read commands
+SERIAL_POLL = 0.05  # Reader thread's read timeout (how fast stop() returns)
+
+
+class BleTransport:
+    """Clone link over a connected BleakClient (or radio_sim.SimBleClient)"""
+
+    name = "BLE"
+    trailer = 0
+    module_query = True
+
+    def __init__(self, client):
+        self.client = client
+
+    @property
+    def address(self):
+        return self.client.address
+
+    @property
+    def max_write(self):
+        return self.client.mtu_size - 3
+
+    @property
+    def is_connected(self):
+        return self.client.is_connected
+
+    async def start(self, handler):
+        await self.client.start_notify(CHAR_NOTIFY_UUID, handler)
+
+    async def stop(self):
+        if self.client.is_connected:
+            await self.client.stop_notify(CHAR_NOTIFY_UUID)
+
+    async def send(self, data):
+        # Packets longer than one ATT payload need a (long) write with response
+        response = len(data) > self.max_write
+        await self.client.write_gatt_char(CHAR_WRITE_UUID, data, response=response)
+
+
+class SerialTransport:
+    """Clone link over a pyserial port (or radio_sim.SimSerial)
+
+    A reader thread hands received bytes to the event loop, so replies
+    arrive like notifications; writes go out from a worker thread.
+    """
+
+    name = "serial"
+    trailer = 1  # Read replies end with a checksum byte
+    module_query = False
+    max_write = SERIAL_MAX_WRITE
+
+    def __init__(self, port):
+        self.port = port
+        self.handler = None
+        self.reader = None
+        self.running = False
+
+    @property
+    def address(self):
+        return self.port.port  # Device name
+
+    @property
+    def is_connected(self):
+        return self.running
+
+    async def start(self, handler):
+        loop = asyncio.get_running_loop()
+        self.handler = handler
+        self.port.timeout = SERIAL_POLL
+        self.port.reset_input_buffer()
+        self.running = True
+        self.reader = threading.Thread(target=self.read_loop, args=(loop,), daemon=True)
+        self.reader.start()
+
+    def read_loop(self, loop):
+        while self.running:
+            try:
+                data = self.port.read(1)
+                if data and self.port.in_waiting:
+                    data += self.port.read(self.port.in_waiting)
+            except (OSError, ValueError):  # Port closed or unplugged
+                self.running = False
+                break
+            if data:
+                loop.call_soon_threadsafe(self.deliver, data)
+
+    def deliver(self, data):
+        if self.handler:
+            self.handler(None, bytearray(data))
+
+    async def stop(self):
+        self.running = False
+        if self.reader:
+            await asyncio.to_thread(self.reader.join)
+            self.reader = None
+        self.handler = None
+
+    async def send(self, data):
+        if not self.running:
+            raise RuntimeError("Serial link is closed")
+        await asyncio.to_thread(self.port.write, bytes(data))
+
+    def close(self):
+        self.running = False
+        self.port.close()
+
+
+def open_serial(device, baudrate=SERIAL_BAUD):
+    """SerialTransport on `device` (pyserial is only needed for the cable)"""
+    try:
+        import serial
+    except ImportError:
+        raise RuntimeError("The serial cable needs pyserial (uv add pyserial)") from None
+    try:
+        return SerialTransport(serial.Serial(device, baudrate, timeout=SERIAL_POLL))
+    except serial.SerialException as e:
+        raise RuntimeError(f"Can't open {device}: {e}") from None
+
+
+def main():
+    try:
+        from serial.tools import list_ports
+    except ImportError:
+        print("✗ Error: Listing serial ports needs pyserial (uv add pyserial)")
+        sys.exit(1)
+    ports = list_ports.comports()
+    for port in ports:
+        print(f"{port.device}  {port.description}")
+    if not ports:
+        print("No serial ports found")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.12"
+# dependencies = ["numpy"]
+# ///
+"""
+diff_dumps.py - Offline diff of a whole directory of H3 Plus dumps
+
+Loads every dump (flat .h3p/.bin via memory-mapped I/O, sparse .h3ps
+expanded), computes the changed-byte count for all pairs at once and
+annotates changed offsets with field names from info/memory-map.md.
+
+Usage:
+    uv run diff_dumps.py DIR [--pairs K] [--matrix]
+
+Default: list every offset that differs anywhere in the set.
+Use --pairs K to list dump pairs that differ in 1..K bytes, with the
+fields that changed (the usual "flip one setting, dump, compare" step).
+Use --matrix to print the full N x N changed-byte matrix.
+"""
+
+import argparse
+import re
+import sys
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("diff_dumps.py needs NumPy: run it with uv run (PEP 723 header) "
+                      "or install the 'analysis' extra") from None
+
+import sparse_image
+
+IMAGE_SIZE = sparse_image.IMAGE_SIZE
+DUMP_SUFFIXES = {".h3p", ".bin", ".h3ps"}
+BROADCAST_LIMIT = 1 << 26  # Elements per pairwise comparison block
+MEMORY_MAP = Path(__file__).resolve().parent.parent / "info" / "memory-map.md"
+
+# Channel record layout (see info/memory-map.md)
+CHANNEL_BASE = 0x0010
+CHANNEL_SIZE = 16
+NAME_BASE = 0x0D40
+NAME_SIZE = 8
+CHANNEL_COUNT = 199
+CHANNEL_FIELDS = ["RX frequency"] * 4 + ["TX frequency"] * 4 + ["RX tone"] * 2 + \
+    ["TX tone"] * 2 + ["Scramble level", "Flags 2", "Flags 3", "Modulation"]
+
+ROW = re.compile(r"^\|\s*(0x[0-9A-Fa-f]+)(?:\s*[–-]\s*(0x[0-9A-Fa-f]+))?\s*\|\s*([^|]+?)\s*\|")
+
+
+def load_field_names(path=MEMORY_MAP):
+    """Map offset -> field label from the 'Offset' tables of the memory map"""
+    names = {}
+    if not path.exists():
+        return names
+
+    in_offset_table = False
+    for line in path.read_text().splitlines():
+        if line.startswith("| Offset |"):
+            in_offset_table = True
+            continue
+        if not line.startswith("|"):
+            in_offset_table = False
+            continue
+        match = ROW.match(line)
+        if not in_offset_table or not match or "~~" in line:
+            continue
+        start = int(match.group(1), 16)
+        end = int(match.group(2), 16) if match.group(2) else start
+        label = match.group(3)
+        for offset in range(start, end + 1):
+            names.setdefault(offset, [])
+            if label not in names[offset]:
+                names[offset].append(label)
+
+    return {offset: " / ".join(labels) for offset, labels in names.items()}
+
+
+def field_name(offset, names):
+    """Best label for an offset; channel records and names are per channel"""
+    if CHANNEL_BASE <= offset < CHANNEL_BASE + CHANNEL_COUNT * CHANNEL_SIZE:
+        channel, rel = divmod(offset - CHANNEL_BASE, CHANNEL_SIZE)
+        return f"CH{channel + 1} {CHANNEL_FIELDS[rel]}"
+    if NAME_BASE <= offset < NAME_BASE + CHANNEL_COUNT * NAME_SIZE:
+        return f"CH{(offset - NAME_BASE) // NAME_SIZE + 1} name"
+    return names.get(offset, "unknown")
+
+
+def load_dumps(directory):
+    """Stack every dump in `directory` into an (N, IMAGE_SIZE) uint8 array"""
+    paths = sorted(p for p in Path(directory).iterdir() if p.suffix in DUMP_SUFFIXES)
+    images = []
+    loaded = []
+    for path in paths:
+        try:
+            if path.suffix == ".h3ps":
+                image = np.frombuffer(sparse_image.load_image(path), dtype=np.uint8)
+            else:
+                image = np.memmap(path, dtype=np.uint8, mode="r")
+        except (OSError, ValueError) as e:
+            print(f"Skipping {path.name}: {e}")
+            continue
+        if len(image) != IMAGE_SIZE:
+            print(f"Skipping {path.name}: size {len(image)} != {IMAGE_SIZE}")
+            continue
+        images.append(image)
+        loaded.append(path)
+
+    if not images:
+        return loaded, np.empty((0, IMAGE_SIZE), dtype=np.uint8)
+    return loaded, np.stack(images)
+
+
+def varying_columns(images):
+    """Offsets whose value is not the same in every dump"""
+    return np.flatnonzero((images != images[:1]).any(axis=0))
+
+
+def change_matrix(images, columns):
+    """N x N matrix of changed-byte counts, computed for all pairs at once
+
+    Only `columns` (offsets that vary anywhere) can differ, so the pairwise
+    comparison broadcasts over those alone, a block of rows at a time to
+    keep the temporary below BROADCAST_LIMIT elements.
+    """
+    sub = images[:, columns]
+    count = len(sub)
+    matrix = np.zeros((count, count), dtype=np.int64)
+    step = max(1, BROADCAST_LIMIT // max(1, count * len(columns)))
+    for row in range(0, count, step):
+        matrix[row:row+step] = (sub[row:row+step, None, :] != sub[None, :, :]).sum(axis=2)
+    return matrix
+
+
+def runs(offsets):
+    """Group sorted offsets into (start, end) runs of consecutive addresses"""
+    result = []
+    for offset in offsets:
+        if result and offset == result[-1][1] + 1:
+            result[-1][1] = offset
+        else:
+            result.append([offset, offset])
+    return [(start, end) for start, end in result]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Offline diff of a directory of H3 Plus dumps',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  uv run diff_dumps.py dumps/              # Offsets that vary, annotated
+  uv run diff_dumps.py dumps/ --pairs 2    # Pairs differing in 1-2 bytes
+  uv run diff_dumps.py dumps/ --matrix     # Full changed-byte matrix
+        """
+    )
+    parser.add_argument('directory', help='Directory of .h3p/.bin/.h3ps dumps')
+    parser.add_argument('--pairs', type=int, default=0, metavar='K',
+                        help='List pairs differing in 1..K bytes')
+    parser.add_argument('--matrix', action='store_true',
+                        help='Print the N x N changed-byte matrix')
+    args = parser.parse_args()
+
+    if not Path(args.directory).is_dir():
+        print(f"✗ Error: Not a directory: {args.directory}")
+        sys.exit(1)
+
+    paths, images = load_dumps(args.directory)
+    if len(paths) < 2:
+        print("✗ Error: Need at least two dumps to compare")
+        sys.exit(1)
+
+    names = load_field_names()
+    columns = varying_columns(images)
+    print(f"Loaded {len(paths)} dumps, {len(columns)} offsets vary")
+
+    if args.matrix:
+        matrix = change_matrix(images, columns)
+        width = max(len(str(matrix.max())), 3)
+        for i, path in enumerate(paths):
+            print(f"{i:>4} " + " ".join(f"{v:>{width}}" for v in matrix[i]) + f"  {path.name}")
+
+    elif args.pairs:
+        matrix = change_matrix(images, columns)
+        rows, cols = np.nonzero(np.triu((matrix > 0) & (matrix <= args.pairs), k=1))
+        for i, j in sorted(zip(rows, cols), key=lambda ij: matrix[ij]):
+            diff = columns[images[i, columns] != images[j, columns]]
+            print(f"{paths[i].name} -> {paths[j].name}: {matrix[i, j]} bytes")
+            for offset in diff:
+                print(f"  0x{offset:04X}:0x{images[i, offset]:02X}->0x{images[j, offset]:02X}"
+                      f"  {field_name(offset, names)}")
+
+    else:
+        for start, end in runs(columns.tolist()):
+            distinct = len(np.unique(images[:, start:end + 1], axis=0))
+            span = f"0x{start:04X}" if start == end else f"0x{start:04X}..0x{end:04X}"
+            labels = sorted({field_name(offset, names) for offset in range(start, end + 1)})
+            print(f"{span:<16} {distinct:>4} variants  {', '.join(labels)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,96 @@
 #!/usr/bin/env python3
 """
-dump_memory.py - Dump memory from Tidradio H3 Plus via BLE
+dump_memory.py - Dump memory from Tidradio H3 Plus via BLE (or the serial cable)
 
 Usage:
-    uv run dump_memory.py [output_file] [baseline_file] [--stop N]
+    uv run dump_memory.py [output_file] [baseline_file] [--stop N] [--window N] [--probe] [--sparse] [--incremental]
+                          [--timing] [--trace FILE] [--resume] [--retries N] [--reconnects N] [--batch N]
+                          [--port DEVICE] [--baud RATE]
 
-Default output: memory_dump.bin (16KB raw binary)
+Default output: memory_dump.bin (16KB raw binary) plus memory_dump.bin.json
+(read metadata: negotiated read size, window, ranges)
 
-If baseline_file is provided, compares on-the-fly and prints differences.
+If baseline_file is provided, compares on-the-fly and prints the changed
+byte runs once reading stops.
 Use --stop N to stop after N mismatches (default: stop after 1st).
+Use --window N to keep up to N read requests in flight at once.
+Use --probe to negotiate a read size larger than 32 bytes.
+Use --sparse to save only the ranges actually read (.h3ps container, see
+sparse_image.py); baseline files may be flat or sparse.
+Use --incremental (with a baseline) to re-read only the blocks that the
+fingerprint blocks and the baseline's hash manifest say may have changed.
+Read commands are paced adaptively (AIMD) per connection.
+Use --timing to print per-command latency percentiles and a histogram at
+the end, and --trace FILE to write one JSON line per read command (see
+roundtrip_trace.py).
+
+Chunks are journaled to OUTPUT.journal as they arrive (read_journal.py).
+A chunk is re-sent up to --retries times; if it still fails, or the
+connection drops, the dumper reconnects (up to --reconnects times) and
+reads only what is missing. Use --resume to continue an interrupted run
+from its journal. Responses are reassembled from the notification
+stream (frame_stream.py), so they may span or share notifications.
+Use --batch N (with --window N or more) to send up to N read commands in
+one GATT write; a probe first checks that the firmware answers every
+command of a concatenated write, and falls back to fewer if not. The
+result is kept per link, radio address and model (~/.cache/h3plus/batch.json),
+so later runs against the same radio skip the probe; a refused batch is
+probed again after a day, in case the link rather than the firmware lost
+the answers.
+Use --port DEVICE to read over the programming cable instead of BLE (at
+--baud RATE, 38400 by default); the same engine runs over either link
+(clone_transport.py).
+The handshake moves on as soon as each reply arrives and refuses to read
+from a radio whose model string isn't P31183 (saved in the .json metadata).
 """
 
 import asyncio
+import json
+import re
 import sys
+import time
 import argparse
-from bleak import BleakClient, BleakScanner
+from collections import deque
+from contextlib import aclosing
+from bleak import BleakClient
+from bleak.exc import BleakError
 from pathlib import Path
 
+import ble_discovery
+import block_manifest
+import clone_transport
+import frame_stream
+import image_diff
+import read_journal
+import roundtrip_trace
+import sparse_image
+
 # BLE UUIDs
-SERVICE_UUID = "0000ff00-0000-1000-8000-00805f9b34fb"
-CHAR_NOTIFY_UUID = "0000ff01-0000-1000-8000-00805f9b34fb"
-CHAR_WRITE_UUID = "0000ff02-0000-1000-8000-00805f9b34fb"
+SERVICE_UUID = ble_discovery.SERVICE_UUID
+CHAR_NOTIFY_UUID = clone_transport.CHAR_NOTIFY_UUID
+CHAR_WRITE_UUID = clone_transport.CHAR_WRITE_UUID
 
 # Protocol constants
+HANDSHAKE_MAGIC = bytes([0x50, 0x56, 0x4F, 0x4A, 0x48, 0x5C, 0x14])  # PVOJH\x5c\x14
+ACK = 0x06
+EXPECTED_MODEL = "P31183"
+MODEL_LENGTH = 8  # Model string padded with 0xFF
+REPLY_TIMEOUT = 1.0  # Seconds to wait for each handshake reply
 MEMORY_START = 0x0000
 MEMORY_END = 0x4000  # 16KB
 CHUNK_SIZE = 32
+PROBE_SIZES = [64, 128, 255]  # Larger read lengths to try, smallest first
+PROBE_ADDR = 0x0000
+PROBE_TIMEOUT = 0.5
+BATCH_CACHE_PATH = ble_discovery.CACHE_PATH.parent / "batch.json"
+BATCH_REPROBE = 24 * 3600  # Seconds a refused batch probe is trusted
+READ_TIMEOUT = 2.0  # Seconds to wait for a read response
+READ_RETRIES = 2  # Re-sends of a timed-out chunk before giving up
+RECONNECTS = 2  # Reconnect-and-resume attempts after a failed dump
+
+# Adaptive pacing (seconds between read commands)
+PACE_STEP = 0.002  # Additive speed-up per answered chunk
+PACE_MAX = 0.1  # Upper bound after repeated timeouts
 
 # Memory ranges to read (skip most channels and empty regions for reverse engineering)
 READ_RANGES = [
@@ -37,160 +102,649 @@ READ_RANGES = [
     # Skip: 0x3120-0x4000 (all 0xFF)
 ]
 
-class H3PlusDumper:
-    def __init__(self, baseline=None, stop_after=1):
-        self.memory = bytearray(MEMORY_END)
-        self.baseline = baseline  # Optional baseline for comparison
-        self.stop_after = stop_after  # Number of mismatches before stopping
-        self.response_ready = asyncio.Event()
-        self.last_response = None
-        self.diffs_found = []  # List of (addr, old, new) tuples
+# Read first by stream(): what a dashboard shows before the channels
+PRIORITY_RANGES = [
+    (0x0C90, 0x0CB0),  # Menu settings
+    (0x1900, 0x1940),  # Channel valid + scan bitmaps
+]
 
-    def notification_handler(self, sender, data):
-        """Handle notifications from the radio"""
-        self.last_response = bytes(data)
-        self.response_ready.set()
+client_kwargs = ble_discovery.client_kwargs
 
-    async def find_radio(self):
-        """Find TD-H3 radio via BLE scan"""
-        print("Scanning for TD-H3 radio...")
-        devices = await BleakScanner.discover(timeout=5.0)
+BAUD_REPLY = re.compile(rb"\+BAUD:\s*(\d+).*?OK", re.DOTALL)  # "+BAUD: 9600bps\r\nOK"
 
-        for device in devices:
-            if device.name and device.name.startswith("TD-H3"):
-                print(f"Found: {device.name} [{device.address}]")
-                return device.address
 
-        raise RuntimeError("No TD-H3 radio found. Make sure it's powered on and in range.")
+def parse_baud(replies):
+    """Baud rate from the BLE module's +BAUD reply, or None until it is complete"""
+    match = BAUD_REPLY.search(replies)
+    return int(match.group(1)) if match else None
 
-    async def handshake(self, client):
-        """Perform connection handshake"""
-        print("Performing handshake...")
 
-        # Step 1: AT+BAUD?
-        await client.write_gatt_char(CHAR_WRITE_UUID, b"AT+BAUD?\r\n", response=False)
-        await asyncio.sleep(0.1)
+def parse_ack(replies):
+    return True if ACK in replies else None
 
-        # Step 2: Send PVOJH handshake
-        await client.write_gatt_char(CHAR_WRITE_UUID, bytes([0x50, 0x56, 0x4F, 0x4A, 0x48, 0x5C, 0x14]), response=False)
-        await asyncio.sleep(0.1)
 
-        # Step 3: Send mode 0x02
-        await client.write_gatt_char(CHAR_WRITE_UUID, bytes([0x02]), response=False)
-        await asyncio.sleep(0.05)
+def load_batch_cache(path=BATCH_CACHE_PATH):
+    """{"link/address/model": {"size": probed size, "accepted": batch size, "probed": time}}"""
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
 
-        # Step 4: Send mode 0x06
-        await client.write_gatt_char(CHAR_WRITE_UUID, bytes([0x06]), response=False)
-        await asyncio.sleep(0.2)
 
-        # Clear any leftover responses from handshake
-        self.response_ready.clear()
-        self.last_response = None
+def remember_batch(key, size, accepted, path=BATCH_CACHE_PATH):
+    # Entries without "probed" were keyed by radio memory older versions read; drop them
+    cache = {k: v for k, v in load_batch_cache(path).items() if "probed" in v}
+    cache[key] = {"size": size, "accepted": accepted, "probed": time.time()}
+    path = Path(path)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(cache, indent=2, sort_keys=True) + "\n")
+    except OSError as e:
+        print(f"Could not update batch cache: {e}")
+
+
+def parse_model(replies):
+    """Model string (0xFF padding stripped), or None until all of it arrived"""
+    start = replies.find(b"P")
+    if start < 0 or len(replies) - start < MODEL_LENGTH:
+        return None
+    return bytes(replies[start:start + MODEL_LENGTH]).rstrip(b"\xff").decode("ascii", "replace")
+
+
+def plan_chunks(ranges, size):
+    """Split (start, end) ranges into (addr, length) reads of at most `size` bytes"""
+    return [(addr, min(size, range_end - addr))
+            for range_start, range_end in ranges
+            for addr in range(range_start, range_end, size)]
+
+
+def prioritize(chunks, priority):
+    """Order (addr, length) chunks: those overlapping `priority` ranges first, in that order"""
+    def rank(chunk):
+        addr, length = chunk
+        return next((i for i, (start, end) in enumerate(priority)
+                     if addr < end and start < addr + length), len(priority))
+    return sorted(chunks, key=rank)
+
+
+class AdaptivePacer:
+    """AIMD pacing of read commands for one connection
+
+    Starts with no delay between commands. Every answered chunk shaves
+    PACE_STEP off the delay, unless its latency is more than twice the
+    smoothed latency (the radio is queueing), which adds a step instead.
+    Every timeout doubles the delay (plus one step) up to PACE_MAX.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.latency = None  # Smoothed response latency (s)
+        self.responses = 0
+        self.timeouts = 0
+        self.max_delay = delay
+
+    async def wait(self):
+        """Sleep for the current inter-command delay"""
+        if self.delay > 0:
+            await asyncio.sleep(self.delay)
+
+    def on_response(self, latency):
+        """Record an answered chunk and adjust the delay"""
+        self.responses += 1
+        if self.latency is None:
+            self.latency = latency
+        elif latency > 2 * self.latency:
+            self.delay = min(PACE_MAX, self.delay + PACE_STEP)
+            self.max_delay = max(self.max_delay, self.delay)
+        else:
+            self.delay = max(0.0, self.delay - PACE_STEP)
+        self.latency += (latency - self.latency) / 8
+
+    def on_timeout(self):
+        """Record a timed-out chunk and back off"""
+        self.timeouts += 1
+        self.delay = min(PACE_MAX, self.delay * 2 + PACE_STEP)
+        self.max_delay = max(self.max_delay, self.delay)
+
+    def summary(self):
+        """One-line description of the learned pacing"""
+        latency = f"{self.latency*1000:.1f} ms" if self.latency is not None else "n/a"
+        return (f"Pacing: delay {self.delay*1000:.1f} ms (peak {self.max_delay*1000:.1f} ms), "
+                f"latency {latency}, timeouts {self.timeouts}/{self.responses + self.timeouts}")
+
+
+class CloneSession:
+    """BLE scan and clone-mode handshake shared by H3PlusDumper and H3PlusWriter
+
+    A subclass's notification handler passes received bytes to
+    collect_reply() first; they are handshake replies while
+    clone_handshake() runs.
+    """
+
+    def __init__(self):
+        self.model = None  # Model string from the handshake
+        self.baud = None  # UART rate the BLE module reported (None over the cable)
+        self.replies = None  # Handshake replies collected so far (None outside the handshake)
+        self.reply_ready = asyncio.Event()
+
+    def collect_reply(self, data):
+        """Keep `data` as a handshake reply; False outside the handshake"""
+        if self.replies is None:
+            return False
+        self.replies += data
+        self.reply_ready.set()
+        return True
+
+    async def find_radio(self, adapter=None):
+        """Find TD-H3 radio via BLE scan (cached addresses first, stops at the first match)"""
+        print("Scanning for TD-H3 radio...")
+        return await ble_discovery.find_radio(adapter)
+
+    async def wait_reply(self, parse, timeout):
+        """Wait until parse(replies) gives a result; None on timeout"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while (result := parse(self.replies)) is None:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            self.reply_ready.clear()
+            try:
+                await asyncio.wait_for(self.reply_ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+        return result
+
+    async def exchange(self, link, command, parse, timeout=REPLY_TIMEOUT):
+        """Send one handshake command and wait for its parsed reply (None on timeout)"""
+        self.replies.clear()
+        await link.send(command)
+        return await self.wait_reply(parse, timeout)
+
+    async def clone_handshake(self, link):
+        """Enter clone mode, moving on as soon as each reply arrives
+
+        AT+BAUD? -> +BAUD: ... OK (BLE module only), PVOJH magic -> 06,
+        02 -> model string, 06 -> 06. Each step waits up to REPLY_TIMEOUT;
+        a missing or unexpected model string fails before anything else is
+        sent.
+        """
+        self.replies = bytearray()
+        try:
+            if link.module_query:
+                self.baud = await self.exchange(link, b"AT+BAUD?\r\n", parse_baud)
+
+            if await self.exchange(link, HANDSHAKE_MAGIC, parse_ack) is None:
+                print("No ready ACK, continuing")
+
+            self.model = await self.exchange(link, b"\x02", parse_model)
+            if self.model is None:
+                raise RuntimeError("Radio did not send its model string")
+            print(f"Radio model: {self.model}")
+            if self.model != EXPECTED_MODEL:
+                raise RuntimeError(f"Unexpected model {self.model!r} (expected {EXPECTED_MODEL})")
+
+            if await self.exchange(link, bytes([ACK]), parse_ack) is None:
+                print("No final ACK, continuing")
+        finally:
+            self.replies = None
+
+
+class H3PlusDumper(CloneSession):
+    def __init__(self, baseline=None, stop_after=1, window=1, probe=False, sparse=False,
+                 manifest=None, incremental=False, trace=None, journal=None, retries=READ_RETRIES,
+                 batch=1, carried=None):
+        super().__init__()
+        self.memory = bytearray(MEMORY_END)
+        self.baseline = baseline  # Optional baseline for comparison
+        self.stop_after = stop_after  # Number of mismatches before stopping
+        self.window = window  # Max read requests in flight
+        self.probe = probe  # Negotiate a read size larger than CHUNK_SIZE
+        self.chunk_size = CHUNK_SIZE
+        self.sparse = sparse  # Save a .h3ps container instead of a flat image
+        self.read_spans = []  # (addr, length) of every chunk read from the radio
+        self.manifest = manifest  # Baseline block hashes (addr -> digest)
+        self.baseline_carried = carried or {}  # Baseline blocks copied from older dumps (addr -> runs)
+        self.carried = {}  # Blocks copied from the baseline this run (addr -> runs)
+        self.incremental = incremental  # Only re-read blocks that may have changed
+        self.pending = {}  # addr -> Future awaiting the 'W' response
+        self.lengths = {}  # addr -> length last requested there (frames a pending response)
+        self.framer = frame_stream.FrameReassembler(expect=self.expected_length)
+        self.pacer = AdaptivePacer()
+        self.diff = image_diff.ImageDiff()  # Changed runs vs. baseline
+        self.trace = trace  # Optional RoundTripTrace of every read command
+        self.journal = journal  # Optional ReadJournal of the chunks read
+        self.retries = retries  # Re-sends of a failed chunk before giving up
+        self.batch = batch  # Max read commands per GATT write (probed before use)
 
+    def notification_handler(self, sender, data):
+        """Reassemble 'W' responses and route each to the request waiting on its address"""
+        if self.collect_reply(data):
+            return
+
+        self.framer.feed(data)
+        if self.trace and self.framer.partial_addr is not None:
+            self.trace.notified("R", self.framer.partial_addr)
+
+        while (frame := self.framer.pop()) is not None:
+            resp_addr = (frame[1] << 8) | frame[2]
+            future = self.pending.pop(resp_addr, None)
+            if future and not future.done():
+                future.set_result(frame[4:])
+                if self.trace:
+                    self.trace.completed("R", resp_addr, len(frame) - 4)
+
+    def expected_length(self, addr):
+        """Payload length of the response awaited at addr, or None if no read is pending there"""
+        return self.lengths.get(addr) if addr in self.pending else None
+
+    async def handshake(self, link):
+        """Enter clone mode for reads"""
+        print("Performing handshake...")
+        self.framer.trailer = link.trailer
+        try:
+            await self.clone_handshake(link)
+        finally:
+            # Leftover handshake bytes never reach the framer
+            self.framer.reset()
         print("Handshake complete")
 
-    async def read_chunk(self, client, addr):
-        """Read 32 bytes at address"""
-        addr_hi = (addr >> 8) & 0xFF
-        addr_lo = addr & 0xFF
-
-        # Clear previous response
-        self.response_ready.clear()
-
-        # Send read command: R + addrHi + addrLo + 0x20
-        cmd = bytes([0x52, addr_hi, addr_lo, CHUNK_SIZE])
-        await client.write_gatt_char(CHAR_WRITE_UUID, cmd, response=False)
+    async def request_chunks(self, link, chunks):
+        """Send read commands for (addr, length, attempt) chunks in one write; returns their futures"""
+        loop = asyncio.get_running_loop()
+        futures = []
+        cmd = bytearray()
+        for addr, length, attempt in chunks:
+            future = loop.create_future()
+            self.pending[addr] = future
+            self.lengths[addr] = length
+            futures.append(future)
+
+            # Read command: R + addrHi + addrLo + len
+            cmd += bytes([0x52, (addr >> 8) & 0xFF, addr & 0xFF, length])
+            if self.trace:
+                self.trace.sent("R", addr, length, attempt)
+
+        await link.send(cmd)
+        return futures
+
+    async def request_chunk(self, link, addr, length=CHUNK_SIZE, attempt=0):
+        """Send a read command and return a future for its response"""
+        (future,) = await self.request_chunks(link, [(addr, length, attempt)])
+        return future
+
+    async def read_chunk(self, link, addr, length=CHUNK_SIZE, timeout=READ_TIMEOUT):
+        """Read `length` bytes (32 by default) at address"""
+        future = await self.request_chunk(link, addr, length)
 
         # Wait for response with timeout
         try:
-            await asyncio.wait_for(self.response_ready.wait(), timeout=2.0)
+            return await asyncio.wait_for(future, timeout=timeout)
         except asyncio.TimeoutError:
+            self.drop_partial(addr)
+            if self.trace:
+                self.trace.timed_out("R", addr)
             raise RuntimeError(f"Timeout reading address 0x{addr:04X}")
+        finally:
+            self.pending.pop(addr, None)
 
-        # Parse response: W + addrHi + addrLo + len + data
-        data = self.last_response
-        if not data or data[0] != 0x57:  # 'W'
-            raise RuntimeError(f"Invalid response at 0x{addr:04X}: {data.hex() if data else 'None'}")
+    async def probe_chunk_size(self, link):
+        """Find the largest read length the radio answers correctly
 
-        resp_addr = (data[1] << 8) | data[2]
-        resp_len = data[3]
-        payload = data[4:4+resp_len]
+        Tries PROBE_SIZES in increasing order against PROBE_ADDR and stops
+        at the first size that times out, comes back short or disagrees
+        with a plain 32-byte read.
+        """
+        reference = await self.read_chunk(link, PROBE_ADDR)
+        size = CHUNK_SIZE
+
+        for candidate in PROBE_SIZES:
+            try:
+                payload = await self.read_chunk(link, PROBE_ADDR, candidate, timeout=PROBE_TIMEOUT)
+            except RuntimeError:
+                payload = None
+            if payload is None or len(payload) != candidate or payload[:CHUNK_SIZE] != reference:
+                print(f"Read size {candidate}: rejected")
+                break
+            print(f"Read size {candidate}: accepted")
+            size = candidate
+
+        return size
 
-        if resp_addr != addr:
-            raise RuntimeError(f"Address mismatch: expected 0x{addr:04X}, got 0x{resp_addr:04X}")
+    async def probe_batch_size(self, link, size):
+        """Largest number of read commands (up to `size`) answered from one write
 
-        return payload
+        Sends `size` 32-byte reads at PROBE_ADDR onwards in a single write
+        and halves the count until every one of them is answered. Gives up
+        at once if only the first command is answered (the firmware reads
+        one command per write).
+        """
+        size = min(size, link.max_write // 4)
+        while size > 1:
+            chunks = [(PROBE_ADDR + i * CHUNK_SIZE, CHUNK_SIZE, 0) for i in range(size)]
+            futures = await self.request_chunks(link, chunks)
+            await asyncio.wait(futures, timeout=PROBE_TIMEOUT)
+            answered = sum(1 for future in futures
+                           if future.done() and len(future.result()) == CHUNK_SIZE)
+
+            for (addr, _, _), future in zip(chunks, futures):
+                self.pending.pop(addr, None)
+                future.cancel()
+            if self.trace:
+                self.trace.abandon("R")
+
+            if answered == size:
+                print(f"Batch of {size} read commands: accepted")
+                return size
+            print(f"Batch of {size} read commands: {answered} answered")
+            await asyncio.sleep(PROBE_TIMEOUT)  # Let late answers drain
+            self.framer.reset()
+            if answered <= 1:
+                break
+            size //= 2
+        return 1
+
+    async def batch_size(self, link, size):
+        """Batch size to use: cached for this link, radio and model, else probed"""
+        size = min(size, link.max_write // 4)
+        key = f"{link.name}/{link.address}/{self.model}"
+        cached = load_batch_cache(BATCH_CACHE_PATH).get(key)
+        if cached and "probed" in cached:
+            if cached["accepted"] < cached["size"]:
+                # A refused batch answers any size, but a lossy link can refuse one
+                # too: probe again once it is BATCH_REPROBE old
+                trusted = time.time() - cached["probed"] < BATCH_REPROBE
+            else:
+                trusted = size <= cached["size"]
+            if trusted:
+                print(f"Batch size {cached['accepted']} cached for {key}")
+                return min(size, cached["accepted"])
+
+        accepted = await self.probe_batch_size(link, size)
+        remember_batch(key, size, accepted, BATCH_CACHE_PATH)
+        return accepted
+
+    def drop_partial(self, addr):
+        """Forget a half-received response to a request that timed out"""
+        if self.framer.partial_addr == addr:
+            self.framer.reset()
+
+    async def read_chunks(self, link, chunks, window=1, retries=None):
+        """Read (addr, length) chunks keeping up to `window` requests in flight
+
+        Yields (addr, payload) in completion order. Responses are matched
+        by the address echoed in the 'W' header, so the radio may answer
+        out of order. Only chunks that time out or come back short are
+        re-sent. Commands are spaced by self.pacer, which adapts to latency
+        and timeouts.
+        """
+        loop = asyncio.get_running_loop()
+        retries = self.retries if retries is None else retries
+        queue = deque((addr, length, 0) for addr, length in chunks)
+        inflight = {}  # addr -> (future, length, sent, attempt)
 
-    async def dump_memory(self, client):
+        try:
+            while queue or inflight:
+                # Fill the window, up to self.batch commands per write
+                while queue and len(inflight) < window:
+                    batch = [queue.popleft()]
+                    while queue and len(batch) < self.batch and len(inflight) + len(batch) < window:
+                        batch.append(queue.popleft())
+                    await self.pacer.wait()
+                    futures = await self.request_chunks(link, batch)
+                    sent = loop.time()
+                    for (addr, length, attempt), future in zip(batch, futures):
+                        # Measure latency when the response lands, not when we get to it
+                        future.add_done_callback(
+                            lambda f, sent=sent: f.cancelled() or self.pacer.on_response(loop.time() - sent))
+                        inflight[addr] = (future, length, sent, attempt)
+
+                # Wait for the first response or the earliest deadline
+                deadline = min(sent for _, _, sent, _ in inflight.values()) + READ_TIMEOUT
+                await asyncio.wait([f for f, _, _, _ in inflight.values()],
+                                   timeout=max(0, deadline - loop.time()),
+                                   return_when=asyncio.FIRST_COMPLETED)
+
+                now = loop.time()
+                for addr, (future, length, sent, attempt) in list(inflight.items()):
+                    if future.done() and len(future.result()) == length:
+                        del inflight[addr]
+                        yield addr, future.result()
+                    elif future.done() or sent + READ_TIMEOUT <= now:
+                        del inflight[addr]
+                        self.pending.pop(addr, None)
+                        if not future.done():
+                            future.cancel()
+                            self.pacer.on_timeout()
+                            self.drop_partial(addr)
+                            if self.trace:
+                                self.trace.timed_out("R", addr)
+                        if attempt >= retries:
+                            raise RuntimeError(f"Timeout reading address 0x{addr:04X}")
+                        queue.appendleft((addr, length, attempt + 1))
+        finally:
+            # Drop anything still outstanding (e.g. consumer stopped early)
+            for addr, (future, _, _, _) in inflight.items():
+                self.pending.pop(addr, None)
+                future.cancel()
+
+    def store_chunk(self, addr, chunk):
+        """Store a chunk and compare it with the baseline; True means stop"""
+        self.memory[addr:addr+len(chunk)] = chunk
+        self.read_spans.append((addr, len(chunk)))
+
+        # Compare with baseline if provided (printing happens after the read loop)
+        if self.baseline:
+            self.diff.add(image_diff.diff_chunk(addr, self.baseline[addr:addr+len(chunk)], chunk))
+
+            # Check if we should stop
+            if self.stop_after and self.diff.changed_bytes >= self.stop_after:
+                self.diff = self.diff.truncated(self.stop_after)
+                return True
+
+        return False
+
+    async def plan_incremental(self, link):
+        """Read the fingerprint blocks and plan reads of blocks that may have changed
+
+        Blocks the baseline manifest vouches for and no fingerprint points
+        at are copied from the baseline instead of being read, unless they
+        have already been copied block_manifest.MAX_CARRY runs in a row.
+        """
+        grid = block_manifest.block_grid(READ_RANGES)
+        trusted = block_manifest.trusted_blocks(grid, self.baseline, self.manifest,
+                                                self.baseline_carried)
+        fingerprints = block_manifest.fingerprint_blocks(grid)
+
+        plan = [(addr, grid[addr]) for addr in sorted(fingerprints)]
+        async with aclosing(self.read_chunks(link, plan, self.window)) as chunks:
+            async for addr, chunk in chunks:
+                self.store_chunk(addr, chunk)
+
+        dirty = block_manifest.dirty_blocks(grid, self.baseline, self.memory)
+        fetch = ((grid.keys() - trusted) | dirty) - fingerprints
+
+        # Carry the unchanged blocks over from the baseline
+        for addr in grid.keys() - fetch - fingerprints:
+            self.memory[addr:addr+grid[addr]] = self.baseline[addr:addr+grid[addr]]
+            self.carried[addr] = self.baseline_carried.get(addr, 0) + 1
+
+        print(f"Incremental: re-reading {len(fetch)} of {len(grid)} blocks "
+              f"({len(trusted)} trusted by manifest, {len(self.carried)} copied from the baseline)")
+        ranges = sparse_image.coalesce((addr, grid[addr]) for addr in fetch)
+        return plan_chunks(ranges, self.chunk_size)
+
+    def resume_plan(self, plan):
+        """Restore the journaled chunks and cut them out of `plan`"""
+        stop = False
+        for addr, chunk in self.journal.chunks:
+            stop = self.store_chunk(addr, chunk) or stop
+        missing = read_journal.missing_ranges(
+            [(addr, addr + length) for addr, length in plan], self.journal.spans())
+        print(f"Resuming: {len(self.journal.chunks)} chunks from the journal, "
+              f"{sum(end - start for start, end in missing)} bytes left to read")
+        return [] if stop else plan_chunks(missing, self.chunk_size)
+
+    async def negotiate(self, link):
+        """Probe the read size and the batch size, if enabled"""
+        self.framer.trailer = link.trailer
+        if self.probe:
+            self.chunk_size = await self.probe_chunk_size(link)
+            print(f"Using read size {self.chunk_size}")
+
+        if self.batch > 1:
+            self.batch = await self.batch_size(link, min(self.batch, self.window))
+            print(f"Sending up to {self.batch} read commands per write" if self.batch > 1
+                  else "Firmware ignores concatenated read commands, sending one per write")
+
+    async def stream(self, link, ranges=READ_RANGES, priority=PRIORITY_RANGES):
+        """Read `ranges`, yielding (addr, memoryview) as each chunk arrives
+
+        Chunks overlapping `priority` ranges are requested first, in that
+        order, the rest by address; with a window they still arrive in
+        completion order. Chunks are stored in self.memory as well.
+        """
+        self.memory[:] = b'\xFF' * MEMORY_END
+        self.read_spans = []
+        self.carried = {}
+        self.diff = image_diff.ImageDiff()  # A reconnect starts over (journaled chunks are re-stored)
+        await self.negotiate(link)
+
+        plan = prioritize(plan_chunks(ranges, self.chunk_size), priority)
+        async with aclosing(self.read_chunks(link, plan, self.window)) as chunks:
+            async for addr, chunk in chunks:
+                self.store_chunk(addr, chunk)
+                yield addr, memoryview(chunk)
+
+    async def dump_memory(self, link):
         """Dump memory (skipping empty 0xFF regions for speed)"""
         # Pre-fill with 0xFF
         self.memory[:] = b'\xFF' * MEMORY_END
-
-        # Calculate total chunks to read
-        total_bytes = sum(end - start for start, end in READ_RANGES)
-        total_chunks = total_bytes // CHUNK_SIZE
-
-        should_stop = False
-
-        for range_start, range_end in READ_RANGES:
-            if should_stop:
-                break
-
-            for addr in range(range_start, range_end, CHUNK_SIZE):
-                chunk = await self.read_chunk(client, addr)
-                self.memory[addr:addr+len(chunk)] = chunk
-
-                # Compare with baseline if provided
-                if self.baseline:
-                    for offset in range(len(chunk)):
-                        byte_addr = addr + offset
-                        if chunk[offset] != self.baseline[byte_addr]:
-                            self.diffs_found.append((byte_addr, self.baseline[byte_addr], chunk[offset]))
-                            print(f"0x{byte_addr:04X}:0x{self.baseline[byte_addr]:02X}->0x{chunk[offset]:02X}")
-
-                            # Check if we should stop
-                            if self.stop_after and len(self.diffs_found) >= self.stop_after:
-                                should_stop = True
-                                break
-
-                    if should_stop:
-                        break
-
-                await asyncio.sleep(0.03)  # Small delay between reads
-
-        if self.baseline and not self.diffs_found:
-            print("No differences found.")
+        self.read_spans = []
+        self.carried = {}
+        self.diff = image_diff.ImageDiff()  # A reconnect starts over (journaled chunks are re-stored)
+        await self.negotiate(link)
+
+        if self.incremental:
+            plan = await self.plan_incremental(link)
+            if self.stop_after and self.diff.changed_bytes >= self.stop_after:
+                plan = []
+        else:
+            plan = plan_chunks(READ_RANGES, self.chunk_size)
+
+        if self.journal and self.journal.chunks:
+            plan = self.resume_plan(plan)
+
+        async with aclosing(self.read_chunks(link, plan, self.window)) as chunks:
+            async for addr, chunk in chunks:
+                if self.journal:
+                    self.journal.append(addr, chunk)
+                if self.store_chunk(addr, chunk):
+                    break
+
+        if self.baseline:
+            for line in self.diff.lines():
+                print(line)
+            if not self.diff:
+                print("No differences found.")
+
+        print(self.pacer.summary())
+        if self.trace:
+            for line in self.trace.summary():
+                print(line)
 
         return bytes(self.memory)
 
-    async def run(self, output_file):
-        """Main execution flow"""
-        address = await self.find_radio()
+    def save(self, output_file, memory):
+        """Write the image (flat or sparse) and its read metadata"""
+        output_path = Path(output_file)
+        grid = block_manifest.block_grid(READ_RANGES)
+        carried_spans = [(addr, grid[addr]) for addr in self.carried]
+        meta = {
+            "model": self.model,
+            "chunk_size": self.chunk_size,
+            "window": self.window,
+            "read_ranges": [[start, end] for start, end in READ_RANGES],
+            # Copied from the baseline, not read from the radio in this run
+            "carried_ranges": [[start, end] for start, end in sparse_image.coalesce(carried_spans)],
+            "manifest": block_manifest.build_manifest(
+                memory, grid, block_manifest.blocks_covered(grid, self.read_spans) | self.carried.keys(),
+                self.carried),
+        }
+
+        if self.sparse:
+            # Metadata travels inside the container
+            extents = sparse_image.extents_from_ranges(
+                memory, [(addr, addr + length) for addr, length in self.read_spans + carried_spans])
+            data = sparse_image.pack(extents, MEMORY_END, meta)
+            output_path.write_bytes(data)
+            print(f"Saved {len(extents)} extents ({len(data)} bytes) to {output_path}")
+            return
+
+        output_path.write_bytes(memory)
+        print(f"Saved {len(memory)} bytes to {output_path}")
+
+        # Record how the image was read next to it
+        meta_path = output_path.with_name(output_path.name + ".json")
+        meta_path.write_text(json.dumps(meta, indent=2) + "\n")
+
+    async def dump_link(self, link):
+        """Handshake and dump over an open clone_transport link"""
+        # Start notifications
+        await link.start(self.notification_handler)
+
+        # Perform handshake
+        await self.handshake(link)
+
+        # Dump memory
+        memory = await self.dump_memory(link)
+
+        # Stop notifications
+        await link.stop()
+        return memory
+
+    async def connect_and_dump(self, address, adapter=None, port=None, baud=clone_transport.SERIAL_BAUD):
+        """Connect (over BLE, or the serial cable on `port`), handshake and dump once"""
+        if port:
+            print(f"Opening {port} at {baud} baud...")
+            link = clone_transport.open_serial(port, baud)
+            try:
+                return await self.dump_link(link)
+            finally:
+                link.close()
 
         print(f"Connecting to {address}...")
-        async with BleakClient(address) as client:
+        async with BleakClient(address, **client_kwargs(adapter)) as client:
             print(f"Connected: {client.is_connected}")
+            return await self.dump_link(clone_transport.BleTransport(client))
 
-            # Start notifications
-            await client.start_notify(CHAR_NOTIFY_UUID, self.notification_handler)
-
-            # Perform handshake
-            await self.handshake(client)
+    async def run(self, output_file, address=None, adapter=None, reconnects=0, port=None,
+                  baud=clone_transport.SERIAL_BAUD):
+        """Main execution flow (scans for a radio unless `address` or a serial `port` is given)
 
-            # Dump memory
-            memory = await self.dump_memory(client)
+        With a journal, a failed dump reconnects up to `reconnects` times
+        and reads only the chunks still missing.
+        """
+        if address is None and port is None:
+            address = await self.find_radio(adapter)
 
-            # Stop notifications
-            await client.stop_notify(CHAR_NOTIFY_UUID)
+        for attempt in range(reconnects + 1):
+            try:
+                memory = await self.connect_and_dump(address, adapter, port, baud)
+                break
+            except (RuntimeError, BleakError, OSError, asyncio.TimeoutError) as e:
+                if self.journal is None or attempt == reconnects:
+                    raise
+                print(f"{str(e) or type(e).__name__}; reconnecting ({attempt + 1}/{reconnects})...")
 
-            # Save to file
-            output_path = Path(output_file)
-            output_path.write_bytes(memory)
-            print(f"Saved {len(memory)} bytes to {output_path}")
+        # Save to file
+        self.save(output_file, memory)
+        if self.journal:
+            self.journal.remove()
 
-            # Show memory statistics
-            non_empty = sum(1 for b in memory if b != 0xFF)
-            print(f"Non-empty bytes: {non_empty}/{len(memory)} ({non_empty/len(memory)*100:.1f}%)")
+        # Show memory statistics
+        non_empty = sum(1 for b in memory if b != 0xFF)
+        print(f"Non-empty bytes: {non_empty}/{len(memory)} ({non_empty/len(memory)*100:.1f}%)")
 
 
 async def main():
@@ -203,6 +757,14 @@ Examples:
   uv run dump_memory.py new.bin baseline.bin          # Compare, show all diffs
   uv run dump_memory.py new.bin baseline.bin --stop 1 # Compare, stop after 1st diff
   uv run dump_memory.py new.bin baseline.bin --stop 5 # Compare, stop after 5 diffs
+  uv run dump_memory.py output.bin --window 8         # Pipelined, 8 reads in flight
+  uv run dump_memory.py output.bin --probe            # Use the largest read size the radio accepts
+  uv run dump_memory.py output.h3ps --sparse          # Save only the ranges read
+  uv run dump_memory.py new.bin old.bin --incremental # Re-read only what changed since old.bin
+  uv run dump_memory.py output.bin --trace reads.jsonl # Per-command timing trace
+  uv run dump_memory.py output.bin --resume           # Continue an interrupted dump
+  uv run dump_memory.py output.bin --window 8 --batch 8 # 8 reads per GATT write
+  uv run dump_memory.py output.bin --port /dev/ttyUSB0 --window 4 # Over the programming cable
         """
     )
     parser.add_argument('output_file', nargs='?', default='memory_dump.bin',
@@ -211,6 +773,30 @@ Examples:
                         help='Baseline file for comparison (optional)')
     parser.add_argument('--stop', type=int, default=0, metavar='N',
                         help='Stop after N mismatches (default: 0 = no limit)')
+    parser.add_argument('--window', type=int, default=1, metavar='N',
+                        help='Max read requests in flight (default: 1 = lockstep)')
+    parser.add_argument('--probe', action='store_true',
+                        help='Probe for read sizes above 32 bytes (64/128/255)')
+    parser.add_argument('--sparse', action='store_true',
+                        help='Save a sparse .h3ps container of the ranges read')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Re-read only blocks changed since the baseline (needs baseline_file)')
+    parser.add_argument('--timing', action='store_true',
+                        help='Print per-command latency percentiles and histogram')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='Write one JSON line per read command to FILE (implies --timing)')
+    parser.add_argument('--batch', type=int, default=1, metavar='N',
+                        help='Read commands per GATT write, probed first (default: 1; needs --window N)')
+    parser.add_argument('--port', metavar='DEVICE',
+                        help='Use the serial programming cable on DEVICE instead of BLE')
+    parser.add_argument('--baud', type=int, default=clone_transport.SERIAL_BAUD, metavar='RATE',
+                        help=f'Serial cable baud rate (default: {clone_transport.SERIAL_BAUD})')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted dump from OUTPUT.journal')
+    parser.add_argument('--retries', type=int, default=READ_RETRIES, metavar='N',
+                        help=f'Re-sends of a failed chunk before giving up (default: {READ_RETRIES})')
+    parser.add_argument('--reconnects', type=int, default=RECONNECTS, metavar='N',
+                        help=f'Reconnect and resume up to N times after a failure (default: {RECONNECTS})')
 
     args = parser.parse_args()
 
@@ -221,25 +807,77 @@ Examples:
         if not baseline_path.exists():
             print(f"✗ Error: Baseline file not found: {args.baseline_file}")
             sys.exit(1)
-        baseline = bytearray(baseline_path.read_bytes())
+        try:
+            baseline = sparse_image.load_image(baseline_path)
+        except ValueError as e:
+            print(f"✗ Error: Invalid baseline file: {e}")
+            sys.exit(1)
         if len(baseline) != MEMORY_END:
             print(f"✗ Error: Baseline file size mismatch (expected {MEMORY_END}, got {len(baseline)})")
             sys.exit(1)
         print(f"Loaded baseline: {args.baseline_file}")
 
+    # Block hashes stored with the baseline, for incremental dumps
+    manifest = None
+    carried = None
+    if args.incremental:
+        if baseline is None:
+            print("✗ Error: --incremental needs a baseline file")
+            sys.exit(1)
+        manifest = block_manifest.load_manifest(args.baseline_file)
+        carried = block_manifest.load_carried(args.baseline_file)
+        if manifest is None:
+            print("Baseline has no manifest; every block will be re-read")
+
     # If no baseline, ignore --stop flag
     stop_after = args.stop if baseline else None
 
-    dumper = H3PlusDumper(baseline=baseline, stop_after=stop_after)
+    if args.window < 1:
+        print("✗ Error: --window must be at least 1")
+        sys.exit(1)
+
+    if args.retries < 0 or args.reconnects < 0:
+        print("✗ Error: --retries and --reconnects can't be negative")
+        sys.exit(1)
+    if args.batch < 1:
+        print("✗ Error: --batch must be at least 1")
+        sys.exit(1)
+    if args.batch > args.window:
+        print(f"Note: --batch {args.batch} is limited by --window {args.window}")
+
+    journal = read_journal.ReadJournal(args.output_file + ".journal")
+    trace = None
     try:
-        await dumper.run(args.output_file)
+        # Opened inside the try so that any failure from here on closes them
+        if journal.path.exists() and not args.resume:
+            print(f"Replacing {journal.path} from an earlier run (use --resume to continue it)")
+        journal.open(resume=args.resume)
+        if args.resume and not journal.chunks:
+            print(f"No journal at {journal.path}; starting from scratch")
+
+        trace = roundtrip_trace.RoundTripTrace(args.trace) if args.timing or args.trace else None
+        dumper = H3PlusDumper(baseline=baseline, stop_after=stop_after, window=args.window,
+                              probe=args.probe, sparse=args.sparse, manifest=manifest,
+                              incremental=args.incremental, trace=trace, journal=journal,
+                              retries=args.retries, batch=args.batch, carried=carried)
+        await dumper.run(args.output_file, reconnects=args.reconnects, port=args.port, baud=args.baud)
         print("\n✓ Success!")
     except KeyboardInterrupt:
         print("\n\nInterrupted by user")
+        print(f"Progress kept in {journal.path}; rerun with --resume")
         sys.exit(1)
     except Exception as e:
         print(f"\n✗ Error: {e}")
+        if trace:
+            for line in trace.summary():
+                print(line)
+        if journal.chunks:
+            print(f"Progress kept in {journal.path}; rerun with --resume")
         sys.exit(1)
+    finally:
+        journal.close()
+        if trace:
+            trace.finish()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+fleet.py - Read or program many Tidradio H3 Plus radios at once via BLE
+
+Usage:
+    uv run fleet.py dump OUT_DIR [--adapters hci0 hci1] [--per-adapter N] [--window N]
+    uv run fleet.py write IMAGE [--mode MODE] [--adapters hci0 hci1] [--per-adapter N] [--window N]
+
+Scans every adapter for TD-H3 radios, spreads them over the adapters that
+saw them (least loaded first) and runs one asyncio task per radio. At most
+--per-adapter connections are active on an adapter at a time. dump saves
+each radio to OUT_DIR/<address>.h3p; write programs IMAGE into every radio
+found.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from bleak import BleakScanner
+
+import ble_discovery
+import dump_memory
+import write_memory
+from dump_memory import client_kwargs
+
+SCAN_TIMEOUT = 5.0
+
+
+async def discover_radios(adapters, timeout=SCAN_TIMEOUT):
+    """Scan all adapters at once: {address: (name, adapters that saw it)}
+
+    Every radio in range is wanted, so these scans run for the full timeout.
+    """
+    scans = await asyncio.gather(*(BleakScanner.discover(timeout=timeout, return_adv=True,
+                                                         **client_kwargs(adapter))
+                                   for adapter in adapters))
+    radios = {}
+    for adapter, devices in zip(adapters, scans):
+        for device, adv in devices.values():
+            if ble_discovery.is_radio(device, adv):
+                radios.setdefault(device.address, (device.name, []))[1].append(adapter)
+                ble_discovery.remember(device)
+    return radios
+
+
+def assign_adapters(radios, adapters):
+    """{address: adapter}, each radio on the least loaded adapter that saw it
+
+    Radios seen by fewer adapters are placed first so they are not crowded
+    out of their only adapter.
+    """
+    load = dict.fromkeys(adapters, 0)
+    assignment = {}
+    for address, (_, seen) in sorted(radios.items(), key=lambda item: (len(item[1][1]), item[0])):
+        adapter = min(seen, key=lambda a: (load[a], adapters.index(a)))
+        load[adapter] += 1
+        assignment[address] = adapter
+    return assignment
+
+
+async def run_job(job, address, adapter, limit):
+    """Run one radio's job under its adapter's concurrency limit"""
+    async with limit:
+        start = time.monotonic()
+        await job(address, adapter)
+        return time.monotonic() - start
+
+
+async def run_fleet(job, adapters, per_adapter=1):
+    """Discover radios and run `job(address, adapter)` for each concurrently
+
+    Returns {address: (seconds, None) or (None, exception)}.
+    """
+    radios = await discover_radios(adapters)
+    print(f"Found {len(radios)} radios on {len(adapters)} adapters")
+    if not radios:
+        return {}
+
+    limits = {adapter: asyncio.Semaphore(per_adapter) for adapter in adapters}
+    assignment = assign_adapters(radios, adapters)
+    for address, adapter in assignment.items():
+        print(f"  {radios[address][0]} [{address}] -> {adapter or 'default adapter'}")
+
+    addresses = list(assignment)
+    outcomes = await asyncio.gather(
+        *(run_job(job, address, assignment[address], limits[assignment[address]])
+          for address in addresses),
+        return_exceptions=True)
+
+    return {address: (None, outcome) if isinstance(outcome, BaseException) else (outcome, None)
+            for address, outcome in zip(addresses, outcomes)}
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description='Read or program many H3 Plus radios concurrently',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  uv run fleet.py dump backups/                          # Back up every radio in range
+  uv run fleet.py write event.h3p --adapters hci0 hci1   # Program all radios over two dongles
+  uv run fleet.py write event.h3p --mode channels --per-adapter 3
+        """
+    )
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_dump = sub.add_parser('dump', help='Dump every radio to OUT_DIR/<address>.h3p')
+    p_dump.add_argument('out_dir')
+
+    p_write = sub.add_parser('write', help='Write IMAGE to every radio')
+    p_write.add_argument('image_file')
+    p_write.add_argument('--mode', choices=sorted(write_memory.WRITE_RANGES), default='all',
+                         help='Ranges to write (default: all)')
+
+    for p in (p_dump, p_write):
+        p.add_argument('--adapters', nargs='+', default=[None], metavar='HCI',
+                       help='HCI adapters to use (default: the system default)')
+        p.add_argument('--per-adapter', type=int, default=1, metavar='N',
+                       help='Concurrent connections per adapter (default: 1)')
+        p.add_argument('--window', type=int, default=1, metavar='N',
+                       help='Requests/packets in flight per radio (default: 1)')
+
+    args = parser.parse_args()
+
+    if args.per_adapter < 1 or args.window < 1:
+        print("✗ Error: --per-adapter and --window must be at least 1")
+        sys.exit(1)
+
+    if args.command == 'dump':
+        out_dir = Path(args.out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        async def job(address, adapter):
+            dumper = dump_memory.H3PlusDumper(window=args.window)
+            output = out_dir / (address.replace(":", "") + ".h3p")
+            await dumper.run(output, address=address, adapter=adapter)
+
+    else:
+        if not Path(args.image_file).exists():
+            print(f"✗ Error: Image file not found: {args.image_file}")
+            sys.exit(1)
+
+        async def job(address, adapter):
+            writer = write_memory.H3PlusWriter(window=args.window,
+                                               ranges=write_memory.WRITE_RANGES[args.mode])
+            await writer.run(args.image_file, address=address, adapter=adapter)
+
+    start = time.monotonic()
+    results = await run_fleet(job, args.adapters, args.per_adapter)
+
+    print()
+    for address, (seconds, error) in sorted(results.items()):
+        if error is None:
+            print(f"✓ {address}  {seconds:.1f} s")
+        else:
+            print(f"✗ {address}  {error}")
+    failed = sum(1 for _, error in results.values() if error is not None)
+    print(f"{len(results) - failed}/{len(results)} radios done in {time.monotonic() - start:.1f} s")
+
+    if failed or not results:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
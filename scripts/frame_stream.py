@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+frame_stream.py - Reassemble 'W' read responses from BLE notifications
+
+The radio answers a read with W addrHi addrLo len payload, but a
+notification carries at most MTU-3 bytes: a long response arrives split
+over several notifications, and back-to-back responses may share one.
+FrameReassembler treats the notifications as a byte stream and returns
+each complete frame as a memoryview. A notification holding whole frames
+is sliced without copying; only frames that span notifications are
+copied once, when they complete.
+
+A frame's length comes from the request it answers: expect(addr) gives
+the payload length asked for at that address (None if no read of it is
+pending), and the frame is complete once the header, that many bytes and
+the trailer have arrived. Frame contents are never inspected to find
+boundaries. Between frames, bytes are skipped up to a 'W' header for a
+pending address whose length byte matches the request (handshake replies,
+stray ACKs, the rest of a reply that timed out). A short or garbled reply
+stays a partial frame until its read times out and reset() drops it.
+
+Over the serial cable a reply ends with a checksum byte (trailer=1): it
+is checked and stripped, and a frame that fails it is dropped (its read
+times out and is re-sent).
+"""
+
+from collections import deque
+
+FRAME_START = 0x57  # 'W'
+HEADER_SIZE = 4
+
+
+class FrameReassembler:
+    def __init__(self, expect=None, trailer=0):
+        self.expect = expect  # Optional addr -> payload length awaited at addr (None: not awaited)
+        self.trailer = trailer  # Checksum bytes after the payload (0 over BLE, 1 over serial)
+        self.partial = bytearray()  # Start of a frame still missing bytes
+        self.frames = deque()
+        self.skipped = 0  # Bytes dropped while looking for a frame start
+        self.corrupt = 0  # Frames dropped for a bad checksum
+
+    @property
+    def partial_addr(self):
+        """Address of the frame being reassembled, or None"""
+        if len(self.partial) < 3:
+            return None
+        return (self.partial[1] << 8) | self.partial[2]
+
+    def reset(self):
+        """Drop a partial frame (e.g. its request timed out)"""
+        self.partial.clear()
+
+    def payload_length(self, header):
+        """Payload length of the frame starting with `header`, or None if it starts no awaited frame"""
+        if self.expect is None:
+            return header[3]
+        length = self.expect((header[1] << 8) | header[2])
+        return length if length == header[3] else None
+
+    def feed(self, data):
+        """Add one notification; complete frames are queued for pop()"""
+        view = memoryview(data)
+        if self.partial:
+            self.partial += view
+            view = memoryview(bytes(self.partial))
+            self.partial.clear()
+
+        pos = 0
+        while pos < len(view):
+            if view[pos] != FRAME_START:
+                self.skipped += 1
+                pos += 1
+                continue
+            if len(view) - pos < HEADER_SIZE:
+                break
+            length = self.payload_length(view[pos:pos + HEADER_SIZE])
+            if length is None:
+                self.skipped += 1
+                pos += 1
+                continue
+            end = pos + HEADER_SIZE + length
+            if end + self.trailer > len(view):
+                break
+            if self.trailer and sum(view[pos + HEADER_SIZE:end]) & 0xFF != view[end]:
+                self.corrupt += 1
+            else:
+                self.frames.append(view[pos:end])
+            pos = end + self.trailer
+
+        self.partial += view[pos:]
+
+    def pop(self):
+        """Oldest complete frame, or None"""
+        return self.frames.popleft() if self.frames else None
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+image_diff.py - Fast byte diff of H3 Plus memory images
+
+Chunks are compared whole (bytes equality), and only differing chunks
+are XORed as big integers; runs of changed bytes are then found with a
+regex over the XOR, so no Python-level loop touches individual bytes.
+
+Usage:
+    uv run image_diff.py old.h3p new.h3p
+
+Either file may be a flat .h3p or a sparse .h3ps.
+"""
+
+import re
+import sys
+from typing import NamedTuple
+
+import sparse_image
+
+CHANGED = re.compile(rb"[^\x00]+")
+
+
+class DiffRun(NamedTuple):
+    """Consecutive changed bytes [start, end)"""
+    start: int
+    old: bytes
+    new: bytes
+
+    @property
+    def end(self):
+        return self.start + len(self.new)
+
+    def __str__(self):
+        if len(self.new) == 1:
+            return f"0x{self.start:04X}:0x{self.old[0]:02X}->0x{self.new[0]:02X}"
+        return f"0x{self.start:04X}..0x{self.end-1:04X} changed: {self.old.hex()}->{self.new.hex()}"
+
+
+def xor_bytes(a, b):
+    """Bytewise XOR of two equal-length buffers"""
+    return (int.from_bytes(a, "big") ^ int.from_bytes(b, "big")).to_bytes(len(a), "big")
+
+
+def diff_chunk(addr, old, new):
+    """Changed runs between two equal-length chunks located at `addr`"""
+    if old == new:
+        return []
+    return [DiffRun(addr + m.start(), bytes(old[m.start():m.end()]), bytes(new[m.start():m.end()]))
+            for m in CHANGED.finditer(xor_bytes(old, new))]
+
+
+class ImageDiff:
+    """Coalesced byte differences between two images"""
+
+    def __init__(self, runs=None):
+        self.runs = list(runs or [])
+
+    def add(self, runs):
+        self.runs.extend(runs)
+
+    @property
+    def changed_bytes(self):
+        return sum(len(run.new) for run in self.runs)
+
+    def __bool__(self):
+        return bool(self.runs)
+
+    def __iter__(self):
+        return iter(sorted(self.runs))
+
+    def offsets(self):
+        """Every changed address, ascending"""
+        return [addr for run in self for addr in range(run.start, run.end)]
+
+    def truncated(self, limit):
+        """Copy keeping only the first `limit` changed bytes (in arrival order)"""
+        runs = []
+        remaining = limit
+        for run in self.runs:
+            if remaining <= 0:
+                break
+            keep = min(remaining, len(run.new))
+            runs.append(DiffRun(run.start, run.old[:keep], run.new[:keep]))
+            remaining -= keep
+        return ImageDiff(runs)
+
+    def lines(self):
+        return [str(run) for run in self]
+
+
+def diff_images(old, new, ranges=None, chunk_size=1024):
+    """ImageDiff of two images, optionally limited to (start, end) ranges"""
+    old = memoryview(old)
+    new = memoryview(new)
+    if ranges is None:
+        ranges = [(0, min(len(old), len(new)))]
+
+    diff = ImageDiff()
+    for start, end in ranges:
+        for addr in range(start, end, chunk_size):
+            stop = min(addr + chunk_size, end)
+            diff.add(diff_chunk(addr, old[addr:stop], new[addr:stop]))
+    return diff
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__.strip())
+        sys.exit(1)
+
+    try:
+        old = sparse_image.load_image(sys.argv[1])
+        new = sparse_image.load_image(sys.argv[2])
+    except (OSError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+    diff = diff_images(old, new)
+    for line in diff.lines():
+        print(line)
+    if not diff:
+        print("No differences found.")
+    else:
+        print(f"{diff.changed_bytes} bytes changed in {len(diff.runs)} runs")
+
+
+if __name__ == "__main__":
+    main()
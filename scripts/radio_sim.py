@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+radio_sim.py - Software H3 Plus speaking the BLE and serial clone protocol
+
+Backs a 16KB image and answers like the radio (see info/ble-protocol.md):
+AT+BAUD?, the PVOJH magic, 02 -> model string, 06 -> 06, R reads, W writes
+with checksum validation answered by an 06 ACK, E to leave programming
+mode. Writes outside the mapped ranges, with a bad checksum or shorter
+than 32 bytes get no reply at all, as on the real radio.
+
+Two front ends share one SimRadio:
+  SimBleClient  stands in for a connected BleakClient (notifications after
+                a configurable latency, split at the ATT MTU, optional loss)
+  SimSerial     stands in for the pyserial port used by info/tdh8.py and
+                the cable link (read responses carry the trailing checksum
+                byte there)
+
+Usage:
+    uv run radio_sim.py dump [IMAGE] [--window N] [--batch N] [--split-reads] [--latency S] [--mtu N] [--loss P]
+    uv run radio_sim.py write [IMAGE] [--window N] [--mode MODE] [--latency S] [--mtu N] [--loss P]
+    (either with --link serial to go through the cable link instead of BLE)
+
+From Python:
+    link = clone_transport.BleTransport(SimBleClient(SimRadio(image), latency=0.03))
+    # or clone_transport.SerialTransport(SimSerial(SimRadio(image)))
+    await link.start(dumper.notification_handler)
+
+    radio = tdh8.TDH3_Plus(SimSerial(SimRadio(image)))
+"""
+
+import argparse
+import asyncio
+import random
+import struct
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+MEMORY_SIZE = 0x4000
+MODEL = b"P31183\xff\xff"
+MAGIC = bytes([0x50, 0x56, 0x4F, 0x4A, 0x48, 0x5C, 0x14])  # PVOJH\x5c\x14
+ACK = b"\x06"
+BLOCK_SIZE = 32
+MAX_READ = 0xFF  # Longest read the simulated firmware answers in full
+
+# Ranges the radio ACKs writes to (ODMaster's plus the web app's extras)
+WRITABLE_RANGES = [
+    (0x0000, 0x13C0),
+    (0x1800, 0x18E0),
+    (0x1900, 0x1980),
+    (0x1C00, 0x1C40),
+    (0x1F00, 0x1F40),
+    (0x3000, 0x3020),
+]
+
+
+class SimRadio:
+    """Protocol state machine over an image; transport independent
+
+    handle() takes one command and returns the reply (b"" for none).
+    With read_checksum (serial), read replies end with a checksum byte.
+    writable=None accepts writes anywhere in the image. With split_reads,
+    a write of several concatenated R commands is answered command by
+    command; otherwise it is ignored like any malformed command.
+    """
+
+    def __init__(self, image=None, model=MODEL, writable=WRITABLE_RANGES, max_read=MAX_READ,
+                 read_checksum=False, split_reads=False):
+        self.image = bytearray(image if image is not None else b"\xff" * MEMORY_SIZE)
+        self.model = model
+        self.writable = writable
+        self.max_read = max_read
+        self.read_checksum = read_checksum
+        self.split_reads = split_reads
+        self.state = "idle"  # idle -> ident (magic seen) -> clone
+        self.stats = {"commands": 0, "reads": 0, "writes": 0, "ignored": 0, "handshakes": 0}
+
+    def is_writable(self, addr, length):
+        if self.writable is None:
+            return addr + length <= len(self.image)
+        return any(start <= addr and addr + length <= end for start, end in self.writable)
+
+    def handle(self, data):
+        data = bytes(data)
+        self.stats["commands"] += 1
+
+        if data.startswith(b"AT+BAUD?"):
+            return b"+BAUD: 9600bps OK"
+        if data == MAGIC:
+            self.state = "ident"
+            self.stats["handshakes"] += 1
+            return ACK
+        if data == b"\x02" and self.state == "ident":
+            return self.model
+        if data == ACK and self.state in ("ident", "clone"):
+            self.state = "clone"
+            return ACK
+        if data == b"E":
+            self.state = "idle"
+            return b""
+
+        if self.state != "clone" or len(data) < 4:
+            self.stats["ignored"] += 1
+            return b""
+
+        if self.split_reads and len(data) > 4 and len(data) % 4 == 0 and data[::4] == b"R" * (len(data) // 4):
+            self.stats["commands"] -= 1  # Counted per command below
+            return b"".join(self.handle(data[i:i + 4]) for i in range(0, len(data), 4))
+
+        command, addr, length = struct.unpack(">cHB", data[:4])
+        if command == b"R" and len(data) == 4:
+            self.stats["reads"] += 1
+            payload = bytes(self.image[addr:addr + min(length, self.max_read)])
+            reply = b"W" + data[1:4] + payload
+            if self.read_checksum:
+                reply += bytes([sum(payload) & 0xFF])
+            return reply
+        if command == b"W" and length == BLOCK_SIZE and len(data) == 5 + BLOCK_SIZE:
+            payload = data[4:4 + BLOCK_SIZE]
+            if sum(payload) & 0xFF == data[-1] and self.is_writable(addr, BLOCK_SIZE):
+                self.image[addr:addr + BLOCK_SIZE] = payload
+                self.stats["writes"] += 1
+                return ACK
+
+        self.stats["ignored"] += 1
+        return b""
+
+
+class SimBleClient:
+    """Connected-BleakClient stand-in in front of a SimRadio
+
+    Replies are notified `latency` seconds (+- jitter) after the write, in
+    order, split into MTU-3 byte notifications; each reply is lost with
+    probability `loss`. A write without response longer than MTU-3 is cut
+    to MTU-3 bytes, like an ATT write command.
+    """
+
+    def __init__(self, radio, latency=0.03, jitter=0.0, mtu=247, loss=0.0, seed=None):
+        self.radio = radio
+        self.latency = latency
+        self.jitter = jitter
+        self.mtu_size = mtu
+        self.loss = loss
+        self.random = random.Random(seed)
+        self.is_connected = True
+        self.address = "SIM"
+        self.handler = None
+        self.next_delivery = 0.0
+        self.outbox = deque()  # Replies due, oldest first (timers with equal deadlines may fire in any order)
+        self.gatt_writes = 0
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.disconnect()
+
+    async def connect(self):
+        self.is_connected = True
+
+    async def disconnect(self):
+        self.is_connected = False
+        self.handler = None
+
+    async def start_notify(self, uuid, handler):
+        self.handler = handler
+
+    async def stop_notify(self, uuid):
+        self.handler = None
+
+    async def write_gatt_char(self, uuid, data, response=False):
+        if not self.is_connected:
+            raise RuntimeError("Not connected")
+        self.gatt_writes += 1
+        payload = self.mtu_size - 3
+        data = bytes(data)
+        if response:
+            await asyncio.sleep(self.latency)  # Wait for the write response
+        elif len(data) > payload:
+            data = data[:payload]
+
+        reply = self.radio.handle(data)
+        if not reply or self.handler is None or self.random.random() < self.loss:
+            return
+
+        loop = asyncio.get_running_loop()
+        delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+        at = max(loop.time() + delay, self.next_delivery)
+        self.next_delivery = at
+        self.outbox.append([bytearray(reply[start:start + payload]) for start in range(0, len(reply), payload)])
+        loop.call_at(at, self.deliver)
+
+    def deliver(self):
+        """Notify the oldest reply, one notification per fragment"""
+        fragments = self.outbox.popleft()
+        for fragment in fragments:
+            if self.handler:
+                self.handler(None, fragment)
+
+
+class SimSerial:
+    """Blocking pyserial stand-in in front of a SimRadio
+
+    Reply bytes become readable `latency` seconds after the command;
+    read(n) waits up to `timeout` for n bytes like pyserial does.
+    """
+
+    def __init__(self, radio, latency=0.0, loss=0.0, seed=None):
+        radio.read_checksum = True
+        self.radio = radio
+        self.latency = latency
+        self.loss = loss
+        self.random = random.Random(seed)
+        self.port = "SIM"  # Device name, as on a pyserial port
+        self.timeout = 1
+        self.pending = deque()  # (ready time, bytes)
+        self.buffer = bytearray()
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        reply = self.radio.handle(data)
+        if reply and self.random.random() >= self.loss:
+            self.pending.append((time.monotonic() + self.latency, reply))
+        return len(data)
+
+    def _collect(self, now):
+        while self.pending and self.pending[0][0] <= now:
+            self.buffer += self.pending.popleft()[1]
+
+    def read(self, size=1):
+        deadline = time.monotonic() + (self.timeout or 0)
+        self._collect(time.monotonic())
+        while len(self.buffer) < size:
+            ready = self.pending[0][0] if self.pending else deadline
+            now = time.monotonic()
+            if min(ready, deadline) > now:
+                time.sleep(min(ready, deadline) - now)
+            self._collect(time.monotonic())
+            if time.monotonic() >= deadline:
+                break
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    @property
+    def in_waiting(self):
+        self._collect(time.monotonic())
+        return len(self.buffer)
+
+    def reset_input_buffer(self):
+        self.pending.clear()
+        self.buffer.clear()
+
+    def close(self):
+        pass
+
+
+async def main():
+    # The clients under test need bleak installed, the simulator itself doesn't
+    import clone_transport
+    import dump_memory
+    import write_memory
+
+    parser = argparse.ArgumentParser(
+        description='Run the BLE dumper or writer against a simulated radio',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  uv run radio_sim.py dump radio.h3p --latency 0.03 --window 4
+  uv run radio_sim.py dump --mtu 23 --loss 0.01
+  uv run radio_sim.py dump --window 8 --batch 8 --split-reads
+  uv run radio_sim.py write radio.h3p --mode channels --window 4
+  uv run radio_sim.py dump --link serial --window 4 --latency 0.01
+        """
+    )
+    parser.add_argument('command', choices=['dump', 'write'])
+    parser.add_argument('image_file', nargs='?', help='Image for the simulated radio (default: random)')
+    parser.add_argument('--window', type=int, default=1, metavar='N')
+    parser.add_argument('--batch', type=int, default=1, metavar='N',
+                        help='Read commands per GATT write (dump only)')
+    parser.add_argument('--split-reads', action='store_true',
+                        help='Simulated firmware answers concatenated read commands')
+    parser.add_argument('--link', choices=['ble', 'serial'], default='ble',
+                        help='Front end the tool talks to (default: ble)')
+    parser.add_argument('--mode', choices=sorted(write_memory.WRITE_RANGES), default='all',
+                        help='Write ranges (write only)')
+    parser.add_argument('--latency', type=float, default=0.03, metavar='S',
+                        help='Reply latency in seconds (default: 0.03)')
+    parser.add_argument('--jitter', type=float, default=0.0, metavar='S')
+    parser.add_argument('--mtu', type=int, default=247, help='ATT MTU (default: 247)')
+    parser.add_argument('--loss', type=float, default=0.0, metavar='P',
+                        help='Probability a reply is lost (default: 0)')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    image = Path(args.image_file).read_bytes() if args.image_file else rng.randbytes(MEMORY_SIZE)
+    if len(image) != MEMORY_SIZE:
+        print(f"✗ Error: Image size mismatch (expected {MEMORY_SIZE}, got {len(image)})")
+        sys.exit(1)
+
+    radio = SimRadio(image if args.command == 'dump' else None, split_reads=args.split_reads)
+    if args.link == 'serial':
+        port = SimSerial(radio, latency=args.latency, loss=args.loss, seed=args.seed)
+        link = clone_transport.SerialTransport(port)
+    else:
+        port = SimBleClient(radio, latency=args.latency, jitter=args.jitter, mtu=args.mtu,
+                            loss=args.loss, seed=args.seed)
+        link = clone_transport.BleTransport(port)
+    start = time.monotonic()
+    try:
+        if args.command == 'dump':
+            tool = dump_memory.H3PlusDumper(window=args.window, batch=args.batch)
+            memory = await tool.dump_link(link)
+            ok = all(memory[s:e] == image[s:e] for s, e in dump_memory.READ_RANGES)
+        else:
+            tool = write_memory.H3PlusWriter(window=args.window, ranges=write_memory.WRITE_RANGES[args.mode])
+            await tool.write_link(link, image)
+            ok = all(radio.image[s:e] == image[s:e] for s, e in tool.ranges)
+    except RuntimeError as e:
+        print(f"\n✗ Error: {e}")
+        sys.exit(1)
+    finally:
+        await link.stop()
+    elapsed = time.monotonic() - start
+
+    writes = port.writes if args.link == 'serial' else port.gatt_writes
+    print(f"\n{args.command}: {elapsed:.2f} s, {writes} {link.name} writes, radio stats {radio.stats}")
+    print("✓ Image matches" if ok else "✗ Image mismatch")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
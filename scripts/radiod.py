@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+radiod.py - Local daemon keeping BLE connections to H3 Plus radios warm
+
+Usage:
+    uv run radiod.py serve [--socket PATH] [--idle SECONDS]
+    uv run radiod.py read ADDRESS OUTPUT [--window N] [--sparse]
+    uv run radiod.py write ADDRESS IMAGE [--mode MODE] [--window N]
+    uv run radiod.py diff ADDRESS BASELINE [--window N]
+    uv run radiod.py status
+    uv run radiod.py close ADDRESS
+
+`serve` runs the daemon. Connections are kept open per radio address
+and the read handshake is redone only after a reconnect, a write or a
+read that stopped getting answers, so back-to-back jobs on the same radio
+skip the scan, the connection setup and the handshake.
+
+The other commands are clients. They send one JSON request per line over
+the Unix socket and print the JSON reply, e.g.
+    {"op": "read", "address": "AA:BB:...", "output": "/tmp/r.h3p", "window": 4}
+    -> {"ok": true, "seconds": 1.9, "warm": true, "output": "/tmp/r.h3p"}
+Paths are resolved by the daemon, so pass absolute paths from elsewhere.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from bleak import BleakClient
+
+import clone_transport
+import dump_memory
+import sparse_image
+import write_memory
+from dump_memory import client_kwargs
+
+DEFAULT_SOCKET = Path(os.environ.get("XDG_RUNTIME_DIR", "/tmp")) / "h3plus-radiod.sock"
+IDLE_TIMEOUT = 600  # Seconds before an unused connection is closed
+REAP_INTERVAL = 30
+
+
+class RadioConnection:
+    """One warm connection; jobs on it run one at a time"""
+
+    def __init__(self, address, adapter=None):
+        self.address = address
+        self.adapter = adapter
+        self.client = None
+        self.link = None  # clone_transport.BleTransport over self.client
+        self.mode = None  # "read" once the read handshake is done
+        self.model = None  # Model string from the last handshake
+        self.handler = None  # Notification handler of the running job
+        self.pacer = dump_memory.AdaptivePacer()  # Learned pacing survives between jobs
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+    @property
+    def connected(self):
+        return self.client is not None and self.client.is_connected
+
+    def on_notify(self, sender, data):
+        if self.handler:
+            self.handler(sender, data)
+
+    async def ensure_connected(self):
+        """Connect (and start notifications) unless already connected; True if it was warm"""
+        if self.connected:
+            return True
+        print(f"Connecting to {self.address}...")
+        self.client = BleakClient(self.address, **client_kwargs(self.adapter))
+        await self.client.connect()
+        self.link = clone_transport.BleTransport(self.client)
+        await self.link.start(self.on_notify)
+        self.mode = None
+        return False
+
+    async def close(self):
+        if self.connected:
+            await self.client.disconnect()
+        self.client = None
+        self.link = None
+        self.mode = None
+
+    async def read(self, dumper):
+        """Dump with `dumper`, handshaking only if the connection isn't in read mode"""
+        dumper.pacer = self.pacer
+        self.handler = dumper.notification_handler
+        if self.mode == "read":
+            dumper.model = self.model
+            try:
+                return await dumper.dump_memory(self.link)
+            except RuntimeError:
+                # The radio may have left programming mode; handshake again
+                print("Warm read failed, redoing handshake")
+        self.mode = None
+        await dumper.handshake(self.link)
+        self.model = dumper.model
+        self.mode = "read"
+        return await dumper.dump_memory(self.link)
+
+    async def write(self, writer, image):
+        """Write handshake + write; the radio's mode is unknown afterwards"""
+        self.handler = writer.notification_handler
+        self.mode = None
+        try:
+            await writer.write_image(self.link, image)
+        finally:
+            self.model = writer.model
+
+
+class RadioDaemon:
+    def __init__(self, idle_timeout=IDLE_TIMEOUT):
+        self.connections = {}  # address -> RadioConnection
+        self.idle_timeout = idle_timeout
+
+    def connection(self, address, adapter=None):
+        conn = self.connections.get(address)
+        if conn is None:
+            conn = self.connections[address] = RadioConnection(address, adapter)
+        return conn
+
+    async def job(self, request, work):
+        """Run `work(conn)` on the request's radio; returns the reply dict"""
+        conn = self.connection(request["address"], request.get("adapter"))
+        async with conn.lock:
+            start = time.monotonic()
+            warm = await conn.ensure_connected()
+            try:
+                reply = await work(conn)
+            except Exception:
+                await conn.close()
+                raise
+            finally:
+                conn.handler = None
+                conn.last_used = time.monotonic()
+        return {"ok": True, "seconds": round(time.monotonic() - start, 3), "warm": warm, **reply}
+
+    async def op_read(self, request):
+        dumper = dump_memory.H3PlusDumper(window=request.get("window", 1),
+                                          sparse=request.get("sparse", False))
+
+        async def work(conn):
+            memory = await conn.read(dumper)
+            dumper.save(request["output"], memory)
+            return {"output": request["output"]}
+
+        return await self.job(request, work)
+
+    async def op_diff(self, request):
+        baseline = sparse_image.load_image(request["baseline"])
+        dumper = dump_memory.H3PlusDumper(baseline=baseline, stop_after=request.get("stop", 0),
+                                          window=request.get("window", 1))
+
+        async def work(conn):
+            await conn.read(dumper)
+            return {"changed_bytes": dumper.diff.changed_bytes, "diff": dumper.diff.lines()}
+
+        return await self.job(request, work)
+
+    async def op_write(self, request):
+        mode = request.get("mode", "all")
+        writer = write_memory.H3PlusWriter(window=request.get("window", 1),
+                                           ranges=write_memory.WRITE_RANGES[mode])
+
+        async def work(conn):
+            with write_memory.open_image(request["image"]) as image:
+                if len(image) != dump_memory.MEMORY_END:
+                    raise RuntimeError(f"Image size mismatch (expected {dump_memory.MEMORY_END}, "
+                                       f"got {len(image)})")
+                await conn.write(writer, image)
+            return {"resent": writer.resent}
+
+        return await self.job(request, work)
+
+    async def op_status(self, request):
+        now = time.monotonic()
+        return {"ok": True, "connections": [
+            {"address": conn.address, "adapter": conn.adapter, "connected": conn.connected,
+             "mode": conn.mode, "model": conn.model, "busy": conn.lock.locked(),
+             "idle": round(now - conn.last_used, 1)}
+            for conn in self.connections.values()]}
+
+    async def op_close(self, request):
+        conn = self.connections.pop(request["address"], None)
+        if conn:
+            async with conn.lock:
+                await conn.close()
+        return {"ok": True}
+
+    async def handle(self, reader, writer):
+        """Serve JSON-line requests from one client"""
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    op = getattr(self, f"op_{request.get('op')}", None)
+                    if op is None:
+                        raise ValueError(f"Unknown op: {request.get('op')!r}")
+                    reply = await op(request)
+                except Exception as e:
+                    reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def reap_idle(self):
+        """Close connections unused for longer than idle_timeout"""
+        while True:
+            await asyncio.sleep(REAP_INTERVAL)
+            now = time.monotonic()
+            for conn in list(self.connections.values()):
+                if not conn.lock.locked() and conn.connected and \
+                        now - conn.last_used > self.idle_timeout:
+                    print(f"Closing idle connection to {conn.address}")
+                    await conn.close()
+
+    async def serve(self, socket_path):
+        socket_path = Path(socket_path)
+        socket_path.unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(self.handle, path=str(socket_path))
+        socket_path.chmod(0o600)
+        print(f"Listening on {socket_path}")
+        reaper = asyncio.create_task(self.reap_idle())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            reaper.cancel()
+            for conn in self.connections.values():
+                await conn.close()
+            socket_path.unlink(missing_ok=True)
+
+
+async def call(socket_path, request):
+    """Send one request to the daemon and return its reply"""
+    reader, writer = await asyncio.open_unix_connection(str(socket_path))
+    try:
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description='Daemon keeping BLE connections to H3 Plus radios warm',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  uv run radiod.py serve &                                   # Start the daemon
+  uv run radiod.py read AA:BB:CC:DD:EE:FF /tmp/a.h3p          # First read connects + handshakes
+  uv run radiod.py diff AA:BB:CC:DD:EE:FF /tmp/a.h3p          # Next jobs reuse the connection
+  uv run radiod.py write AA:BB:CC:DD:EE:FF /tmp/event.h3p --mode channels
+        """
+    )
+    parser.add_argument('--socket', default=str(DEFAULT_SOCKET),
+                        help=f'Unix socket path (default: {DEFAULT_SOCKET})')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_serve = sub.add_parser('serve', help='Run the daemon')
+    p_serve.add_argument('--idle', type=float, default=IDLE_TIMEOUT, metavar='SECONDS',
+                         help=f'Close connections idle this long (default: {IDLE_TIMEOUT})')
+
+    p_read = sub.add_parser('read', help='Dump a radio')
+    p_read.add_argument('address')
+    p_read.add_argument('output')
+    p_read.add_argument('--sparse', action='store_true', help='Save a .h3ps container')
+
+    p_write = sub.add_parser('write', help='Write an image to a radio')
+    p_write.add_argument('address')
+    p_write.add_argument('image')
+    p_write.add_argument('--mode', choices=sorted(write_memory.WRITE_RANGES), default='all')
+
+    p_diff = sub.add_parser('diff', help='Read a radio and diff it against a baseline')
+    p_diff.add_argument('address')
+    p_diff.add_argument('baseline')
+
+    for p in (p_read, p_write, p_diff):
+        p.add_argument('--window', type=int, default=1, metavar='N',
+                       help='Requests/packets in flight (default: 1)')
+        p.add_argument('--adapter', default=None, metavar='HCI',
+                       help='HCI adapter for a new connection')
+
+    sub.add_parser('status', help='List connections')
+    p_close = sub.add_parser('close', help='Disconnect a radio')
+    p_close.add_argument('address')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        try:
+            await RadioDaemon(idle_timeout=args.idle).serve(args.socket)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    request = {"op": args.command}
+    for key in ("address", "window", "adapter", "sparse", "mode"):
+        if getattr(args, key, None) is not None:
+            request[key] = getattr(args, key)
+    for key in ("output", "image", "baseline"):
+        if getattr(args, key, None) is not None:
+            request[key] = str(Path(getattr(args, key)).resolve())
+
+    try:
+        reply = await call(args.socket, request)
+    except OSError as e:
+        print(f"✗ Error: Cannot reach daemon at {args.socket}: {e}")
+        sys.exit(1)
+
+    print(json.dumps(reply, indent=2))
+    if not reply.get("ok"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+read_journal.py - Checkpoint journal of the chunks a dump has read
+
+dump_memory.py appends every chunk to OUTPUT.journal as it arrives and
+deletes the journal once the image is saved. After an interrupted dump,
+--resume loads the chunks back and reads only what is still missing.
+
+Format: MAGIC, then records of addr (u16 BE), length (u16 BE), CRC-32 of
+the payload (u32 BE) and the payload. Loading stops at the first
+truncated or corrupt record (e.g. the process died mid-write), and
+appending continues from there.
+
+Usage:
+    uv run read_journal.py OUTPUT.journal     # List the journaled spans
+"""
+
+import struct
+import sys
+import zlib
+from pathlib import Path
+
+import sparse_image
+
+MAGIC = b"H3PJ\x01"
+RECORD = struct.Struct(">HHI")  # addr, length, crc32
+
+
+class ReadJournal:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.chunks = []  # (addr, payload) journaled so far, oldest first
+        self.file = None
+
+    def open(self, resume=False):
+        """Start a new journal, or continue the existing one if `resume`"""
+        valid = self.load() if resume else 0
+        if not valid:
+            self.chunks = []
+            self.file = open(self.path, "wb")
+            self.file.write(MAGIC)
+        else:
+            self.file = open(self.path, "r+b")
+            self.file.truncate(valid)
+            self.file.seek(valid)
+        self.file.flush()
+        return self
+
+    def load(self):
+        """Read the valid records into self.chunks; returns their end offset (0 if none)"""
+        self.chunks = []
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            return 0
+        if not data.startswith(MAGIC):
+            return 0
+
+        pos = len(MAGIC)
+        while pos + RECORD.size <= len(data):
+            addr, length, crc = RECORD.unpack_from(data, pos)
+            payload = data[pos + RECORD.size:pos + RECORD.size + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                break
+            self.chunks.append((addr, payload))
+            pos += RECORD.size + length
+        return pos
+
+    def append(self, addr, chunk):
+        chunk = bytes(chunk)
+        self.file.write(RECORD.pack(addr, len(chunk), zlib.crc32(chunk)) + chunk)
+        self.file.flush()
+        self.chunks.append((addr, chunk))
+
+    def spans(self):
+        """(addr, length) of every journaled chunk"""
+        return [(addr, len(chunk)) for addr, chunk in self.chunks]
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def remove(self):
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+def missing_ranges(ranges, spans):
+    """Parts of (start, end) ranges not covered by (addr, length) spans"""
+    covered = sparse_image.coalesce(spans)
+    missing = []
+    for start, end in ranges:
+        pos = start
+        for covered_start, covered_end in covered:
+            if covered_end <= pos or covered_start >= end:
+                continue
+            if covered_start > pos:
+                missing.append((pos, covered_start))
+            pos = max(pos, covered_end)
+        if pos < end:
+            missing.append((pos, end))
+    return missing
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__.strip())
+        sys.exit(1)
+    journal = ReadJournal(sys.argv[1])
+    if not journal.load() and not journal.path.exists():
+        print(f"✗ Error: Journal not found: {sys.argv[1]}")
+        sys.exit(1)
+    for start, end in sparse_image.coalesce(journal.spans()):
+        print(f"0x{start:04X}-0x{end:04X}  {end - start} bytes")
+    print(f"{len(journal.chunks)} chunks")
+
+
+if __name__ == "__main__":
+    main()
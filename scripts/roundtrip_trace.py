@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+roundtrip_trace.py - Per-command timing of the clone protocol
+
+A RoundTripTrace records, for every R or W command, when it was sent,
+when the first notification for it arrived and when its reply was
+complete, plus the attempt number and the outcome (ok, short, refused,
+timeout). Records can be streamed to a JSONL file as they close, and
+summary() gives percentiles and a latency histogram.
+
+Reading the summary:
+  - send -> first notification is the radio's turnaround; consistently
+    high means slow firmware
+  - first -> complete is the transfer of a reply split over notifications
+  - timeouts/retries with scattered latencies point at the radio link
+    (weak RSSI) rather than the firmware
+
+Usage:
+    uv run roundtrip_trace.py TRACE.jsonl     # Summary of a saved trace
+"""
+
+import json
+import statistics
+import sys
+import time
+
+HISTOGRAM_MS = [5, 10, 20, 50, 100, 200, 500, 1000, 2000]  # Bucket upper bounds
+BAR_WIDTH = 40
+
+
+class RoundTripTrace:
+    def __init__(self, path=None):
+        self.start = time.monotonic()
+        self.open = {}  # (kind, addr) -> record, oldest first
+        self.closed = []
+        self.file = open(path, "w") if path else None
+
+    def now(self):
+        return round(time.monotonic() - self.start, 6)
+
+    def sent(self, kind, addr, length, attempt=0):
+        """A command went out (a resend replaces the open record)"""
+        self.close((kind, addr), "timeout", self.open.get((kind, addr)))
+        self.open[(kind, addr)] = {"kind": kind, "addr": addr, "len": length, "attempt": attempt,
+                                   "sent": self.now(), "first": None, "done": None,
+                                   "received": 0, "outcome": None}
+
+    def notified(self, kind, addr):
+        """First notification belonging to this command"""
+        record = self.open.get((kind, addr))
+        if record and record["first"] is None:
+            record["first"] = self.now()
+
+    def completed(self, kind, addr, received=None, outcome=None):
+        """The reply is complete; a short one is recorded as 'short'"""
+        record = self.open.get((kind, addr))
+        if record is None:
+            return
+        self.notified(kind, addr)
+        record["received"] = record["len"] if received is None else received
+        record["done"] = self.now()
+        self.close((kind, addr), outcome or ("ok" if record["received"] >= record["len"] else "short"))
+
+    def complete_oldest(self, kind, outcome="ok"):
+        """Close the oldest open `kind` command (replies that don't carry an address)"""
+        for key in self.open:
+            if key[0] == kind:
+                self.completed(*key, outcome=outcome)
+                return
+
+    def timed_out(self, kind, addr):
+        self.close((kind, addr), "timeout")
+
+    def abandon(self, kind):
+        """Every open `kind` command gets no reply (e.g. the window is resent)"""
+        for key in [key for key in self.open if key[0] == kind]:
+            self.close(key, "timeout")
+
+    def close(self, key, outcome, record=None):
+        record = record or self.open.get(key)
+        if record is None:
+            return
+        self.open.pop(key, None)
+        record["outcome"] = outcome
+        self.closed.append(record)
+        if self.file:
+            self.file.write(json.dumps(record) + "\n")
+
+    def finish(self):
+        """Close the JSONL file; commands still open are recorded as timeouts"""
+        for key in list(self.open):
+            self.close(key, "timeout")
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def summary(self):
+        return summarize(self.closed)
+
+
+def percentiles(values):
+    if len(values) < 2:
+        return {"p50": values[0], "p90": values[0], "p99": values[0]} if values else {}
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": cuts[49], "p90": cuts[89], "p99": cuts[98]}
+
+
+def histogram(values_ms):
+    """Lines of a text histogram over HISTOGRAM_MS buckets"""
+    bounds = HISTOGRAM_MS + [float("inf")]
+    counts = [0] * len(bounds)
+    for value in values_ms:
+        counts[next(i for i, bound in enumerate(bounds) if value < bound)] += 1
+    peak = max(counts) or 1
+    lines = []
+    low = 0
+    for bound, count in zip(bounds, counts):
+        label = f"{low:>5}-{bound:<5}" if bound != float("inf") else f"{low:>5}+     "
+        lines.append(f"  {label} ms {count:>6} {'#' * round(count / peak * BAR_WIDTH)}")
+        low = bound
+    return lines
+
+
+def summarize(records):
+    """Text summary (list of lines) of closed trace records"""
+    if not records:
+        return ["No round trips recorded"]
+    lines = []
+    for kind in sorted({record["kind"] for record in records}):
+        mine = [record for record in records if record["kind"] == kind]
+        done = [record for record in mine if record["done"] is not None]
+        outcomes = {}
+        for record in mine:
+            outcomes[record["outcome"]] = outcomes.get(record["outcome"], 0) + 1
+        retries = sum(1 for record in mine if record["attempt"] > 0)
+
+        total = [(record["done"] - record["sent"]) * 1000 for record in done]
+        first = [(record["first"] - record["sent"]) * 1000 for record in done]
+        transfer = [(record["done"] - record["first"]) * 1000 for record in done]
+
+        lines.append(f"{kind} commands: {len(mine)} ({', '.join(f'{k} {v}' for k, v in sorted(outcomes.items()))}), "
+                     f"{retries} retries")
+        for label, values in (("send->first", first), ("first->complete", transfer), ("send->complete", total)):
+            if values:
+                cuts = percentiles(values)
+                lines.append(f"  {label:<16} p50 {cuts['p50']:7.1f}  p90 {cuts['p90']:7.1f}  "
+                             f"p99 {cuts['p99']:7.1f}  max {max(values):7.1f} ms")
+        lines.extend(histogram(total))
+    return lines
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__.strip())
+        sys.exit(1)
+    try:
+        with open(sys.argv[1]) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    except (OSError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+    for line in summarize(records):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,20 @@
 #!/usr/bin/env python3
 """Scan all BLE services and characteristics on radio"""
 import asyncio
-from bleak import BleakClient, BleakScanner
+from bleak import BleakClient
+
+import ble_discovery
 
 async def scan_services():
     print("Scanning for TD-H3 radio...")
-    devices = await BleakScanner.discover(timeout=5.0)
-
-    radio = None
-    for device in devices:
-        if device.name and device.name.startswith("TD-H3"):
-            print(f"Found: {device.name} [{device.address}]\n")
-            radio = device
-            break
-
-    if not radio:
+    try:
+        radio = await ble_discovery.find_radio()
+    except RuntimeError:
         print("No TD-H3 radio found")
         return
+    print()
 
-    async with BleakClient(radio.address) as client:
+    async with BleakClient(radio) as client:
         print(f"Connected: {client.is_connected}\n")
 
         print("Services and Characteristics:")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+settings_codec.py - Decode the H3 Plus menu settings without CHIRP
+
+Reads the menu settings held in settings block 1 (0x0C90-0x0CAF) from a
+memoryview of the image, as documented in info/memory-map.md. Each
+setting is a bit field of one byte; values without a label (reserved
+encodings) come back as integers.
+
+Usage:
+    uv run settings_codec.py dump.h3p
+"""
+
+import sys
+
+import sparse_image
+
+SETTINGS_START = 0x0C90
+SETTINGS_END = 0x0CB0
+
+OFF_ON = ["off", "on"]
+SHORT_PRESS = {0: "none", 1: "fm radio", 2: "lamp", 3: "tone", 4: "alarm", 5: "weather",
+               7: "ptt2", 8: "od ptt"}
+LONG_PRESS = ["none", "fm radio", "lamp", "cancel sq", "tone", "alarm", "weather"]
+
+# (name, address, lowest bit, bit count, labels by value), in menu order where numbered
+SETTINGS = [
+    ("squelch", 0x0CA9, 0, 8, ["off"] + [f"level {n}" for n in range(1, 10)]),
+    ("step", 0x0CA8, 4, 4, ["2.5K", "5.0K", "6.25K", "10K", "12.5K", "25K", "50K", "0.5K", "8.33K"]),
+    ("vox_level", 0x0CA7, 0, 3, ["off"] + [f"level {n}" for n in range(1, 6)]),
+    ("vox_delay", 0x0CAE, 0, 8, ["1.0s", "2.0s", "3.0s"]),
+    ("tot", 0x0CAA, 0, 8, ["off", "30s", "60s", "90s", "120s", "150s", "180s", "210s"]),
+    ("roger_beep", 0x0CAB, 6, 2, ["off", "tone 1", "tone 2"]),
+    ("keypad_beep", 0x0CA1, 2, 1, OFF_ON),
+    ("power_save", 0x0CAC, 0, 8, ["off"] + [f"level {n}" for n in range(1, 5)]),
+    ("keypad_lock", 0x0CA1, 4, 1, OFF_ON),
+    ("dual_watch", 0x0CA3, 2, 1, OFF_ON),
+    ("voice", 0x0CA1, 0, 1, OFF_ON),
+    ("backlight", 0x0CAD, 0, 8, ["always on", "5s", "10s", "15s", "30s"]),
+    ("brightness", 0x0C9D, 0, 8, ["5", "4", "3", "2", "1"]),  # Stored inverted
+    ("power_on_display", 0x0CA3, 6, 2, ["voltage", "message", "picture"]),
+    ("display_type_a", 0x0CA2, 2, 1, ["freq + number", "name + number"]),
+    ("display_type_b", 0x0CA3, 4, 1, ["freq + number", "name + number"]),
+    ("dtmfst", 0x0CA0, 1, 1, OFF_ON),
+    ("tone_burst", 0x0CA2, 4, 2, ["1000Hz", "1450Hz", "1750Hz", "2100Hz"]),
+    ("fm_interrupt", 0x0CA2, 3, 1, OFF_ON),
+    ("pf1_short", 0x0C91, 0, 8, SHORT_PRESS),
+    ("pf1_long", 0x0C94, 0, 8, LONG_PRESS),
+    ("pf2_short", 0x0C92, 0, 8, SHORT_PRESS),
+    ("pf2_long", 0x0C95, 0, 8, LONG_PRESS),
+    ("breath_led", 0x0CAF, 4, 3, ["off", "5s", "10s", "15s", "30s"]),
+    ("dtmf_speed", 0x0C9B, 0, 8, [f"{ms}ms" for ms in range(80, 160, 10)]),
+    ("dcd", 0x0C98, 0, 8, OFF_ON),
+    ("d_hold", 0x0C99, 0, 8, ["off", "5s", "10s", "15s"]),
+    ("d_rsp", 0x0C9A, 0, 8, ["null", "ring", "reply", "both"]),
+    ("tx_200", 0x0CAB, 4, 1, OFF_ON),
+    ("tx_350", 0x0CAB, 3, 1, OFF_ON),
+    ("tx_500", 0x0CAB, 2, 1, OFF_ON),
+    ("scan_mode", 0x0CA1, 6, 2, ["TO", "CO", "SE"]),
+    ("vfo_a_mode", 0x0CA2, 0, 1, ["vfo", "channel"]),
+    ("vfo_b_mode", 0x0CA3, 0, 1, ["vfo", "channel"]),
+    ("vfo_a_channel", 0x0CA4, 0, 8, None),
+    ("vfo_b_channel", 0x0CA5, 0, 8, None),
+]
+
+
+def decode_settings(image):
+    """Menu settings as {name: label} from an image (needs 0x0C90-0x0CAF only)"""
+    view = memoryview(image)
+    settings = {}
+    for name, addr, shift, bits, labels in SETTINGS:
+        value = view[addr] >> shift & ((1 << bits) - 1)
+        if isinstance(labels, dict):
+            settings[name] = labels.get(value, value)
+        else:
+            settings[name] = labels[value] if labels and value < len(labels) else value
+    return settings
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__.strip())
+        sys.exit(1)
+
+    try:
+        image = sparse_image.load_image(sys.argv[1])
+    except (OSError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+    if len(image) < SETTINGS_END:
+        print(f"✗ Error: Image too short ({len(image)} bytes)")
+        sys.exit(1)
+
+    for name, value in decode_settings(image).items():
+        print(f"{name:<18} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+sparse_image.py - Sparse (range-aware) container for H3 Plus memory dumps
+
+A .h3ps file stores only the extents that were actually read from the
+radio, so "read and was 0xFF" can be told apart from "never read".
+
+Layout (all integers little-endian):
+
+    header   magic "H3PS", version u8, flags u8, extent count u16,
+             image size u32, metadata length u32           (16 bytes)
+    metadata UTF-8 JSON object (read size, ranges, ...)
+    extents  start u32, length u32, CRC-32 of payload u32, payload
+             (repeated extent count times, sorted by start)
+
+Usage:
+    uv run sparse_image.py info dump.h3ps
+    uv run sparse_image.py expand dump.h3ps dump.h3p
+    uv run sparse_image.py pack dump.h3p dump.h3ps [--ranges START:END ...]
+"""
+
+import argparse
+import json
+import struct
+import sys
+import zlib
+from pathlib import Path
+
+MAGIC = b"H3PS"
+VERSION = 1
+IMAGE_SIZE = 0x4000  # 16KB, the flat .h3p layout
+FILL = 0xFF
+
+HEADER = struct.Struct("<4sBBHII")
+EXTENT = struct.Struct("<III")
+
+
+def coalesce(spans):
+    """Merge (start, length) spans into sorted, non-overlapping (start, end) ranges"""
+    ranges = []
+    for start, length in sorted(spans):
+        end = start + length
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+    return [(start, end) for start, end in ranges]
+
+
+def extents_from_ranges(memory, ranges):
+    """Slice (start, end) ranges out of a flat image as (start, payload) extents"""
+    return [(start, bytes(memory[start:end])) for start, end in coalesce(
+        (start, end - start) for start, end in ranges)]
+
+
+def pack(extents, image_size=IMAGE_SIZE, meta=None):
+    """Serialize (start, payload) extents into a .h3ps container"""
+    meta_bytes = json.dumps(meta or {}, sort_keys=True).encode()
+    extents = sorted(extents)
+
+    out = bytearray(HEADER.pack(MAGIC, VERSION, 0, len(extents), image_size, len(meta_bytes)))
+    out += meta_bytes
+    for start, payload in extents:
+        if start + len(payload) > image_size:
+            raise ValueError(f"Extent 0x{start:04X}+{len(payload)} exceeds image size")
+        out += EXTENT.pack(start, len(payload), zlib.crc32(payload))
+        out += payload
+    return bytes(out)
+
+
+def unpack(data):
+    """Parse a .h3ps container into (extents, image_size, meta)
+
+    Raises ValueError on a bad magic, unknown version, truncation or
+    CRC mismatch.
+    """
+    view = memoryview(data)
+    if len(view) < HEADER.size:
+        raise ValueError("Truncated header")
+    magic, version, _flags, count, image_size, meta_len = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("Not a sparse H3 Plus image")
+    if version != VERSION:
+        raise ValueError(f"Unsupported sparse image version {version}")
+
+    pos = HEADER.size
+    meta = json.loads(bytes(view[pos:pos+meta_len]) or b"{}")
+    pos += meta_len
+
+    extents = []
+    for _ in range(count):
+        if pos + EXTENT.size > len(view):
+            raise ValueError("Truncated extent header")
+        start, length, crc = EXTENT.unpack_from(view, pos)
+        pos += EXTENT.size
+        payload = bytes(view[pos:pos+length])
+        if len(payload) != length:
+            raise ValueError(f"Truncated extent at 0x{start:04X}")
+        if zlib.crc32(payload) != crc:
+            raise ValueError(f"CRC mismatch in extent at 0x{start:04X}")
+        extents.append((start, payload))
+        pos += length
+
+    return extents, image_size, meta
+
+
+def expand(extents, image_size=IMAGE_SIZE, fill=FILL):
+    """Build a flat image, filling never-read bytes with `fill`"""
+    memory = bytearray([fill]) * image_size
+    for start, payload in extents:
+        memory[start:start+len(payload)] = payload
+    return memory
+
+
+def is_sparse(data):
+    """True if `data` starts with the .h3ps magic"""
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def load_image(path):
+    """Load a flat .h3p or sparse .h3ps file as a flat image"""
+    data = Path(path).read_bytes()
+    if is_sparse(data):
+        extents, image_size, _ = unpack(data)
+        return expand(extents, image_size)
+    return bytearray(data)
+
+
+def parse_range(text):
+    """Parse 'START:END' (hex or decimal) into a (start, end) tuple"""
+    start, _, end = text.partition(":")
+    return int(start, 0), int(end, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sparse H3 Plus image container')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_info = sub.add_parser('info', help='Show header, metadata and extents')
+    p_info.add_argument('input')
+
+    p_expand = sub.add_parser('expand', help='Expand .h3ps to a flat 16KB .h3p')
+    p_expand.add_argument('input')
+    p_expand.add_argument('output')
+
+    p_pack = sub.add_parser('pack', help='Pack ranges of a flat .h3p into .h3ps')
+    p_pack.add_argument('input')
+    p_pack.add_argument('output')
+    p_pack.add_argument('--ranges', nargs='+', type=parse_range, metavar='START:END',
+                        help='Ranges to keep (default: whole image)')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'info':
+            extents, image_size, meta = unpack(Path(args.input).read_bytes())
+            print(f"Image size: {image_size} bytes, {len(extents)} extents")
+            for key, value in meta.items():
+                print(f"  {key}: {value}")
+            for start, payload in extents:
+                print(f"  0x{start:04X}-0x{start+len(payload):04X} ({len(payload)} bytes)")
+            covered = sum(len(payload) for _, payload in extents)
+            print(f"Coverage: {covered}/{image_size} ({covered/image_size*100:.1f}%)")
+
+        elif args.command == 'expand':
+            memory = load_image(args.input)
+            Path(args.output).write_bytes(memory)
+            print(f"Saved {len(memory)} bytes to {args.output}")
+
+        elif args.command == 'pack':
+            memory = Path(args.input).read_bytes()
+            ranges = args.ranges or [(0, len(memory))]
+            data = pack(extents_from_ranges(memory, ranges), len(memory))
+            Path(args.output).write_bytes(data)
+            print(f"Saved {len(data)} bytes to {args.output}")
+
+    except (OSError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+stream_decode.py - Show a radio's settings and channels while it is being read
+
+H3PlusDumper.stream() yields chunks as they arrive, settings and channel
+bitmaps first (PRIORITY_RANGES). ProgressiveDecoder copies them into an
+image, and as soon as every byte the menu settings or a channel are
+decoded from is in, decodes it on a worker thread (settings_codec.py,
+channel_codec.py) and calls back on the event loop. The settings are
+usually decoded a few round trips after the handshake.
+
+Reads the channel records as well as READ_RANGES (write_memory's "all"
+ranges), so all 199 channels decode.
+
+Usage:
+    uv run stream_decode.py [--window N] [--port DEVICE] [--baud RATE]
+
+From Python:
+    decoder = ProgressiveDecoder(on_settings=show_settings, on_channel=show_channel)
+    await decoder.consume(dumper.stream(link, STREAM_RANGES))
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bleak import BleakClient
+
+import channel_codec
+import clone_transport
+import dump_memory
+import settings_codec
+import sparse_image
+import write_memory
+from dump_memory import MEMORY_END, client_kwargs
+
+STREAM_RANGES = sparse_image.coalesce(
+    (start, end - start) for start, end in write_memory.WRITE_RANGES["all"] + dump_memory.READ_RANGES)
+
+
+class ProgressiveDecoder:
+    """Decode settings and channels from (addr, chunk) pairs as they complete
+
+    Decoding runs on one worker thread, in completion order. on_settings
+    (dict) and on_channel (channel_codec.Channel) are called on the event
+    loop; self.settings and self.channels hold everything decoded so far.
+    """
+
+    def __init__(self, on_settings=None, on_channel=None):
+        self.on_settings = on_settings
+        self.on_channel = on_channel
+        self.image = bytearray(b"\xff" * MEMORY_END)
+        self.have = bytearray(MEMORY_END)  # 1 for every byte received
+        self.settings = None
+        self.channels = {}  # number -> Channel
+        self.waiting = set(range(1, channel_codec.CHANNEL_COUNT + 1))  # Channels not decoded yet
+        self.settings_due = True
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="decode")
+        self.jobs = []
+
+    def complete(self, spans):
+        return all(self.have.find(0, start, end) == -1 for start, end in spans)
+
+    def add(self, addr, chunk):
+        """Store a chunk and queue decoding of whatever it completed"""
+        self.image[addr:addr + len(chunk)] = chunk
+        self.have[addr:addr + len(chunk)] = b"\x01" * len(chunk)
+        view = memoryview(self.image)  # Decoded spans are complete and no longer change
+
+        if self.settings_due and self.complete([(settings_codec.SETTINGS_START, settings_codec.SETTINGS_END)]):
+            self.settings_due = False
+            self.submit(settings_codec.decode_settings, self.settings_done, view)
+
+        done = [number for number in self.waiting if self.complete(channel_codec.channel_spans(number))]
+        for number in sorted(done):
+            self.waiting.discard(number)
+            self.submit(channel_codec.decode_channel, self.channel_done, view, number)
+
+    def submit(self, decode, done, *args):
+        future = asyncio.wrap_future(self.executor.submit(decode, *args))
+        future.add_done_callback(lambda f: f.cancelled() or f.exception() or done(f.result()))
+        self.jobs.append(future)
+
+    def settings_done(self, settings):
+        self.settings = settings
+        if self.on_settings:
+            self.on_settings(settings)
+
+    def channel_done(self, channel):
+        self.channels[channel.number] = channel
+        if self.on_channel:
+            self.on_channel(channel)
+
+    async def consume(self, chunks):
+        """Feed an async iterator of (addr, chunk) and wait for the last decode"""
+        try:
+            async for addr, chunk in chunks:
+                self.add(addr, chunk)
+            await asyncio.gather(*self.jobs)
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def stream_link(link, window, on_settings, on_channel):
+    """Handshake over `link` and decode a streamed read; returns the decoder"""
+    dumper = dump_memory.H3PlusDumper(window=window)
+    await link.start(dumper.notification_handler)
+    await dumper.handshake(link)
+    decoder = ProgressiveDecoder(on_settings, on_channel)
+    await decoder.consume(dumper.stream(link, STREAM_RANGES))
+    await link.stop()
+    return decoder
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description='Print settings and channels as they are read from the radio',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  uv run stream_decode.py --window 8                 # Over BLE
+  uv run stream_decode.py --port /dev/ttyUSB0         # Over the programming cable
+        """
+    )
+    parser.add_argument('--window', type=int, default=4, metavar='N',
+                        help='Max read requests in flight (default: 4)')
+    parser.add_argument('--port', metavar='DEVICE',
+                        help='Use the serial programming cable on DEVICE instead of BLE')
+    parser.add_argument('--baud', type=int, default=clone_transport.SERIAL_BAUD, metavar='RATE',
+                        help=f'Serial cable baud rate (default: {clone_transport.SERIAL_BAUD})')
+    args = parser.parse_args()
+
+    if args.window < 1:
+        print("✗ Error: --window must be at least 1")
+        sys.exit(1)
+
+    start = time.monotonic()
+
+    def on_settings(settings):
+        print(f"[{time.monotonic() - start:6.2f} s] settings: "
+              + ", ".join(f"{name}={value}" for name, value in settings.items()))
+
+    def on_channel(channel):
+        if not channel.empty:
+            print(f"[{time.monotonic() - start:6.2f} s] {channel.number:>3}  {channel.name:<8}  "
+                  f"{channel.rx_freq/1e6:>10.5f}  {channel.tx_freq/1e6:>10.5f}")
+
+    try:
+        if args.port:
+            link = clone_transport.open_serial(args.port, args.baud)
+            try:
+                await stream_link(link, args.window, on_settings, on_channel)
+            finally:
+                link.close()
+        else:
+            address = await dump_memory.H3PlusDumper().find_radio()
+            async with BleakClient(address, **client_kwargs()) as client:
+                start = time.monotonic()
+                await stream_link(clone_transport.BleTransport(client), args.window,
+                                  on_settings, on_channel)
+        print(f"\n✓ Done in {time.monotonic() - start:.1f} s")
+    except KeyboardInterrupt:
+        print("\n\nInterrupted by user")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+write_memory.py - Write a memory image to the Tidradio H3 Plus via BLE (or the serial cable)
+
+Usage:
+    uv run write_memory.py image.h3p [--mode MODE] [--window N] [--timing] [--trace FILE] [--port DEVICE]
+                           [--baud RATE]
+
+Writes the ranges of MODE (all, settings, channels or fm; the same ranges
+as the web app) from a 16KB image. Flat images are memory-mapped and each
+32-byte block is read from the file only when its packet is sent; .h3ps
+containers are expanded first.
+
+Uses the write handshake captured from ODMaster (see info/ble-protocol.md):
+wait for 06, send 02, receive the model string, send 06, receive 06, then
+W packets with a checksum, each answered by an 06 ACK. Every step waits for
+the radio's reply instead of sleeping.
+Use --window N to keep up to N W packets ahead of their ACKs.
+Use --timing / --trace FILE for per-packet ACK timing (roundtrip_trace.py).
+Use --port DEVICE to write over the programming cable instead of BLE, at
+--baud RATE (38400 by default; clone_transport.py).
+"""
+
+import argparse
+import asyncio
+import mmap
+import struct
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from bleak import BleakClient
+
+import clone_transport
+import dump_memory
+import roundtrip_trace
+import sparse_image
+from dump_memory import ACK, MEMORY_END, client_kwargs
+
+BLOCK_SIZE = 32
+ACK_TIMEOUT = 2.0  # Seconds to wait for a write ACK
+WRITE_RETRIES = 2  # Resends of a failed span before giving up
+SYNC_WINDOWS = 4  # Drain the window every N windows (see write_blocks)
+
+# Write ranges by mode (same as docs/js/ble.js)
+WRITE_RANGES = {
+    "all": [
+        (0x0000, 0x13C0),  # Channels, names, settings
+        (0x1800, 0x18E0),  # DTMF/ANI system
+        (0x1900, 0x1980),  # Channel valid + scan bitmaps + VFO frequencies
+        (0x1C00, 0x1C40),  # Startup messages
+        (0x1F00, 0x1F40),  # Repeater tail + secondary settings + bluetooth
+        (0x3000, 0x3020),  # Extended settings
+    ],
+    "settings": [
+        (0x0C90, 0x0CD0),  # Function keys + main settings + VFO offsets + TX band limits
+        (0x1800, 0x18E0),  # DTMF/ANI system
+        (0x1950, 0x1980),  # VFO A/B records + FM VFO
+        (0x1C00, 0x1C40),  # Startup messages
+        (0x1F00, 0x1F40),  # Repeater tail + secondary settings + bluetooth
+        (0x3000, 0x3020),  # Extended settings
+    ],
+    "channels": [
+        (0x0000, 0x0C80),  # Header + 199 channels
+        (0x0D40, 0x1380),  # Channel names
+        (0x1900, 0x1940),  # Channel valid + scan bitmaps
+    ],
+    "fm": [
+        (0x0CA0, 0x0CB0),  # FM mode flag
+        (0x0CD0, 0x0D40),  # 25 FM channels
+        (0x1940, 0x1980),  # FM scan bitmap + FM VFO
+    ],
+}
+
+
+def plan_blocks(ranges):
+    """Start addresses of the 32-byte blocks covering (start, end) ranges"""
+    return [addr for start, end in ranges for addr in range(start, end, BLOCK_SIZE)]
+
+
+def write_packet(image, addr):
+    """W + address + 0x20 + 32 data bytes (0xFF padded) + checksum"""
+    data = bytes(image[addr:addr+BLOCK_SIZE]).ljust(BLOCK_SIZE, b"\xff")
+    return struct.pack(">cHB", b"W", addr, BLOCK_SIZE) + data + bytes([sum(data) & 0xFF])
+
+
+@contextmanager
+def open_image(path):
+    """Memory-map a flat image (a .h3ps container is expanded instead)"""
+    with open(path, "rb") as f:
+        if sparse_image.is_sparse(f.read(len(sparse_image.MAGIC))):
+            yield sparse_image.load_image(path)
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as image:
+            yield image
+
+
+class H3PlusWriter(dump_memory.CloneSession):
+    def __init__(self, window=1, ranges=WRITE_RANGES["all"], trace=None):
+        super().__init__()
+        self.window = window  # Max W packets ahead of their ACKs
+        self.ranges = ranges
+        self.trace = trace  # Optional RoundTripTrace of every W packet
+        self.acks = deque()  # Notification payloads not consumed yet (after the handshake)
+        self.resent = 0
+
+    def notification_handler(self, sender, data):
+        """Collect handshake replies, then queue notifications for ACK accounting"""
+        if self.collect_reply(data):
+            return
+
+        self.acks.append(bytes(data))
+        self.reply_ready.set()
+        if self.trace:
+            # ACKs carry no address: each reply byte answers the oldest open packet
+            for byte in data:
+                self.trace.complete_oldest("W", "ok" if byte == ACK else "refused")
+
+    async def next_notification(self, timeout):
+        """Next notification payload, or None on timeout"""
+        while not self.acks:
+            self.reply_ready.clear()
+            try:
+                await asyncio.wait_for(self.reply_ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self.acks.popleft()
+
+    async def next_byte(self, timeout):
+        """Next reply byte (ACKs may arrive coalesced), or None on timeout"""
+        data = await self.next_notification(timeout)
+        if data is None:
+            return None
+        if len(data) > 1:
+            self.acks.appendleft(data[1:])
+        return data[0]
+
+    async def send(self, link, data):
+        await link.send(data)
+
+    async def handshake(self, link):
+        """Enter clone mode for writes (see CloneSession.clone_handshake)"""
+        print("Performing write handshake...")
+        await self.clone_handshake(link)
+        self.acks.clear()
+        print("Handshake complete")
+
+    async def drain(self, count):
+        """Collect up to `count` late replies, then drop anything queued"""
+        for _ in range(count):
+            if await self.next_byte(ACK_TIMEOUT) is None:
+                break
+        self.acks.clear()
+
+    async def write_blocks(self, link, image, addrs):
+        """Write 32-byte blocks keeping up to self.window packets unacknowledged
+
+        ACKs are all the same byte, so a lost one only shows up as a short
+        count: the window is drained every SYNC_WINDOWS windows and a missing
+        ACK resends from the last point where every block was acknowledged.
+        Any other reply is matched in order and resends from its block.
+
+        info/tdh8.py _write_blocks is the same loop for CHIRP (serial, sync);
+        fix both together.
+        """
+        span = self.window * SYNC_WINDOWS
+        inflight = deque()
+        confirmed = pos = 0
+        retries = 0
+
+        while confirmed < len(addrs):
+            limit = min(len(addrs), confirmed + span)
+            while pos < limit and len(inflight) < self.window:
+                if self.trace:
+                    self.trace.sent("W", addrs[pos], BLOCK_SIZE, retries)
+                await self.send(link, write_packet(image, addrs[pos]))
+                inflight.append(pos)
+                pos += 1
+
+            index = inflight.popleft()
+            reply = await self.next_byte(ACK_TIMEOUT)
+            if reply == ACK:
+                if not inflight:
+                    confirmed = pos
+                    retries = 0
+                continue
+
+            rewind = index if reply is not None else confirmed
+            if retries >= WRITE_RETRIES:
+                if reply is not None:
+                    raise RuntimeError(f"Radio refused block 0x{addrs[index]:04X} (reply 0x{reply:02X})")
+                raise RuntimeError(f"No ACK for blocks 0x{addrs[confirmed]:04X}-0x{addrs[pos-1]:04X}")
+            retries += 1
+            print(f"Missing ACK, resending from 0x{addrs[rewind]:04X}")
+            self.resent += pos - rewind
+            if self.trace:
+                self.trace.abandon("W")
+            await self.drain(len(inflight))
+            inflight.clear()
+            pos = rewind
+
+    async def write_image(self, link, image):
+        """Handshake and write self.ranges of `image`"""
+        await self.handshake(link)
+        addrs = plan_blocks(self.ranges)
+        start = time.monotonic()
+        await self.write_blocks(link, image, addrs)
+        elapsed = time.monotonic() - start
+        print(f"Wrote {len(addrs)} blocks in {elapsed:.1f} s ({self.resent} resent)")
+        if self.trace:
+            for line in self.trace.summary():
+                print(line)
+
+    async def write_link(self, link, image):
+        """Write `image` over an open clone_transport link"""
+        await link.start(self.notification_handler)
+        await self.write_image(link, image)
+        await link.stop()
+
+    async def run(self, image_file, address=None, adapter=None, port=None,
+                  baud=clone_transport.SERIAL_BAUD):
+        """Main execution flow (scans for a radio unless `address` or a serial `port` is given)"""
+        with open_image(image_file) as image:
+            if len(image) != MEMORY_END:
+                raise RuntimeError(f"Image size mismatch (expected {MEMORY_END}, got {len(image)})")
+
+            if port:
+                print(f"Opening {port} at {baud} baud...")
+                link = clone_transport.open_serial(port, baud)
+                try:
+                    await self.write_link(link, image)
+                finally:
+                    link.close()
+                return
+
+            if address is None:
+                address = await self.find_radio(adapter)
+
+            print(f"Connecting to {address}...")
+            async with BleakClient(address, **client_kwargs(adapter)) as client:
+                print(f"Connected: {client.is_connected}")
+                await self.write_link(clone_transport.BleTransport(client), image)
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description='Write a memory image to the Tidradio H3 Plus via BLE',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  uv run write_memory.py radio.h3p                    # Write everything the web app writes
+  uv run write_memory.py radio.h3p --mode channels    # Channels, names and bitmaps only
+  uv run write_memory.py radio.h3p --window 4         # Pipelined, 4 packets in flight
+  uv run write_memory.py radio.h3p --port /dev/ttyUSB0 # Over the programming cable
+        """
+    )
+    parser.add_argument('image_file', help='16KB .h3p image (or .h3ps container)')
+    parser.add_argument('--mode', choices=sorted(WRITE_RANGES), default='all',
+                        help='Ranges to write (default: all)')
+    parser.add_argument('--window', type=int, default=1, metavar='N',
+                        help='Max W packets awaiting ACK (default: 1 = lockstep)')
+    parser.add_argument('--timing', action='store_true',
+                        help='Print per-packet ACK latency percentiles and histogram')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='Write one JSON line per W packet to FILE (implies --timing)')
+    parser.add_argument('--port', metavar='DEVICE',
+                        help='Use the serial programming cable on DEVICE instead of BLE')
+    parser.add_argument('--baud', type=int, default=clone_transport.SERIAL_BAUD, metavar='RATE',
+                        help=f'Serial cable baud rate (default: {clone_transport.SERIAL_BAUD})')
+    args = parser.parse_args()
+
+    if not Path(args.image_file).exists():
+        print(f"✗ Error: Image file not found: {args.image_file}")
+        sys.exit(1)
+    if args.window < 1:
+        print("✗ Error: --window must be at least 1")
+        sys.exit(1)
+
+    trace = roundtrip_trace.RoundTripTrace(args.trace) if args.timing or args.trace else None
+    writer = H3PlusWriter(window=args.window, ranges=WRITE_RANGES[args.mode], trace=trace)
+    try:
+        await writer.run(args.image_file, port=args.port, baud=args.baud)
+        print("\n✓ Success!")
+    except KeyboardInterrupt:
+        print("\n\nInterrupted by user")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        if trace:
+            for line in trace.summary():
+                print(line)
+        sys.exit(1)
+    finally:
+        if trace:
+            trace.finish()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
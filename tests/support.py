@@ -0,0 +1,77 @@
+"""
+Shared helpers for the tests: puts scripts/ and info/ on sys.path and
+wires the tools to radio_sim.py
+
+Run from the repository root:
+    uv run python -m unittest discover tests
+"""
+
+import contextlib
+import importlib
+import io
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / "scripts"), str(ROOT / "info")]
+
+import clone_transport  # noqa: E402
+import radio_sim  # noqa: E402
+
+
+def require(module, reason=None):
+    """Import `module`, or skip the calling test module without it"""
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise unittest.SkipTest(reason or f"{module} is not installed")
+
+
+def random_image(seed, size=radio_sim.MEMORY_SIZE):
+    return bytearray(random.Random(seed).randbytes(size))
+
+
+def ble_link(radio, loss=0.0, seed=None, mtu=247):
+    return clone_transport.BleTransport(
+        radio_sim.SimBleClient(radio, latency=0.001, mtu=mtu, loss=loss, seed=seed))
+
+
+def serial_link(radio, loss=0.0, seed=None):
+    return clone_transport.SerialTransport(radio_sim.SimSerial(radio, loss=loss, seed=seed))
+
+
+def matches(image, expected, ranges):
+    return all(image[start:end] == expected[start:end] for start, end in ranges)
+
+
+class SimTestCase(unittest.IsolatedAsyncioTestCase):
+    """Quiet, short-timeout runs of the dumper and writer in a temporary directory"""
+
+    def setUp(self):
+        dump_memory = require("dump_memory", "bleak is not installed")
+        write_memory = require("write_memory", "bleak is not installed")
+        # Lost replies cost a timeout each; keep them short
+        for patch in (mock.patch.object(dump_memory, "READ_TIMEOUT", 0.2),
+                      mock.patch.object(write_memory, "ACK_TIMEOUT", 0.2)):
+            patch.start()
+            self.addCleanup(patch.stop)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        stdout = contextlib.redirect_stdout(io.StringIO())
+        stdout.__enter__()
+        self.addCleanup(stdout.__exit__, None, None, None)
+
+    async def dump(self, dumper, radio, output, **link_kwargs):
+        """dumper.run() against `radio` (a fresh link per connection attempt)"""
+        import sparse_image
+
+        async def connect_and_dump(address, adapter=None, port=None, baud=None):
+            return await dumper.dump_link(ble_link(radio, **link_kwargs))
+        dumper.connect_and_dump = connect_and_dump
+        await dumper.run(output, address="SIM")
+        return sparse_image.load_image(output)
@@ -0,0 +1,112 @@
+"""Tests for block manifests and incremental dumps (scripts/block_manifest.py)"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from support import SimTestCase, matches, random_image
+
+import block_manifest
+import radio_sim
+import sparse_image
+
+try:
+    import dump_memory
+except ImportError:  # No bleak: SimTestCase skips
+    dump_memory = None
+
+CHANNEL_ADDR = 0x0065  # In channel 3's record: no fingerprint block covers it
+
+
+class ManifestTest(unittest.TestCase):
+    def setUp(self):
+        self.grid = block_manifest.block_grid([(0x0000, 0x0050), (0x1900, 0x1940)])
+        self.memory = random_image(1)
+
+    def test_block_grid(self):
+        self.assertEqual(self.grid, {0x0000: 32, 0x0020: 32, 0x0040: 16, 0x1900: 32, 0x1920: 32})
+
+    def test_changed_channels(self):
+        self.assertEqual(block_manifest.changed_channels(b"\x00\x00", b"\x01\x80"), [1, 16])
+        # Bits past channel 199 are ignored
+        self.assertEqual(block_manifest.changed_channels(b"\x00" * 25, b"\x00" * 24 + b"\xff"),
+                         list(range(193, 200)))
+
+    def test_valid_bit_dirties_record_and_name(self):
+        grid = block_manifest.block_grid([(0x0000, 0x0340), (0x0C90, 0x1F40)])
+        memory = bytearray(self.memory)
+        memory[0x1900] ^= 0x04  # Channel 3
+        dirty = block_manifest.dirty_blocks(grid, self.memory, memory)
+        self.assertEqual(dirty, {0x0020, 0x0D50})
+
+    def test_settings_change_dirties_settings_ranges(self):
+        grid = block_manifest.block_grid([(0x0000, 0x0340), (0x0C90, 0x1F40)])
+        memory = bytearray(self.memory)
+        memory[0x0CA0] ^= 0x01
+        dirty = block_manifest.dirty_blocks(grid, self.memory, memory)
+        self.assertLessEqual(block_manifest.blocks_touching(grid, 0x1C00, 0x1C40), dirty)
+        self.assertNotIn(0x0020, dirty)
+
+    def test_trusted_blocks(self):
+        manifest = {addr: block_manifest.block_hash(self.memory[addr:addr + length])
+                    for addr, length in self.grid.items()}
+        baseline = bytearray(self.memory)
+        baseline[0x0041] ^= 0x01
+        carried = {0x0000: block_manifest.MAX_CARRY, 0x0020: block_manifest.MAX_CARRY - 1}
+        self.assertEqual(block_manifest.trusted_blocks(self.grid, baseline, manifest, carried),
+                         {0x0020, 0x1900, 0x1920})
+        self.assertEqual(block_manifest.trusted_blocks(self.grid, baseline, None), set())
+
+    def test_saved_manifest_round_trip(self):
+        manifest = block_manifest.build_manifest(self.memory, self.grid, {0x0000, 0x0020}, {0x0020: 3})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "dump.h3ps"
+            path.write_bytes(sparse_image.pack([], meta={"manifest": manifest}))
+            self.assertEqual(set(block_manifest.load_manifest(path)), {0x0000, 0x0020})
+            self.assertEqual(block_manifest.load_carried(path), {0x0020: 3})
+
+            path.write_bytes(sparse_image.pack([], meta={}))
+            self.assertIsNone(block_manifest.load_manifest(path))
+            self.assertEqual(block_manifest.load_carried(path), {})
+
+
+class IncrementalDumpTest(SimTestCase):
+    async def full_baseline(self, image):
+        path = self.tmp / "0.h3ps"
+        await self.dump(dump_memory.H3PlusDumper(sparse=True), radio_sim.SimRadio(image), path)
+        return path
+
+    def incremental_dumper(self, baseline):
+        return dump_memory.H3PlusDumper(
+            baseline=sparse_image.load_image(baseline), stop_after=None, sparse=True,
+            incremental=True, manifest=block_manifest.load_manifest(baseline),
+            carried=block_manifest.load_carried(baseline))
+
+    async def test_fingerprinted_change_is_reread(self):
+        image = random_image(4)
+        baseline = await self.full_baseline(image)
+        image[0x1905] ^= 0x01  # Valid bitmap: marks its channel's blocks dirty
+
+        radio = radio_sim.SimRadio(image)
+        memory = await self.dump(self.incremental_dumper(baseline), radio, self.tmp / "1.h3ps")
+        self.assertTrue(matches(memory, image, dump_memory.READ_RANGES))
+        self.assertLess(radio.stats["reads"], len(block_manifest.block_grid(dump_memory.READ_RANGES)))
+
+    async def test_carried_blocks_are_reread_eventually(self):
+        image = random_image(5)
+        baseline = await self.full_baseline(image)
+        image[CHANNEL_ADDR] ^= 0x11
+
+        for run in range(1, block_manifest.MAX_CARRY + 2):
+            output = self.tmp / f"{run}.h3ps"
+            await self.dump(self.incremental_dumper(baseline), radio_sim.SimRadio(image), output)
+            caught = sparse_image.load_image(output)[CHANNEL_ADDR] == image[CHANNEL_ADDR]
+            self.assertEqual(caught, run > block_manifest.MAX_CARRY)
+            baseline = output
+
+        _, _, meta = sparse_image.unpack(Path(self.tmp / "1.h3ps").read_bytes())
+        self.assertTrue(meta["carried_ranges"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""Tests for the columnar channel view (scripts/channel_array.py)"""
+
+import unittest
+
+import support
+from support import random_image
+
+np = support.require("numpy")
+import channel_array  # noqa: E402
+import channel_codec  # noqa: E402
+
+
+class ChannelTableTest(unittest.TestCase):
+    def test_matches_channel_codec(self):
+        images = [random_image(seed) for seed in range(3)]
+        # Blank records and names ending early, as on a real radio
+        images[0][0x0010:0x0020] = b"\xff" * 16
+        images[0][0x0D40:0x0D48] = b"AB\xff\x41\x41\x41\x41\x41"
+        table = channel_array.channel_table(images)
+        self.assertEqual(table.shape, (3, channel_codec.CHANNEL_COUNT))
+
+        for row, image in zip(table, images):
+            for record, channel in zip(row, channel_codec.decode_channels(image)):
+                with self.subTest(channel=channel.number):
+                    self.assertEqual(record["number"], channel.number)
+                    self.assertEqual(record["rx_freq_hz"], channel.rx_freq)
+                    self.assertEqual(record["tx_freq_hz"], channel.tx_freq)
+                    self.assertEqual(channel_codec.decode_tone(int(record["rx_tone"])), channel.rx_tone)
+                    self.assertEqual(record["scramble"], channel.scramble)
+                    self.assertEqual(record["high_power"], channel.high_power)
+                    self.assertEqual(record["narrow"], channel.narrow)
+                    self.assertEqual(record["am"], channel.am)
+                    self.assertEqual(record["valid"], channel.valid)
+                    self.assertEqual(record["scan"], channel.scan)
+                    self.assertEqual(record["name"].decode("latin-1").strip(), channel.name)
+
+    def test_single_image_and_query(self):
+        image = bytearray(b"\xff" * 0x4000)
+        channel = channel_codec.Channel(5, rx_freq=462562500, tx_freq=462562500,
+                                        rx_tone=("DTCS", 23, "N"), name="FRS5")
+        channel_codec.encode_channels(image, [channel])
+        table = channel_array.channel_table(bytes(image))
+        match = channel_array.programmed(table) & (table["rx_tone"] == channel_array.tone_word("D023N"))
+        self.assertEqual(table["number"][match].tolist(), [5])
+        self.assertEqual(channel_array.tone_word("OFF"), channel_array.TONE_OFF)
+        self.assertEqual(channel_array.tone_word("88.5"), 0x0885)
+
+
+if __name__ == "__main__":
+    unittest.main()
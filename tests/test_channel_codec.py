@@ -0,0 +1,66 @@
+"""Tests for the channel record codec (scripts/channel_codec.py)"""
+
+import unittest
+
+from support import random_image
+
+import channel_codec
+from channel_codec import Channel
+
+
+class BcdTest(unittest.TestCase):
+    def test_round_trip(self):
+        for number in (0, 1, 9, 10, 99, 1234, 46256250, 99999999):
+            with self.subTest(number=number):
+                self.assertEqual(channel_codec.bcd_to_int(channel_codec.int_to_bcd(number)), number)
+
+    def test_layout(self):
+        # 462.5625 MHz in 10 Hz units, little-endian BCD as stored in a record
+        self.assertEqual(channel_codec.int_to_bcd(46256250).to_bytes(4, "little"), b"\x50\x62\x25\x46")
+
+
+class ToneTest(unittest.TestCase):
+    def test_words(self):
+        cases = [(0xFFFF, ("", None, None)), (0x0000, ("", None, None)),
+                 (0x0885, ("Tone", 88.5, None)), (0x2541, ("Tone", 254.1, None)),
+                 (0x8023, ("DTCS", 23, "N")), (0xC754, ("DTCS", 754, "I"))]
+        for word, tone in cases:
+            with self.subTest(word=hex(word)):
+                self.assertEqual(channel_codec.decode_tone(word), tone)
+                if word:
+                    self.assertEqual(channel_codec.encode_tone(tone), word)
+
+    def test_bad_mode(self):
+        with self.assertRaises(ValueError):
+            channel_codec.encode_tone(("Cross", 1, None))
+
+
+class ChannelTest(unittest.TestCase):
+    def test_encode_then_decode(self):
+        image = bytearray(b"\xff" * 0x4000)
+        channel = Channel(7, rx_freq=146520000, tx_freq=146520000, rx_tone=("Tone", 100.0, None),
+                          tx_tone=("DTCS", 754, "I"), scramble=3, busy_lock=True, ptt_id=2,
+                          narrow=True, high_power=False, name="SIMPLEX")
+        changed = channel_codec.encode_channels(image, [channel])
+        self.assertEqual(channel_codec.decode_channel(image, 7), channel)
+        self.assertEqual(channel_codec.decode_channels(image)[6], channel)
+        self.assertTrue(channel_codec.decode_channel(image, 8).empty)
+        # Record and name only: the blank image already has every valid and scan bit set
+        self.assertEqual(changed, [(0x0070, 0x0080), (0x0D70, 0x0D78)])
+
+    def test_unchanged_channels_reencode_to_the_same_bytes(self):
+        image = random_image(1)
+        before = bytes(image)
+        self.assertEqual(channel_codec.encode_channels(image, channel_codec.decode_channels(image)), [])
+        self.assertEqual(bytes(image), before)
+
+    def test_decode_channel_needs_only_its_spans(self):
+        image = random_image(2)
+        sparse = bytearray(b"\x00" * len(image))
+        for start, end in channel_codec.channel_spans(42):
+            sparse[start:end] = image[start:end]
+        self.assertEqual(channel_codec.decode_channel(sparse, 42), channel_codec.decode_channels(image)[41])
+
+
+if __name__ == "__main__":
+    unittest.main()
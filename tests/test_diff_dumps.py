@@ -0,0 +1,51 @@
+"""Tests for the offline directory diff (scripts/diff_dumps.py)"""
+
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+import support
+from support import random_image
+
+np = support.require("numpy")
+import diff_dumps  # noqa: E402
+import sparse_image  # noqa: E402
+
+
+class DiffDumpsTest(unittest.TestCase):
+    def setUp(self):
+        base = random_image(1)
+        self.images = [bytearray(base) for _ in range(3)]
+        self.images[1][0x0100] ^= 1
+        self.images[2][0x0100] ^= 1
+        self.images[2][0x2000:0x2003] = b"abc"
+
+    def test_change_matrix(self):
+        stack = np.stack([np.frombuffer(image, dtype=np.uint8) for image in self.images])
+        columns = diff_dumps.varying_columns(stack)
+        self.assertEqual(list(columns), [0x0100, 0x2000, 0x2001, 0x2002])
+        matrix = diff_dumps.change_matrix(stack, columns)
+        expected = [[sum(a != b for a, b in zip(x, y)) for y in self.images] for x in self.images]
+        self.assertEqual(matrix.tolist(), expected)
+
+    def test_field_name(self):
+        self.assertEqual(diff_dumps.field_name(0x0010, {}), "CH1 RX frequency")
+        self.assertEqual(diff_dumps.field_name(0x0D48, {}), "CH2 name")
+        self.assertEqual(diff_dumps.field_name(0x3000, {0x3000: "Extended"}), "Extended")
+
+    def test_load_dumps(self):
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+            tmp = Path(tmp)
+            (tmp / "a.h3p").write_bytes(self.images[0])
+            (tmp / "b.h3ps").write_bytes(sparse_image.pack([(0, bytes(self.images[1]))]))
+            (tmp / "short.bin").write_bytes(b"\xff" * 16)
+            (tmp / "notes.txt").write_text("not a dump")
+            paths, stack = diff_dumps.load_dumps(tmp)
+            self.assertEqual([path.name for path in paths], ["a.h3p", "b.h3ps"])
+            self.assertEqual(bytes(stack[1]), bytes(self.images[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+"""Tests for the dumper's read engine (scripts/dump_memory.py) against radio_sim.py"""
+
+import io
+import json
+import time
+import unittest
+from unittest import mock
+
+import support
+from support import SimTestCase, ble_link, matches, random_image, serial_link
+
+support.require("bleak")
+import dump_memory  # noqa: E402
+import radio_sim  # noqa: E402
+import read_journal  # noqa: E402
+import write_memory  # noqa: E402
+
+
+class WindowedTransferTest(SimTestCase):
+    async def test_read_under_loss(self):
+        image = random_image(1)
+        for make_link in (ble_link, serial_link):
+            with self.subTest(link=make_link.__name__):
+                radio = radio_sim.SimRadio(image)
+                dumper = dump_memory.H3PlusDumper(window=4, retries=5)
+                link = make_link(radio, loss=0.05, seed=3)
+                memory = await dumper.dump_link(link)
+                await link.stop()
+                self.assertTrue(matches(memory, image, dump_memory.READ_RANGES))
+
+    async def test_out_of_order_replies(self):
+        # Jitter reorders replies; they are matched by the echoed address
+        image = random_image(11)
+        radio = radio_sim.SimRadio(image)
+        link = support.clone_transport.BleTransport(
+            radio_sim.SimBleClient(radio, latency=0.002, jitter=0.01, seed=4))
+        memory = await dump_memory.H3PlusDumper(window=8).dump_link(link)
+        await link.stop()
+        self.assertTrue(matches(memory, image, dump_memory.READ_RANGES))
+        self.assertEqual(radio.stats["reads"], len(dump_memory.plan_chunks(dump_memory.READ_RANGES,
+                                                                           dump_memory.CHUNK_SIZE)))
+
+    async def test_payload_that_looks_like_a_header(self):
+        # At MTU 23 the second notification of the 0x0C90 reply starts at 0x0C90+16
+        image = random_image(12)
+        image[0x0C90 + 16:0x0C90 + 20] = b"W\x0c\x90\x20"
+        radio = radio_sim.SimRadio(image)
+        link = ble_link(radio, mtu=23)
+        memory = await dump_memory.H3PlusDumper(window=1, retries=0).dump_link(link)
+        await link.stop()
+        self.assertTrue(matches(memory, image, dump_memory.READ_RANGES))
+
+
+
+class BatchCacheTest(SimTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_path = self.tmp / "batch.json"
+        patch = mock.patch.object(dump_memory, "BATCH_CACHE_PATH", self.cache_path)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    async def negotiate(self, radio, batch=4):
+        """Handshake and negotiate; returns (batch size, addresses read)"""
+        reads = []
+        handle = radio.handle
+
+        def record(data):
+            reads.extend(int.from_bytes(data[i + 1:i + 3], "big")
+                         for i in range(0, len(data) - 3, 4) if data[i:i + 1] == b"R")
+            return handle(data)
+
+        radio.handle = record
+        dumper = dump_memory.H3PlusDumper(window=batch, batch=batch)
+        link = ble_link(radio)
+        await link.start(dumper.notification_handler)
+        await dumper.handshake(link)
+        await dumper.negotiate(link)
+        await link.stop()
+        return dumper.batch, reads
+
+    def cache(self):
+        return json.loads(self.cache_path.read_text())
+
+    async def test_keyed_by_address_without_reading_radio_memory(self):
+        image = random_image(13)
+        image[0x1B40:0x1B46] = b"qwerty"  # Password
+        self.cache_path.write_text(json.dumps({"BLE/P31183/qwerty": {"size": 4, "accepted": 4}}))
+        batch, reads = await self.negotiate(radio_sim.SimRadio(image, split_reads=True))
+        self.assertEqual(batch, 4)
+        self.assertFalse([addr for addr in reads if addr < 0x1B46 and 0x1B40 < addr + 32])
+        self.assertEqual(list(self.cache()), ["BLE/SIM/P31183"])
+        self.assertNotIn("qwerty", self.cache_path.read_text())
+
+        # Cached: no probe the second time
+        batch, reads = await self.negotiate(radio_sim.SimRadio(image, split_reads=True))
+        self.assertEqual((batch, reads), (4, []))
+
+    async def test_refused_batch_is_probed_again(self):
+        self.cache_path.write_text(json.dumps({"BLE/SIM/P31183": {"size": 4, "accepted": 1, "probed": time.time()}}))
+        batch, reads = await self.negotiate(radio_sim.SimRadio(split_reads=True))
+        self.assertEqual((batch, reads), (1, []))
+
+        stale = time.time() - dump_memory.BATCH_REPROBE - 1
+        self.cache_path.write_text(json.dumps({"BLE/SIM/P31183": {"size": 4, "accepted": 1, "probed": stale}}))
+        batch, _ = await self.negotiate(radio_sim.SimRadio(split_reads=True))
+        self.assertEqual(batch, 4)
+        self.assertEqual(self.cache()["BLE/SIM/P31183"]["accepted"], 4)
+
+
+class CloneSessionTest(SimTestCase):
+    async def test_dumper_and_writer_refuse_another_model(self):
+        for session in (dump_memory.H3PlusDumper(), write_memory.H3PlusWriter()):
+            with self.subTest(session=type(session).__name__):
+                link = ble_link(radio_sim.SimRadio(model=b"P99999\xff\xff"))
+                await link.start(session.notification_handler)
+                with self.assertRaisesRegex(RuntimeError, "Unexpected model 'P99999'"):
+                    await session.clone_handshake(link)
+                await link.stop()
+                self.assertIsNone(session.replies)
+
+    async def test_serial_port_and_baud_rate(self):
+        image = random_image(14)
+        radio = radio_sim.SimRadio(image)
+        output = self.tmp / "dump.bin"
+        with mock.patch.object(support.clone_transport, "open_serial",
+                               side_effect=lambda *args: serial_link(radio)) as open_serial:
+            await dump_memory.H3PlusDumper(window=8).run(str(output), port="/dev/ttyUSB0")
+            await write_memory.H3PlusWriter(window=8).run(str(output), port="/dev/ttyUSB1", baud=9600)
+        self.assertEqual(open_serial.call_args_list, [mock.call("/dev/ttyUSB0", 38400),
+                                                      mock.call("/dev/ttyUSB1", 9600)])
+        self.assertTrue(matches(output.read_bytes(), image, dump_memory.READ_RANGES))
+
+
+class MainTest(SimTestCase):
+    async def main(self, *argv):
+        """dump_memory.main() with `argv`; returns (exit code, output)"""
+        output = io.StringIO()
+        with mock.patch("sys.argv", ["dump_memory.py", *argv]), mock.patch("sys.stdout", output):
+            with self.assertRaises(SystemExit) as exit:
+                await dump_memory.main()
+        return exit.exception.code, output.getvalue()
+
+    async def test_failed_handshake_closes_the_journal(self):
+        closed = []
+        close = read_journal.ReadJournal.close
+
+        def spy(journal):
+            closed.append(journal.file is not None)
+            close(journal)
+
+        radio = radio_sim.SimRadio(model=b"P99999\xff\xff")
+        with mock.patch.object(read_journal.ReadJournal, "close", spy), \
+                mock.patch.object(support.clone_transport, "open_serial",
+                                  side_effect=lambda *args: serial_link(radio)):
+            code, output = await self.main(str(self.tmp / "dump.bin"), "--port", "SIM", "--reconnects", "0")
+        self.assertEqual(code, 1)
+        self.assertIn("Unexpected model", output)
+        self.assertEqual(closed, [True])
+
+    async def test_journal_that_cannot_be_opened(self):
+        code, output = await self.main(str(self.tmp / "missing" / "dump.bin"), "--port", "SIM")
+        self.assertEqual(code, 1)
+        self.assertIn("✗ Error:", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
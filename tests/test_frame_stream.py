@@ -0,0 +1,75 @@
+"""Tests for the notification reassembler (scripts/frame_stream.py)"""
+
+import unittest
+
+import support  # noqa: F401 (puts scripts/ on sys.path)
+import frame_stream
+
+
+def reply(addr, payload, trailer=0):
+    frame = b"W" + addr.to_bytes(2, "big") + bytes([len(payload)]) + payload
+    return frame + bytes([sum(payload) & 0xFF]) if trailer else frame
+
+
+class FrameReassemblerTest(unittest.TestCase):
+    def setUp(self):
+        self.pending = {}
+        self.framer = frame_stream.FrameReassembler(expect=self.pending.get)
+
+    def frames(self):
+        frames = []
+        while (frame := self.framer.pop()) is not None:
+            frames.append(bytes(frame))
+        return frames
+
+    def test_split_and_shared_notifications(self):
+        self.pending.update({0x0010: 32, 0x0030: 32})
+        stream = b"\x06" + reply(0x0010, bytes(range(32))) + reply(0x0030, bytes(range(32, 64)))
+        for start in range(0, len(stream), 20):
+            self.framer.feed(bytearray(stream[start:start + 20]))
+        self.assertEqual(self.frames(), [reply(0x0010, bytes(range(32))), reply(0x0030, bytes(range(32, 64)))])
+        self.assertEqual(self.framer.skipped, 1)
+        self.assertIsNone(self.framer.partial_addr)
+
+    def test_payload_that_looks_like_a_header(self):
+        # The second notification starts with the frame's own header bytes
+        self.pending[0x0C90] = 32
+        payload = bytes(16) + b"W\x0c\x90\x20" + bytes(12)
+        frame = reply(0x0C90, payload)
+        self.framer.feed(frame[:20])
+        self.assertEqual(self.framer.partial_addr, 0x0C90)
+        self.framer.feed(frame[20:])
+        self.assertEqual(self.frames(), [frame])
+
+    def test_short_reply_waits_for_reset(self):
+        self.pending.update({0x0010: 64, 0x0050: 32})
+        # Answers a 64-byte read with 32 bytes: nothing completes until the read times out
+        self.framer.feed(b"W\x00\x10\x40" + bytes(32))
+        self.assertEqual(self.frames(), [])
+        self.framer.reset()
+        self.framer.feed(reply(0x0050, bytes(32)))
+        self.assertEqual(self.frames(), [reply(0x0050, bytes(32))])
+
+    def test_skips_headers_of_unawaited_reads(self):
+        self.pending[0x0030] = 32
+        self.framer.feed(reply(0x0010, b"W\x00\x30" + bytes(29)) + reply(0x0030, bytes(32)))
+        self.assertEqual(self.frames(), [reply(0x0030, bytes(32))])
+
+    def test_length_byte_must_match_the_request(self):
+        self.pending[0x0010] = 32
+        self.framer.feed(reply(0x0010, bytes(16)))
+        self.assertEqual(self.frames(), [])
+
+    def test_checksum_trailer(self):
+        self.framer.trailer = 1
+        self.pending.update({0x0010: 32, 0x0030: 32})
+        good = reply(0x0030, bytes(range(32)), trailer=1)
+        bad = bytearray(reply(0x0010, bytes(range(32)), trailer=1))
+        bad[-1] ^= 1
+        self.framer.feed(bytes(bad) + good)
+        self.assertEqual(self.frames(), [good[:-1]])
+        self.assertEqual(self.framer.corrupt, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+"""Tests for the chunked image diff (scripts/image_diff.py)"""
+
+import unittest
+
+from support import random_image
+
+import image_diff
+
+
+def naive_offsets(old, new):
+    return [addr for addr in range(len(old)) if old[addr] != new[addr]]
+
+
+class DiffTest(unittest.TestCase):
+    def test_runs(self):
+        old = bytes(16)
+        new = bytearray(old)
+        new[2] = 0x01
+        new[5:8] = b"\x01\x02\x03"
+        runs = image_diff.diff_chunk(0x100, old, new)
+        self.assertEqual(runs, [image_diff.DiffRun(0x102, b"\x00", b"\x01"),
+                                image_diff.DiffRun(0x105, b"\x00\x00\x00", b"\x01\x02\x03")])
+        self.assertEqual([str(run) for run in runs],
+                         ["0x0102:0x00->0x01", "0x0105..0x0107 changed: 000000->010203"])
+
+    def test_equal_chunks(self):
+        self.assertEqual(image_diff.diff_chunk(0, b"abc", b"abc"), [])
+
+    def test_matches_bytewise_diff(self):
+        old = random_image(1)
+        new = bytearray(old)
+        for addr in (0, 0x3FF, 0x400, 0x401, 0x1234, 0x3FFF):  # Chunk edges included
+            new[addr] ^= 0xFF
+        diff = image_diff.diff_images(old, new)
+        self.assertEqual(diff.offsets(), naive_offsets(old, new))
+        self.assertEqual(diff.changed_bytes, 6)
+
+    def test_ranges(self):
+        old = bytes(0x100)
+        new = b"\x01" * 0x100
+        diff = image_diff.diff_images(old, new, ranges=[(0x10, 0x20), (0x80, 0x81)])
+        self.assertEqual(diff.offsets(), list(range(0x10, 0x20)) + [0x80])
+
+    def test_truncated_keeps_arrival_order(self):
+        diff = image_diff.ImageDiff()
+        diff.add([image_diff.DiffRun(0x200, b"\x00\x00", b"\x01\x01")])
+        diff.add([image_diff.DiffRun(0x100, b"\x00\x00", b"\x01\x01")])
+        self.assertEqual(diff.truncated(3).offsets(), [0x100, 0x200, 0x201])
+
+
+if __name__ == "__main__":
+    unittest.main()
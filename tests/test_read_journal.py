@@ -0,0 +1,39 @@
+"""Tests for resuming a dump from its read journal (scripts/read_journal.py)"""
+
+import unittest
+
+import support
+from support import SimTestCase, matches, random_image
+
+support.require("bleak")
+import dump_memory  # noqa: E402
+import radio_sim  # noqa: E402
+import read_journal  # noqa: E402
+
+
+class JournalResumeTest(SimTestCase):
+    async def test_resume_reads_only_missing_chunks(self):
+        image = random_image(6)
+        output = self.tmp / "dump.bin"
+        journal_path = self.tmp / "dump.bin.journal"
+
+        # The first run gives up on the first lost reply
+        journal = read_journal.ReadJournal(journal_path).open()
+        with self.assertRaises(RuntimeError):
+            await self.dump(dump_memory.H3PlusDumper(window=4, journal=journal, retries=0),
+                            radio_sim.SimRadio(image), output, loss=0.2, seed=1)
+        journal.close()
+
+        journal = read_journal.ReadJournal(journal_path).open(resume=True)
+        self.assertTrue(journal.chunks)
+        radio = radio_sim.SimRadio(image)
+        memory = await self.dump(dump_memory.H3PlusDumper(window=4, journal=journal),
+                                 radio, output)
+        self.assertTrue(matches(memory, image, dump_memory.READ_RANGES))
+        self.assertLess(radio.stats["reads"], len(dump_memory.plan_chunks(dump_memory.READ_RANGES,
+                                                                         dump_memory.CHUNK_SIZE)))
+        self.assertFalse(journal_path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
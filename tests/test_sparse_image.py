@@ -0,0 +1,61 @@
+"""Tests for the .h3ps container (scripts/sparse_image.py)"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import support
+import sparse_image
+
+
+class CoalesceTest(unittest.TestCase):
+    def test_merges_overlapping_and_adjacent_spans(self):
+        spans = [(0x40, 0x20), (0x00, 0x20), (0x20, 0x10), (0x30, 0x18), (0x100, 0x20)]
+        self.assertEqual(sparse_image.coalesce(spans), [(0x00, 0x60), (0x100, 0x120)])
+
+    def test_empty(self):
+        self.assertEqual(sparse_image.coalesce([]), [])
+
+
+class ContainerTest(unittest.TestCase):
+    def setUp(self):
+        self.memory = support.random_image(1)
+        self.extents = sparse_image.extents_from_ranges(self.memory, [(0x0C90, 0x0D00), (0x0000, 0x0340)])
+
+    def test_round_trip(self):
+        data = sparse_image.pack(self.extents, meta={"window": 4})
+        extents, image_size, meta = sparse_image.unpack(data)
+        self.assertEqual(extents, sorted(self.extents))
+        self.assertEqual(image_size, sparse_image.IMAGE_SIZE)
+        self.assertEqual(meta, {"window": 4})
+
+    def test_expand_fills_unread_bytes(self):
+        memory = sparse_image.expand(self.extents)
+        self.assertEqual(memory[0x0000:0x0340], self.memory[0x0000:0x0340])
+        self.assertEqual(memory[0x0340:0x0C90], b"\xff" * (0x0C90 - 0x0340))
+
+    def test_rejects_bad_data(self):
+        data = bytearray(sparse_image.pack(self.extents))
+        for broken, message in ((b"XXXX" + data[4:], "Not a sparse"),
+                                (data[:8], "Truncated header"),
+                                (data[:-1], "Truncated extent"),
+                                (data[:-1] + bytes([data[-1] ^ 1]), "CRC mismatch")):
+            with self.subTest(message=message), self.assertRaisesRegex(ValueError, message):
+                sparse_image.unpack(bytes(broken))
+
+    def test_extent_past_image_end(self):
+        with self.assertRaises(ValueError):
+            sparse_image.pack([(0x3FF0, b"\x00" * 0x20)])
+
+    def test_load_image_reads_flat_and_sparse(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            flat = Path(tmp) / "dump.h3p"
+            sparse = Path(tmp) / "dump.h3ps"
+            flat.write_bytes(self.memory)
+            sparse.write_bytes(sparse_image.pack(self.extents))
+            self.assertEqual(sparse_image.load_image(flat), self.memory)
+            self.assertEqual(sparse_image.load_image(sparse), sparse_image.expand(self.extents))
+
+
+if __name__ == "__main__":
+    unittest.main()
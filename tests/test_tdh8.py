@@ -0,0 +1,117 @@
+"""Tests for the CHIRP driver (info/tdh8.py); skipped without CHIRP"""
+
+import unittest
+
+import support
+from support import random_image
+
+tdh8 = support.require("tdh8", "CHIRP is not installed")
+import radio_sim  # noqa: E402
+from chirp import chirp_common, memmap  # noqa: E402
+from chirp.settings import InvalidValueError  # noqa: E402
+
+
+class ToneTableTest(unittest.TestCase):
+    def setUp(self):
+        self.radio = tdh8.TDH3_Plus.__new__(tdh8.TDH3_Plus)
+
+    def test_bcd_tables(self):
+        self.assertEqual(len(tdh8.BCD_DECODE), 100)
+        self.assertEqual(tdh8.BCD_ENCODE[47], 0x47)
+        for n, bcd in enumerate(tdh8.BCD_ENCODE):
+            self.assertEqual(tdh8.BCD_DECODE[bcd], n)
+        self.assertNotIn(0x4A, tdh8.BCD_DECODE)
+
+    def test_vfo_tones_round_trip(self):
+        tones = (["Off"] + ["%2.1fHz" % tone for tone in chirp_common.TONES]
+                 + ["%03i%s" % (code, pol) for code in chirp_common.DTCS_CODES for pol in "NI"])
+        for tone in tones:
+            with self.subTest(tone=tone):
+                self.assertEqual(self.radio._decode_vfo_tone(self.radio._encode_vfo_tone(tone)), tone)
+
+    def test_vfo_tone_words(self):
+        self.assertEqual(self.radio._encode_vfo_tone("88.5Hz"), [0x85, 0x08])
+        self.assertEqual(self.radio._encode_vfo_tone("754I"), [0x54, 0xC7])
+        self.assertEqual(self.radio._decode_vfo_tone([0x23, 0x80]), "023N")
+        # Not in chirp_common.TONES but still BCD
+        self.assertEqual(self.radio._decode_vfo_tone([0x01, 0x10]), "100.1Hz")
+
+    def test_invalid_vfo_tone_word_raises(self):
+        for code in ([0x4A, 0x80], [0x00, 0x00], [0x9A, 0x10]):
+            with self.subTest(code=code), self.assertLogs(tdh8.LOG), self.assertRaises(InvalidValueError):
+                self.radio._decode_vfo_tone(code)
+        with self.assertLogs(tdh8.LOG), self.assertRaises(InvalidValueError):
+            self.radio._encode_vfo_tone("Cross")
+
+
+class UploadTest(unittest.TestCase):
+    def open_radio(self, image):
+        sim = radio_sim.SimRadio(image, writable=None)
+        radio = tdh8.TDH3_Plus(radio_sim.SimSerial(sim))
+        radio.ident_mode = tdh8._do_ident(radio.pipe, radio._idents[0])
+        return sim, radio
+
+    def edit(self, radio, offset, data):
+        """Patch the downloaded image at `offset` (image offsets include the 8-byte ident)"""
+        image = bytearray(radio._mmap.get_packed())
+        image[offset:offset + len(data)] = data
+        radio._mmap = memmap.MemoryMapBytes(bytes(image))
+
+    def test_download_upload_round_trip(self):
+        image = random_image(9)
+        sim, radio = self.open_radio(image)
+        radio._mmap = tdh8._do_download(radio)
+        tdh8._do_upload(radio)
+        self.assertEqual(sim.image, image)
+
+    def test_upload_skips_ranges_never_read(self):
+        image = random_image(12)
+        for delta in (True, False):
+            with self.subTest(delta=delta):
+                sim, radio = self.open_radio(image)
+                radio._delta_upload = delta
+                radio._mmap = tdh8._do_download(radio)
+                # Download fills 0x1500-0x1800 with 0xFF; make sure it is not written back
+                self.edit(radio, 0x1600 + 8, b"\x00" * 0x20)
+                tdh8._do_upload(radio)
+                self.assertEqual(sim.image, image)
+                self.assertEqual(sim.stats["writes"], 0 if delta else sum(
+                    (end - start) // 0x20 for start, end in radio._ranges_read))
+
+    def test_delta_upload_writes_only_changed_blocks(self):
+        image = random_image(10)
+        _, radio = self.open_radio(image)
+        radio._mmap = tdh8._do_download(radio)
+
+        # Another radio, one channel block different from the download
+        other = bytearray(image)
+        other[0x0065] ^= 0x5A
+        sim = radio_sim.SimRadio(other, writable=None)
+        radio.pipe = radio_sim.SimSerial(sim)
+        tdh8._do_upload(radio)
+        self.assertEqual(sim.stats["writes"], 1)
+        self.assertEqual(sim.image, image)
+
+        tdh8._do_upload(radio)
+        self.assertEqual(sim.stats["writes"], 1)
+
+    def test_delta_upload_writes_power_tune(self):
+        image = random_image(11)
+        sim, radio = self.open_radio(image)
+        radio._mmap = tdh8._do_download(radio)
+
+        # powertune is at #seekto 0x1f58 in the image, 0x1F50-0x1F80 on the radio
+        tune = bytes(range(0x30))
+        self.edit(radio, 0x1F58, tune)
+        tdh8._do_upload(radio)
+        self.assertEqual(sim.image[0x1F50:0x1F80], tune)
+        self.assertEqual(sim.stats["writes"], 2)
+
+
+class CableTest(unittest.TestCase):
+    def test_scripts_use_the_driver_baud_rate(self):
+        self.assertEqual(support.clone_transport.SERIAL_BAUD, tdh8.TDH8.BAUD_RATE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Tests for the BLE writer (scripts/write_memory.py) against radio_sim.py"""
+
+import unittest
+
+import support
+from support import SimTestCase, ble_link, matches, random_image, serial_link
+
+support.require("bleak")
+import dump_memory  # noqa: E402
+import radio_sim  # noqa: E402
+import write_memory  # noqa: E402
+
+
+class WindowedWriteTest(SimTestCase):
+    async def test_write_under_loss(self):
+        image = random_image(2)
+        for make_link in (ble_link, serial_link):
+            with self.subTest(link=make_link.__name__):
+                radio = radio_sim.SimRadio()
+                writer = write_memory.H3PlusWriter(window=4)
+                link = make_link(radio, loss=0.01, seed=2)
+                await writer.write_link(link, image)
+                await link.stop()
+                self.assertTrue(matches(radio.image, image, writer.ranges))
+
+    async def test_one_packet_per_block_without_loss(self):
+        radio = radio_sim.SimRadio()
+        writer = write_memory.H3PlusWriter(window=8, ranges=write_memory.WRITE_RANGES["channels"])
+        link = ble_link(radio)
+        await writer.write_link(link, random_image(3))
+        await link.stop()
+        self.assertEqual(radio.stats["writes"], len(write_memory.plan_blocks(writer.ranges)))
+
+
+class RoundTripTest(SimTestCase):
+    async def test_dump_then_write(self):
+        image = random_image(7)
+        source = radio_sim.SimRadio(image)
+        link = ble_link(source)
+        memory = await dump_memory.H3PlusDumper(window=4).dump_link(link)
+        await link.stop()
+
+        target = radio_sim.SimRadio(random_image(8))
+        writer = write_memory.H3PlusWriter(window=4)
+        link = ble_link(target)
+        await writer.write_link(link, bytes(memory))
+        await link.stop()
+
+        # The dump skips channels 51-199, so only what it read survives
+        ranges = [(max(start, read_start), min(end, read_end))
+                  for start, end in writer.ranges
+                  for read_start, read_end in dump_memory.READ_RANGES
+                  if max(start, read_start) < min(end, read_end)]
+        self.assertTrue(matches(target.image, image, ranges))
+
+
+if __name__ == "__main__":
+    unittest.main()